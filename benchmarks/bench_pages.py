@@ -0,0 +1,321 @@
+"""
+Benchmark headless das páginas do dashboard.
+
+Cada página (Home.py e as de streamlitPages/pages/) é executada pelo AppTest
+do Streamlit, sem navegador, em uma série de cenários de filtros (período
+completo ou curto, todos os gêneros ou um só, mudanças de Top N, seleção de
+países...). Para cada tamanho de dataset é gerado um CSV com as primeiras N
+linhas do arquivo de origem (repetidas, se N for maior que o arquivo) ou,
+com --synthetic (ou sem arquivo de origem), um dataset sintético de N linhas
+(ver generate_dataset.py).
+
+Cada (tamanho, página) roda em um processo separado, para que o pico de
+memória e o custo da primeira execução não sejam contaminados pelas outras
+páginas. Por cenário são medidos:
+
+- first_run_s:   primeira execução da página com os filtros padrão
+- rerun_s:       rerun após a mudança de filtro do cenário
+- warm_rerun_s:  o mesmo rerun repetido (caches já preenchidos)
+
+e, por página, cold_s (primeira execução no processo), peak_rss_mb e
+rss_delta_mb (pico de memória do processo e quanto ele cresceu após os imports).
+
+O resultado é gravado em JSON (por padrão .bench_data/results/<commit>.json,
+fora dos arquivos versionados) para comparar commits:
+
+    python benchmarks/bench_pages.py --source movies_dataset.csv --sizes 10000,100000
+    python benchmarks/bench_pages.py --synthetic --sizes 1000000,5000000
+    python benchmarks/bench_pages.py --compare .bench_data/results/antigo.json .bench_data/results/novo.json
+
+O backend de dados segue as variáveis de ambiente do dashboard
+(DASHBOARD_BACKEND, DASHBOARD_STREAMING), que também ficam registradas no JSON.
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+from generate_dataset import generate_dataset
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(ROOT, 'streamlitPages')
+DATA_DIR = os.path.join(ROOT, '.bench_data')
+RESULTS_DIR = os.path.join(DATA_DIR, 'results')
+
+DEFAULT_SIZES = [10_000, 50_000, 200_000]
+
+# Variáveis de ambiente que mudam o comportamento do dashboard
+ENV_VARIABLES = ['DASHBOARD_BACKEND', 'DASHBOARD_STREAMING', 'DASHBOARD_STREAM_MEMORY_MB']
+
+# Marca da linha de resultado impressa pelo processo de cada página
+RESULT_MARKER = 'BENCH_RESULT '
+
+# Rerun mais lento que isso em relação à referência é destacado no --compare
+REGRESSION_RATIO = 1.2
+
+
+# --- Cenários ---
+# Cada cenário é (nome, ação); a ação recebe o AppTest já executado com os
+# filtros padrão e altera os widgets antes do rerun medido.
+
+def _short_period(at):
+    slider = at.slider[0]
+    slider.set_value((int(slider.max) - 5, int(slider.max)))
+
+
+def _one_genre(at):
+    for checkbox in at.checkbox[1:]:
+        checkbox.uncheck()
+
+
+SCENARIOS = {
+    'Home.py': [
+        ('padrao', None),
+    ],
+    'roi_por_genero.py': [
+        ('padrao', None),
+        ('periodo_curto', _short_period),
+        ('um_genero', _one_genre),
+    ],
+    'tendencias_temporais.py': [
+        ('padrao', None),
+        ('periodo_curto', _short_period),
+        ('ordenar_decadas', lambda at: at.radio[0].set_value(at.radio[0].options[-1])),
+    ],
+    'analise_correlacao.py': [
+        ('padrao', None),
+        ('tres_colunas', lambda at: at.multiselect[0].set_value(at.multiselect[0].options[:3])),
+        ('por_genero', lambda at: at.radio[0].set_value('Por gênero')),
+        ('limiar_alto', lambda at: at.slider[0].set_value(0.9)),
+    ],
+    'performance_talentos.py': [
+        ('padrao', None),
+        ('top_25', lambda at: at.number_input[0].set_value(25)),
+        ('metrica_roi', lambda at: at.selectbox[0].set_value('ROI_Médio')),
+        ('atores_min_1', lambda at: (at.radio[0].set_value('Ator Principal'), at.slider[0].set_value(1))),
+    ],
+    'analise_paises.py': [
+        ('padrao', None),
+        ('um_pais', lambda at: at.multiselect[0].set_value(at.multiselect[0].options[:1])),
+        ('todos_paises', lambda at: at.multiselect[0].set_value(at.multiselect[0].options)),
+        ('ordenar_roi', lambda at: at.radio[0].set_value('ROI_Médio')),
+    ],
+    'performance_abertura.py': [
+        ('padrao', None),
+        ('periodo_curto', _short_period),
+        ('um_genero', _one_genre),
+        ('proporcao_abertura_semana', lambda at: at.selectbox[0].set_value('Opening_to_Week_Ratio')),
+    ],
+}
+
+
+def page_path(page):
+    if page == 'Home.py':
+        return os.path.join(APP_DIR, page)
+    return os.path.join(APP_DIR, 'pages', page)
+
+
+# --- Dados ---
+
+def prepare_dataset(source, rows, data_dir=DATA_DIR):
+    """
+    Gera (uma vez) o CSV com `rows` linhas e o snapshot correspondente.
+    Sem `source`, as linhas são sintéticas. Devolve o diretório de trabalho
+    onde as páginas devem rodar.
+    """
+    work_dir = os.path.join(data_dir, 'sintetico' if source is None else '', str(rows))
+    csv_path = os.path.join(work_dir, 'movies_dataset.csv')
+    os.makedirs(work_dir, exist_ok=True)
+
+    if not os.path.exists(csv_path):
+        if source is None:
+            generate_dataset(rows, csv_path)
+        else:
+            with open(source, encoding='utf-8') as f:
+                header = f.readline()
+                lines = f.readlines()
+            tmp_path = f"{csv_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as out:
+                out.write(header)
+                out.writelines(itertools.islice(itertools.cycle(lines), rows))
+            os.replace(tmp_path, csv_path)
+
+    # O snapshot é montado antes das medições, para não pesar na primeira página
+    subprocess.run(
+        [sys.executable, '-c', 'import aggregations; aggregations.dataset_version()'],
+        cwd=work_dir, env={**os.environ, 'PYTHONPATH': APP_DIR}, check=True
+    )
+    return work_dir
+
+
+# --- Execução de uma página (processo filho) ---
+
+def _max_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB, macOS em bytes
+    return usage / 1024 ** 2 if sys.platform == 'darwin' else usage / 1024
+
+
+def run_page(page):
+    """
+    Executa os cenários de uma página no processo atual e devolve as medições.
+    """
+    sys.path.insert(0, APP_DIR)
+    from streamlit.testing.v1 import AppTest
+
+    baseline_rss = _max_rss_mb()
+    scenarios = []
+    cold = None
+    for name, action in SCENARIOS[page]:
+        at = AppTest.from_file(page_path(page), default_timeout=600)
+        start = time.perf_counter()
+        at.run()
+        first_run = time.perf_counter() - start
+        if cold is None:
+            cold = first_run
+
+        if action is not None:
+            action(at)
+        start = time.perf_counter()
+        at.run()
+        rerun = time.perf_counter() - start
+
+        start = time.perf_counter()
+        at.run()
+        warm_rerun = time.perf_counter() - start
+
+        scenarios.append({
+            'name': name,
+            'first_run_s': round(first_run, 4),
+            'rerun_s': round(rerun, 4),
+            'warm_rerun_s': round(warm_rerun, 4),
+            'errors': [str(e.value) for e in at.exception],
+        })
+
+    peak_rss = _max_rss_mb()
+    return {
+        'page': page,
+        'cold_s': round(cold, 4),
+        'peak_rss_mb': round(peak_rss, 1),
+        'rss_delta_mb': round(peak_rss - baseline_rss, 1),
+        'scenarios': scenarios,
+    }
+
+
+def run_page_subprocess(page, work_dir):
+    """
+    Executa uma página em um processo novo, com o diretório de trabalho do dataset.
+    """
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--worker', page],
+        cwd=work_dir, capture_output=True, text=True
+    )
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    raise RuntimeError(f"Falha ao executar {page}:\n{completed.stderr[-2000:]}")
+
+
+# --- Relatórios ---
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def run_suite(source, sizes, pages):
+    """
+    Executa todas as páginas em todos os tamanhos de dataset.
+    """
+    report = {
+        'commit': git_commit(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'environment': {name: os.environ.get(name) for name in ENV_VARIABLES},
+        'source': 'sintetico' if source is None else os.path.abspath(source),
+        'results': [],
+    }
+    for rows in sizes:
+        work_dir = prepare_dataset(source, rows)
+        for page in pages:
+            result = run_page_subprocess(page, work_dir)
+            result['rows'] = rows
+            report['results'].append(result)
+            slowest = max(s['rerun_s'] for s in result['scenarios'])
+            print(f"{rows:>10,} {page:<26} frio {result['cold_s']:7.2f}s | "
+                  f"rerun máx {slowest:7.3f}s | pico {result['peak_rss_mb']:8.1f} MB")
+    return report
+
+
+def compare(base_path, new_path, ratio=REGRESSION_RATIO):
+    """
+    Compara dois relatórios, cenário a cenário, e destaca reruns mais lentos.
+    """
+    def index(path):
+        with open(path, encoding='utf-8') as f:
+            report = json.load(f)
+        return report, {(r['rows'], r['page'], s['name']): (r, s)
+                        for r in report['results'] for s in r['scenarios']}
+
+    base_report, base = index(base_path)
+    new_report, new = index(new_path)
+    print(f"Referência {base_report['commit']} -> {new_report['commit']}")
+    regressions = 0
+    for key in sorted(set(base) & set(new)):
+        (_, old), (_, cur) = base[key], new[key]
+        change = cur['rerun_s'] / old['rerun_s'] if old['rerun_s'] else float('inf')
+        flag = ' <-- mais lento' if change > ratio else ''
+        regressions += bool(flag)
+        print(f"{key[0]:>10,} {key[1]:<26} {key[2]:<16} {old['rerun_s']:8.3f}s -> {cur['rerun_s']:8.3f}s "
+              f"({change:5.2f}x){flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark headless das páginas do dashboard.")
+    parser.add_argument('--source', default=os.path.join(ROOT, 'movies_dataset.csv'),
+                        help="CSV de origem das linhas")
+    parser.add_argument('--synthetic', action='store_true',
+                        help="Usa datasets sintéticos (padrão quando o CSV de origem não existe)")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="Tamanhos de dataset (linhas), separados por vírgula")
+    parser.add_argument('--pages', default=','.join(SCENARIOS), help="Páginas a medir")
+    parser.add_argument('--output', help="Arquivo JSON de saída")
+    parser.add_argument('--compare', nargs=2, metavar=('REFERENCIA', 'NOVO'),
+                        help="Compara dois relatórios JSON")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(RESULT_MARKER + json.dumps(run_page(args.worker), ensure_ascii=False))
+        return 0
+
+    if args.compare:
+        return 1 if compare(*args.compare) else 0
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    pages = args.pages.split(',')
+    source = None if args.synthetic or not os.path.exists(args.source) else args.source
+    report = run_suite(source, sizes, pages)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{report['commit']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\nResultados gravados em {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Gerador de datasets sintéticos com o mesmo schema do movies_dataset.csv.
+
+Produz de dezenas de milhares a dezenas de milhões de linhas para testes de
+carga e de agregação, sem depender do arquivo real. As distribuições imitam
+as do dataset original:
+
+- Genre (8) e Country (12) uniformes; ReleaseYear uniforme entre 1980 e 2024
+- Director e LeadActor com contagem de filmes em lei de potência (poucos
+  talentos com muitos filmes, cauda longa com um só filme)
+- BudgetUSD uniforme; Global_BoxOfficeUSD = orçamento × multiplicador log-normal;
+  bilheteria nos EUA, estreia e primeira semana como frações da global
+- IMDbRating de 3.0 a 9.0, RottenTomatoesScore de 0 a 100, votos uniformes
+
+As linhas são geradas e gravadas em blocos (CSV e/ou Parquet), então o
+arquivo final pode ser maior que a memória. A mesma semente (com o mesmo
+tamanho de bloco) gera sempre o mesmo arquivo.
+
+Uso:
+    python benchmarks/generate_dataset.py --rows 1000000 --csv movies_dataset.csv
+    python benchmarks/generate_dataset.py --rows 50000000 --csv big.csv --parquet big.parquet
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'streamlitPages'))
+
+from snapshot import CSV_SCHEMA  # noqa: E402
+
+GENRES = ['Action', 'Comedy', 'Documentary', 'Drama', 'Horror', 'Romance', 'Sci-Fi', 'Thriller']
+COUNTRIES = ['Brazil', 'Canada', 'China', 'France', 'Germany', 'India',
+             'Italy', 'Japan', 'Korea', 'Spain', 'UK', 'USA']
+FIRST_YEAR, LAST_YEAR = 1980, 2024
+
+# Expoente da lei de potência das contagens de filmes por talento
+# (1.5 reproduz a proporção entre os primeiros talentos do dataset original)
+TALENT_SKEW = 1.5
+
+# Linhas por talento possível (200 mil linhas -> 8 mil nomes, dos quais ~3 mil aparecem)
+ROWS_PER_TALENT = 25
+
+CHUNK_ROWS = 500_000
+
+
+def talent_pool(prefix, size, skew=TALENT_SKEW):
+    """
+    Nomes dos talentos e probabilidades acumuladas de cada um (lei de potência).
+    """
+    names = np.array([f"{prefix} {k}" for k in range(1, size + 1)], dtype=object)
+    weights = 1.0 / np.arange(1, size + 1) ** skew
+    cumulative = np.cumsum(weights)
+    return names, cumulative / cumulative[-1]
+
+
+def generate_chunk(rng, start, rows, directors, actors):
+    """
+    Gera `rows` linhas (a partir do índice `start`) como tabela Arrow no schema do CSV.
+    """
+    budget = rng.uniform(1e6, 2e8, rows).round(2)
+    global_box = (budget * rng.lognormal(np.log(2.0), 0.6, rows)).round(2)
+
+    def pick(pool):
+        names, cumulative = pool
+        return names[np.searchsorted(cumulative, rng.random(rows), side='right').clip(max=len(names) - 1)]
+
+    columns = {
+        'Title': [f"Movie {i}" for i in range(start, start + rows)],
+        'Genre': np.array(GENRES, dtype=object)[rng.integers(0, len(GENRES), rows)],
+        'Country': np.array(COUNTRIES, dtype=object)[rng.integers(0, len(COUNTRIES), rows)],
+        'Director': pick(directors),
+        'LeadActor': pick(actors),
+        'ReleaseYear': rng.integers(FIRST_YEAR, LAST_YEAR + 1, rows),
+        'BudgetUSD': budget,
+        'US_BoxOfficeUSD': (global_box * rng.uniform(0.2, 0.6, rows)).round(2),
+        'Global_BoxOfficeUSD': global_box,
+        'Opening_Day_SalesUSD': (global_box * rng.uniform(0.02, 0.10, rows)).round(2),
+        'One_Week_SalesUSD': (global_box * rng.uniform(0.10, 0.30, rows)).round(2),
+        'IMDbRating': rng.integers(30, 91, rows) / 10,
+        'RottenTomatoesScore': rng.integers(0, 101, rows).astype('float64'),
+        'NumVotesIMDb': rng.integers(100, 2_000_000, rows),
+        'NumVotesRT': rng.integers(10, 500_000, rows),
+    }
+    return pa.Table.from_pydict(columns, schema=CSV_SCHEMA)
+
+
+def generate_dataset(rows, csv_path=None, parquet_path=None, seed=0, chunk_rows=CHUNK_ROWS,
+                     talents=None, skew=TALENT_SKEW):
+    """
+    Gera o dataset em blocos e grava em CSV e/ou Parquet. Devolve o número de linhas.
+    """
+    if csv_path is None and parquet_path is None:
+        raise ValueError("Informe ao menos um arquivo de saída (CSV ou Parquet)")
+
+    talents = talents or max(50, rows // ROWS_PER_TALENT)
+    directors = talent_pool('Dir', talents, skew)
+    actors = talent_pool('Act', talents, skew)
+    seeds = np.random.SeedSequence(seed)
+
+    csv_file = csv_writer = parquet_writer = None
+    outputs = [path for path in (csv_path, parquet_path) if path]
+    try:
+        if csv_path:
+            # Os valores gerados não têm vírgulas nem aspas: sem aspas, como o CSV original
+            csv_file = open(f"{csv_path}.tmp", 'wb')
+            csv_file.write((','.join(CSV_SCHEMA.names) + '\n').encode('utf-8'))
+            csv_writer = pv.CSVWriter(csv_file, CSV_SCHEMA,
+                                      write_options=pv.WriteOptions(include_header=False, quoting_style='none'))
+        if parquet_path:
+            parquet_writer = pq.ParquetWriter(f"{parquet_path}.tmp", CSV_SCHEMA, compression='zstd')
+
+        # Uma semente independente por bloco, derivada da semente principal
+        for start, chunk_seed in zip(range(0, rows, chunk_rows), seeds.spawn((rows + chunk_rows - 1) // chunk_rows)):
+            table = generate_chunk(np.random.default_rng(chunk_seed), start, min(chunk_rows, rows - start),
+                                   directors, actors)
+            if csv_writer:
+                csv_writer.write_table(table)
+            if parquet_writer:
+                parquet_writer.write_table(table)
+    finally:
+        for writer in (csv_writer, parquet_writer):
+            if writer:
+                writer.close()
+        if csv_file:
+            csv_file.close()
+
+    for path in outputs:
+        os.replace(f"{path}.tmp", path)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera um dataset sintético de filmes.")
+    parser.add_argument('--rows', type=int, default=200_000, help="Quantidade de linhas")
+    parser.add_argument('--csv', help="Arquivo CSV de saída")
+    parser.add_argument('--parquet', help="Arquivo Parquet de saída")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help="Linhas geradas por bloco")
+    parser.add_argument('--talents', type=int, help="Quantidade de diretores e de atores distintos")
+    parser.add_argument('--skew', type=float, default=TALENT_SKEW, help="Expoente da lei de potência dos talentos")
+    args = parser.parse_args()
+
+    if not args.csv and not args.parquet:
+        parser.error("informe --csv e/ou --parquet")
+
+    start = time.perf_counter()
+    generate_dataset(args.rows, args.csv, args.parquet, args.seed, args.chunk_rows, args.talents, args.skew)
+    print(f"{args.rows:,} linhas geradas em {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
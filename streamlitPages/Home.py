@@ -1,5 +1,5 @@
 import streamlit as st
-from utils import load_data
+from utils import load_overview, show_timing_panel, start_page_timing
 
 # Configuração da página
 st.set_page_config(
@@ -8,12 +8,14 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+start_page_timing('Home')
 
 # # Criar sidebar
 # create_sidebar()
 
-# Carregar dados
-df = load_data()
+# KPIs do resumo pré-calculado em disco (summary.py): a página inicial não
+# carrega o dataset nem importa pandas enquanto o CSV não muda
+overview = load_overview()
 
 ### HOME PAGE ###
 st.title("🎬 Bem-vindo ao Dashboard de Análise Cinematográfica")
@@ -45,17 +47,17 @@ col1, col2, col3, col4 = st.columns(4)
 with col1:
     st.metric(
         label="🎬 Total de Filmes",
-        value=f"{len(df):,}"
+        value=f"{overview['Total_Filmes']:,}"
     )
 
 with col2:
     st.metric(
         label="🎭 Gêneros Únicos",
-        value=df['Genre'].nunique()
+        value=overview['Generos_Unicos']
     )
 
 with col3:
-    receita_total = df['Global_BoxOfficeUSD'].sum() / 1e9
+    receita_total = overview['Bilheteria_Total'] / 1e9
     st.metric(
         label="💰 Bilheteria Total",
         value=f"${receita_total:.1f}B"
@@ -64,7 +66,7 @@ with col3:
 with col4:
     st.metric(
         label="📊 ROI Médio",
-        value=f"{df['ROI'].mean():.1f}%"
+        value=f"{overview['ROI_Médio']:.1f}%"
     )
 
 st.markdown("---")
@@ -74,4 +76,6 @@ st.markdown("""
 <div style='text-align: center; color: #666; padding: 20px;'>
     <p>🎬 Dashboard de Análise Cinematográfica | Desenvolvido com Streamlit</p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+show_timing_panel()
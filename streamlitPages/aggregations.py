@@ -0,0 +1,776 @@
+"""
+Motor de agregações compartilhado pelas páginas e pelos notebooks.
+
+Cada função devolve uma tabela pronta para exibição (mesmos nomes de colunas
+usados no dashboard) e é memoizada pela versão do dataset (hash do CSV) e
+pelos argumentos: o mesmo cálculo é feito uma vez por processo, não uma vez
+por página a cada rerun. Os resultados são compartilhados entre chamadas e
+não devem ser modificados no lugar.
+
+Os dados base (linhas compactas e tabelas aditivas como o cubo) ficam em um
+DatasetState por versão. Quando o CSV recebe linhas novas no fim, o snapshot
+grava um delta (ver snapshot.append_snapshot) e o próximo estado é montado a
+partir do anterior mais o delta: as linhas são intercaladas e as tabelas
+aditivas somadas, sem recalcular nada do zero. O novo estado é trocado de
+uma vez; sessões em andamento continuam usando o anterior até terminarem.
+
+Datasets maiores que a memória são processados em modo streaming (ver
+streaming.py): as tabelas aditivas saem de uma passada em blocos pelo CSV,
+combinadas pelas mesmas funções de merge, e as funções que precisam de
+linhas leem apenas as colunas que usam. Com DASHBOARD_BACKEND=sqlite as
+linhas vêm do banco indexado (ver sqlite_store.py), com os filtros aplicados
+na consulta. Com DASHBOARD_BACKEND=shared as linhas e as tabelas aditivas
+ficam em arquivos Arrow mapeados em memória, compartilhados por todos os
+processos da máquina (ver shared_store.py).
+
+Uso nos notebooks:
+    import sys; sys.path.append('streamlitPages')
+    import aggregations as agg
+    agg.roi_by_genre()
+"""
+
+import functools
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from cache_keys import normalize_args
+from compact import append_rows, compact_dataframe
+from correlation import ALL_ROWS, MOMENT_GROUPS, build_moments, group_values, pearson_matrix, strong_pairs
+from cube import CUBE_COLUMNS, add_tables, build_cube, filter_cube, plain_index, rollup
+from histograms import bin_columns, build_histograms, histogram_quantiles, rebin
+from shared_store import prebuilt_names, read_frame as read_shared_frame, read_table, shared_enabled, shared_table
+from quantiles import box_stats, build_quantile_summary, merge_quantile_summaries, summary_quantiles
+from snapshot import (CSV_PATH, OPENING_RATIOS, build_year_index, delta_chain, ensure_snapshot, read_deltas,
+                      read_snapshot, year_slice)
+from sqlite_store import ensure_store, query_rows, sqlite_enabled
+from streaming import read_frame, source_version, stream_artifacts, streaming_enabled
+from talents import TalentGrid, TalentLeaderboard
+from timing import phase
+
+# Quantidade padrão de resultados guardados por função
+MEMO_SIZE = 64
+
+NUMERIC_COLUMNS = [
+    'BudgetUSD', 'US_BoxOfficeUSD', 'Global_BoxOfficeUSD',
+    'Opening_Day_SalesUSD', 'One_Week_SalesUSD',
+    'IMDbRating', 'RottenTomatoesScore', 'NumVotesIMDb', 'NumVotesRT', 'ROI'
+]
+
+# Medidas com resumos de quantis por (dimensão, ReleaseYear) (ver quantiles.py)
+QUANTILE_VALUES = ['ROI', 'BudgetUSD', 'Global_BoxOfficeUSD']
+
+# Dimensões dos resumos de quantis -> nome do filtro correspondente
+# (em filter_cube e em sqlite_store.query_rows)
+QUANTILE_DIMENSIONS = {'Genre': 'genres', 'Country': 'countries'}
+
+# Proporções de abertura (colunas derivadas do snapshot, em %) com histogramas
+# por (Genre, ReleaseYear) (ver histograms.py)
+OPENING_RATIO_COLUMNS = list(OPENING_RATIOS)
+
+
+def source_meta(csv_path=CSV_PATH):
+    """
+    Metadados da versão atual do CSV: do snapshot (atualizado se o CSV mudou),
+    do banco SQLite ou, no modo streaming, apenas do hash do arquivo.
+    A chave 'backend' indica de onde as linhas são lidas.
+    """
+    if streaming_enabled(csv_path):
+        return source_version(csv_path)
+    if sqlite_enabled():
+        return ensure_store(csv_path)
+    return {'backend': 'shared' if shared_enabled() else 'snapshot', **ensure_snapshot(csv_path)}
+
+
+def dataset_version(csv_path=CSV_PATH):
+    """
+    Versão atual do dataset (SHA-256 do CSV). Atualiza o snapshot se o CSV mudou.
+    """
+    return source_meta(csv_path)['sha256']
+
+
+class DatasetState:
+    """
+    Dados base de uma versão do dataset, montados sob demanda.
+
+    - backend: 'snapshot', 'shared', 'sqlite' ou 'streaming' (ver source_meta)
+    - years: ReleaseYear de todas as linhas, na ordem do snapshot
+    - frames: colunas -> DataFrame compacto com essas colunas
+    - artifacts: nome -> tabela aditiva (ver register_artifact)
+    """
+
+    def __init__(self, version, num_rows, backend='snapshot'):
+        self.version = version
+        self.num_rows = num_rows
+        self.backend = backend
+        self.years = None
+        self.frames = {}
+        self.artifacts = {}
+        self.lock = threading.Lock()
+
+
+# Tabelas aditivas: nome -> (colunas usadas, função que monta a tabela a partir
+# das linhas, função que combina duas tabelas)
+ARTIFACTS = {}
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def register_artifact(name, columns, build, merge=add_tables):
+    """
+    Registra uma tabela aditiva (contagens e somas por chave). Em ingestões
+    incrementais e no modo streaming ela é atualizada combinando com `merge`
+    a tabela anterior e `build(linhas_novas)`.
+    """
+    ARTIFACTS[name] = (tuple(columns), build, merge)
+
+
+def current_state():
+    """
+    Estado da versão atual do dataset. Na troca de versão, o novo estado é
+    derivado do anterior pelos deltas quando possível (ver _advance_state).
+    """
+    global _state
+    meta = source_meta(CSV_PATH)
+    state = _state
+    if state is not None and state.version == meta['sha256']:
+        return state
+    with _state_lock:
+        if _state is None or _state.version != meta['sha256']:
+            _state = _advance_state(_state, meta)
+        return _state
+
+
+def _advance_state(old, meta):
+    """
+    Monta o estado da nova versão. Se a mudança foi apenas de linhas
+    acrescentadas, as linhas já carregadas e as tabelas aditivas do estado
+    anterior são atualizadas só com o delta; caso contrário o estado começa vazio.
+    """
+    new = DatasetState(meta['sha256'], meta['num_rows'], meta['backend'])
+    # Deltas só existem para o snapshot Parquet; no modo compartilhado a nova
+    # versão é montada uma vez por máquina, nos arquivos de shared_store
+    if old is None or old.backend != 'snapshot' or new.backend != 'snapshot':
+        return new
+    paths = delta_chain(old.version, new.version)
+    if not paths:
+        return new
+
+    delta = read_deltas(paths)
+    with old.lock:
+        years, frames, artifacts = old.years, dict(old.frames), dict(old.artifacts)
+
+    if years is not None:
+        # Mesma ordenação estável usada no snapshot: linhas novas entram depois das antigas do mesmo ano
+        all_years = np.concatenate([years, delta['ReleaseYear'].to_numpy(dtype='float64', na_value=np.nan)])
+        order = np.argsort(all_years, kind='stable')
+        new.years = all_years[order]
+        for columns, frame in frames.items():
+            delta_cols = delta.columns if columns is None else list(columns)
+            new.frames[columns] = append_rows(frame, delta[delta_cols]).take(order).reset_index(drop=True)
+
+    for name, table in artifacts.items():
+        columns, build, merge = ARTIFACTS[name]
+        new.artifacts[name] = merge(table, build(compact_dataframe(delta[list(columns)])))
+    return new
+
+
+def memoize(func=None, *, maxsize=MEMO_SIZE):
+    """
+    Memoiza a função por (versão do dataset, argumentos), em um LRU por função.
+    Quando a versão do dataset muda, os resultados antigos são descartados.
+    """
+    if func is None:
+        return functools.partial(memoize, maxsize=maxsize)
+
+    entries = OrderedDict()
+    state = {'version': None}
+    lock = threading.Lock()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        version = current_state().version
+        key = (normalize_args(args), normalize_args(kwargs))
+        with lock:
+            if state['version'] != version:
+                entries.clear()
+                state['version'] = version
+            if key in entries:
+                entries.move_to_end(key)
+                return entries[key]
+
+        result = func(*args, **kwargs)
+
+        with lock:
+            if state['version'] == version:
+                entries[key] = result
+                while len(entries) > maxsize:
+                    entries.popitem(last=False)
+        return result
+
+    wrapper.cache_clear = entries.clear
+    return wrapper
+
+
+# --- Dados base ---
+
+def load_frame(columns=None):
+    """
+    Linhas do snapshot em representação compacta, apenas com as colunas pedidas.
+    """
+    key = None if columns is None else tuple(columns)
+    while True:
+        state = current_state()
+        with state.lock:
+            frame = state.frames.get(key)
+        if frame is not None:
+            return frame
+
+        with phase('load'):
+            frame, years = _read_rows(state.backend, key, state.version)
+        # Os dados podem ter avançado de versão durante a leitura: tenta de novo
+        if state.num_rows is not None and len(frame) != state.num_rows:
+            continue
+        with state.lock:
+            if state.years is None:
+                state.years = years()
+            return state.frames.setdefault(key, frame)
+
+
+def _years_array(values):
+    return values.to_numpy(dtype='float64', na_value=np.nan)
+
+
+def _read_rows(backend, columns, version):
+    """
+    Lê as colunas pedidas do backend, compactadas e na ordem do snapshot.
+    Devolve (DataFrame, função que devolve os anos de todas as linhas).
+    """
+    if backend == 'shared':
+        frame = read_shared_frame(version, columns)
+        return frame, lambda: _years_array(read_shared_frame(version, ['ReleaseYear'])['ReleaseYear'])
+    if backend == 'streaming':
+        frame, years = read_frame(columns)
+        return frame, lambda: years
+    if backend == 'sqlite':
+        frame = compact_dataframe(query_rows(None if columns is None else list(columns), order_by_year=True))
+        return frame, lambda: _years_array(query_rows(['ReleaseYear'], order_by_year=True)['ReleaseYear'])
+    frame = compact_dataframe(read_snapshot(None if columns is None else list(columns)))
+    return frame, lambda: _years_array(read_snapshot(['ReleaseYear'])['ReleaseYear'])
+
+
+def load_artifact(name):
+    """
+    Tabela aditiva `name` da versão atual, montada na primeira vez que é pedida
+    (ou lida do arquivo gravado pelo warmup.py, se o manifesto é desta versão).
+    """
+    state = current_state()
+    with state.lock:
+        table = state.artifacts.get(name)
+    if table is None:
+        prebuilt_tables = prebuilt_names(state.version)
+        # Pré-calculada pelo warmup.py (arquivo mapeado, sem cópia)
+        prebuilt = read_table(state.version, name) if name in prebuilt_tables else None
+        if prebuilt is not None:
+            with state.lock:
+                state.artifacts.setdefault(name, prebuilt)
+        elif state.backend == 'streaming':
+            # Uma única passada pelo CSV monta todas as tabelas que ainda faltam
+            with state.lock:
+                missing = {n: a for n, a in ARTIFACTS.items()
+                           if n not in state.artifacts and (n == name or n not in prebuilt_tables)}
+            with phase('aggregate'):
+                streamed = stream_artifacts(missing)
+            for n, built in streamed.items():
+                with state.lock:
+                    state.artifacts.setdefault(n, built)
+        elif state.backend == 'shared':
+            # Montada por um processo da máquina e mapeada pelos demais; as
+            # linhas são mapeadas antes, fora do lock do arquivo da tabela
+            load_frame(ARTIFACTS[name][0])
+            built = shared_table(state.version, name, functools.partial(build_artifact, name))
+            with state.lock:
+                state.artifacts.setdefault(name, built)
+        else:
+            built = build_artifact(name)
+            with state.lock:
+                state.artifacts.setdefault(name, built)
+        with state.lock:
+            table = state.artifacts[name]
+    return table
+
+
+def build_artifact(name):
+    """
+    Monta a tabela aditiva `name` a partir das linhas da versão atual.
+    """
+    columns, build, _ = ARTIFACTS[name]
+    frame = load_frame(columns)
+    with phase('aggregate'):
+        return build(frame)
+
+
+@memoize(maxsize=1)
+def load_year_index():
+    """
+    Índice ano -> posição da primeira linha (o snapshot é ordenado por ano).
+    """
+    load_frame(('ReleaseYear',))
+    return build_year_index(pd.DataFrame({'ReleaseYear': current_state().years}))
+
+
+def load_cube():
+    """
+    Cubo pré-agregado Genre × ReleaseYear × Country (ver cube.py).
+    """
+    return load_artifact('cube')
+
+
+def _build_talent_partials(df, group_col):
+    """
+    Somas e contagens por talento, de onde saem as médias de talent_stats.
+    """
+    values = df[['Global_BoxOfficeUSD', 'IMDbRating', 'ROI']].astype('float64')
+    grouped = values.groupby(df[group_col], observed=True)
+    sums, counts = grouped.sum(), grouped.count()
+    return plain_index(pd.DataFrame({
+        'Total_Bilheteria': sums['Global_BoxOfficeUSD'],
+        'Num_Filmes': grouped.size(),
+        'IMDbRating_sum': sums['IMDbRating'],
+        'IMDbRating_n': counts['IMDbRating'],
+        'ROI_sum': sums['ROI'],
+        'ROI_n': counts['ROI']
+    }))
+
+
+def _build_column_stats(df):
+    """
+    Contagem, soma, mínimo e máximo de cada coluna numérica.
+    """
+    values = df[NUMERIC_COLUMNS].astype('float64')
+    return pd.DataFrame({'count': values.count(), 'sum': values.sum(), 'min': values.min(), 'max': values.max()})
+
+
+def _merge_column_stats(left, right):
+    """
+    Combina duas tabelas de _build_column_stats (mínimos e máximos não são somas).
+    """
+    return pd.DataFrame({
+        'count': left['count'] + right['count'],
+        'sum': left['sum'] + right['sum'],
+        'min': np.fmin(left['min'], right['min']),
+        'max': np.fmax(left['max'], right['max'])
+    })
+
+
+register_artifact('cube', CUBE_COLUMNS, build_cube)
+register_artifact('talents_Director', ['Director', 'Global_BoxOfficeUSD', 'IMDbRating', 'ROI'],
+                  functools.partial(_build_talent_partials, group_col='Director'))
+register_artifact('talents_LeadActor', ['LeadActor', 'Global_BoxOfficeUSD', 'IMDbRating', 'ROI'],
+                  functools.partial(_build_talent_partials, group_col='LeadActor'))
+register_artifact('column_stats', NUMERIC_COLUMNS, _build_column_stats, _merge_column_stats)
+register_artifact('moments', NUMERIC_COLUMNS + MOMENT_GROUPS,
+                  functools.partial(build_moments, columns=NUMERIC_COLUMNS))
+
+
+def _quantile_artifact(dimension, value):
+    return f"quantiles_{dimension}_{value}"
+
+
+for _dimension in QUANTILE_DIMENSIONS:
+    for _value in QUANTILE_VALUES:
+        register_artifact(_quantile_artifact(_dimension, _value), [_dimension, 'ReleaseYear', _value],
+                          functools.partial(build_quantile_summary, value=_value, by=[_dimension, 'ReleaseYear']),
+                          merge_quantile_summaries)
+
+
+register_artifact('opening_histograms', ['Genre', 'ReleaseYear'] + OPENING_RATIO_COLUMNS,
+                  functools.partial(build_histograms, values=OPENING_RATIO_COLUMNS, by=['Genre', 'ReleaseYear']))
+
+
+def year_bounds():
+    """
+    Primeiro e último ano presentes no dataset.
+    """
+    years = load_year_index().index
+    return int(years.min()), int(years.max())
+
+
+def summarize_column_stats(stats):
+    """
+    Quantidade, média, mínimo e máximo por coluna a partir das somas parciais.
+    """
+    return pd.DataFrame({
+        'Quantidade': stats['count'].astype('int64'),
+        'Média': stats['sum'] / stats['count'].replace(0, np.nan),
+        'Mínimo': stats['min'],
+        'Máximo': stats['max']
+    })
+
+
+@memoize
+def column_summary():
+    """
+    Quantidade de valores, média, mínimo e máximo de cada coluna numérica.
+    """
+    return summarize_column_stats(load_artifact('column_stats'))
+
+
+@memoize
+def overview():
+    """
+    KPIs da página inicial: total de filmes, gêneros, bilheteria total e ROI médio.
+    """
+    cube = load_cube()
+    total = rollup(cube)
+    return {
+        'Total_Filmes': int(total['count'].iloc[0]),
+        'Generos_Unicos': int(cube.index.get_level_values('Genre').nunique()),
+        'Bilheteria_Total': float(total['Global_BoxOfficeUSD_sum'].iloc[0]),
+        'ROI_Médio': float(total['ROI_mean'].iloc[0])
+    }
+
+
+# --- Quantis ---
+
+@memoize(maxsize=4)
+def group_rows(dimension, value, year_range=None, groups=None):
+    """
+    Linhas (dimensão, ReleaseYear, valor) do período e grupos selecionados.
+    """
+    columns = [dimension, 'ReleaseYear', value]
+    if current_state().backend == 'sqlite':
+        # Filtros aplicados pelo SQLite (índices em ReleaseYear, Genre e Country)
+        rows = query_rows(columns, year_range=year_range, order_by_year=True,
+                          **{QUANTILE_DIMENSIONS[dimension]: groups})
+        return compact_dataframe(rows)
+    df = load_frame(tuple(columns))
+    if year_range is not None:
+        df = year_slice(df, year_range, load_year_index())
+    if groups is not None:
+        df = df[df[dimension].isin(groups)]
+    return df
+
+
+@memoize
+def quantile_table(value, dimension, percentiles=(50,), year_range=None, groups=None, exact=False):
+    """
+    Percentis de `value` ('ROI', 'BudgetUSD' ou 'Global_BoxOfficeUSD') por
+    grupo de `dimension` ('Genre' ou 'Country') no período, em colunas p<percentil>.
+
+    Por padrão saem da combinação dos resumos de quantis por (dimensão,
+    ReleaseYear) (erro de posto de 1/QUANTILE_SEGMENTS, mais 1/QUANTILE_SEGMENTS
+    por nível de fusão das partes, ver quantiles.py); com `exact=True` são
+    calculados sobre as linhas filtradas.
+    """
+    levels = np.asarray(percentiles, dtype='float64') / 100
+    columns = [f"p{p:g}" for p in percentiles]
+    if exact:
+        rows = group_rows(dimension, value, year_range, groups)
+        result = rows.groupby(dimension, observed=True)[value].quantile(levels).unstack()
+        result.columns = columns
+        return result
+
+    cells = filter_cube(load_artifact(_quantile_artifact(dimension, value)), year_range=year_range,
+                        **{QUANTILE_DIMENSIONS[dimension]: groups})
+    result = {group: summary_quantiles(group_cells, levels)
+              for group, group_cells in cells[cells['n'] > 0].groupby(level=dimension)}
+    return pd.DataFrame.from_dict(result, orient='index', columns=columns).rename_axis(dimension)
+
+
+# --- ROI por gênero ---
+
+def roi_rows(year_range=None, genres=None):
+    """
+    Linhas (Genre, ReleaseYear, ROI) do período e gêneros selecionados.
+    """
+    return group_rows('Genre', 'ROI', year_range, genres)
+
+
+@memoize
+def roi_by_genre(year_range=None, genres=None, exact=False):
+    """
+    ROI médio, ROI mediano e quantidade de filmes por gênero, do maior ROI médio para o menor.
+    A mediana vem dos resumos de quantis (ou das linhas, com `exact=True`; ver quantile_table).
+    """
+    cells = filter_cube(load_cube(), year_range=year_range, genres=genres)
+    genre_stats = rollup(cells, 'Genre')
+    medians = quantile_table('ROI', 'Genre', (50,), year_range, genres, exact)['p50']
+
+    result = pd.DataFrame({
+        'ROI_Médio_%': genre_stats['ROI_mean'],
+        'ROI_Mediana_%': medians,
+        'Quantidade_Filmes': genre_stats['count']
+    }).round(2)
+    return result.sort_values('ROI_Médio_%', ascending=False)
+
+
+@memoize
+def roi_box_stats(year_range=None, genres=None, exact=False):
+    """
+    Caixas do box plot de ROI por gênero (q1, median, q3, lower, upper e
+    uma amostra de outliers em fliers), na ordem de roi_by_genre.
+
+    Os quartis e bigodes saem dos resumos de quantis por (Genre, ReleaseYear)
+    (ver quantiles.py); com `exact=True` os quartis vêm das linhas. A mediana
+    é a coluna ROI_Mediana_% de roi_by_genre.
+    """
+    by_genre = roi_by_genre(year_range, genres, exact)
+    quartiles = quantile_table('ROI', 'Genre', (25, 50, 75), year_range, genres, exact=True) if exact else None
+    cells = filter_cube(load_artifact(_quantile_artifact('Genre', 'ROI')), year_range=year_range, genres=genres)
+    boxes = {}
+    for genre, genre_cells in cells.groupby(level='Genre'):
+        stats = box_stats(genre_cells, None if quartiles is None else quartiles.loc[genre].to_numpy())
+        if stats is not None and genre in by_genre.index:
+            boxes[genre] = {**stats, 'median': by_genre.loc[genre, 'ROI_Mediana_%']}
+    result = pd.DataFrame.from_dict(boxes, orient='index', columns=['lower', 'q1', 'median', 'q3', 'upper', 'fliers'])
+    return result.reindex(by_genre.index.intersection(result.index, sort=False)).rename_axis('Genre')
+
+
+@memoize
+def roi_overview(year_range=None, genres=None):
+    """
+    Total de filmes e ROI médio geral da seleção.
+    """
+    overall = rollup(filter_cube(load_cube(), year_range=year_range, genres=genres))
+    return {'Total_Filmes': int(overall['count'].iloc[0]), 'ROI_Médio': float(overall['ROI_mean'].iloc[0])}
+
+
+# --- Tendências temporais ---
+
+@memoize
+def yearly_trends(year_range=None):
+    """
+    Médias de orçamento, bilheteria (global e EUA), nota IMDb e quantidade de filmes por ano.
+    """
+    yearly = rollup(filter_cube(load_cube(), year_range=year_range), 'ReleaseYear')
+    return pd.DataFrame({
+        'ReleaseYear': yearly.index.astype(int),
+        'BudgetUSD': yearly['BudgetUSD_mean'].values,
+        'Global_BoxOfficeUSD': yearly['Global_BoxOfficeUSD_mean'].values,
+        'US_BoxOfficeUSD': yearly['US_BoxOfficeUSD_mean'].values,
+        'IMDbRating': yearly['IMDbRating_mean'].values,
+        'Title': yearly['count'].values
+    })
+
+
+@memoize
+def decade_analysis(year_range=None):
+    """
+    Médias de orçamento, bilheteria global, ROI e nota IMDb por década.
+    """
+    cells = filter_cube(load_cube(), year_range=year_range)
+    decades = pd.Index((cells.index.get_level_values('ReleaseYear') // 10) * 10, name='Decade')
+    result = rollup(cells, decades)[[
+        'BudgetUSD_mean',
+        'Global_BoxOfficeUSD_mean',
+        'ROI_mean',
+        'IMDbRating_mean'
+    ]]
+    result.columns = [
+        "Orçamento Médio (USD)",
+        "Bilheteria Global Média (USD)",
+        "ROI Médio (%)",
+        "Nota Média IMDb"
+    ]
+    return result
+
+
+# --- Performance de abertura ---
+
+def _opening_cells(year_range=None, genres=None):
+    return filter_cube(load_artifact('opening_histograms'), year_range=year_range, genres=genres)
+
+
+def _ratio_means(totals):
+    return pd.DataFrame({ratio: totals[f"{ratio}_sum"] / totals[f"{ratio}_n"].replace(0, np.nan)
+                         for ratio in OPENING_RATIO_COLUMNS}, index=totals.index)
+
+
+@memoize
+def opening_by_genre(year_range=None, genres=None):
+    """
+    Proporções médias de abertura, proporção mediana do dia de abertura e
+    multiplicador mediano (bilheteria total / dia de abertura) por gênero,
+    do gênero mais dependente da abertura para o menos.
+    A mediana sai dos histogramas (erro de no máximo uma faixa, ver histograms.py).
+    """
+    totals = _opening_cells(year_range, genres).groupby(level='Genre').sum()
+    totals = totals[totals['Opening_to_Total_Ratio_n'] > 0]
+    means = _ratio_means(totals)
+    medians = pd.Series([histogram_quantiles(row, [0.5])[0] for row in totals[bin_columns('Opening_to_Total_Ratio')]
+                         .to_numpy()], index=totals.index, dtype='float64')
+    result = pd.DataFrame({
+        'Abertura_Total_Médio_%': means['Opening_to_Total_Ratio'],
+        'Semana_Total_Médio_%': means['Week_to_Total_Ratio'],
+        'Abertura_Semana_Médio_%': means['Opening_to_Week_Ratio'],
+        'Abertura_Total_Mediana_%': medians,
+        # Mediana de total/abertura = 100 / mediana da proporção (função decrescente)
+        'Multiplicador_Mediano': 100 / medians.replace(0, np.nan),
+        'Quantidade_Filmes': totals['Opening_to_Total_Ratio_n'].astype('int64'),
+    }).round(2)
+    return result.sort_values('Abertura_Total_Médio_%', ascending=False)
+
+
+@memoize
+def opening_trends(year_range=None, genres=None):
+    """
+    Proporções médias de abertura por ano de lançamento.
+    """
+    totals = _opening_cells(year_range, genres).groupby(level='ReleaseYear').sum()
+    means = _ratio_means(totals[totals['Opening_to_Total_Ratio_n'] > 0])
+    return means.rename_axis('ReleaseYear').reset_index().astype({'ReleaseYear': 'int64'})
+
+
+@memoize
+def opening_overview(year_range=None, genres=None):
+    """
+    Quantidade de filmes, proporções médias e multiplicador mediano da seleção.
+    """
+    totals = _opening_cells(year_range, genres).sum()
+    means = _ratio_means(totals.to_frame().T).iloc[0]
+    median = histogram_quantiles(totals[bin_columns('Opening_to_Total_Ratio')].to_numpy(), [0.5])[0]
+    return {
+        'Total_Filmes': int(totals['Opening_to_Total_Ratio_n']),
+        **{ratio: float(means[ratio]) for ratio in OPENING_RATIO_COLUMNS},
+        'Multiplicador_Mediano': float(100 / median) if median > 0 else float('nan'),
+    }
+
+
+@memoize
+def ratio_histogram(ratio, year_range=None, genres=None, max_bins=30):
+    """
+    Distribuição de uma proporção de abertura na seleção, em até `max_bins`
+    faixas (colunas start, end, count). A quantidade de valores fora de 0–100%
+    fica em attrs['outside'].
+    """
+    counts = _opening_cells(year_range, genres)[bin_columns(ratio)].sum().to_numpy()
+    result, outside = rebin(counts, max_bins)
+    result.attrs['outside'] = outside
+    return result
+
+
+# --- Talentos ---
+
+@memoize
+def talent_stats(group_col):
+    """
+    Bilheteria total, número de filmes, nota e ROI médios por diretor ou ator
+    (`group_col` = 'Director' ou 'LeadActor').
+    """
+    partials = load_artifact(f'talents_{group_col}')
+    stats = pd.DataFrame({
+        'Total_Bilheteria': partials['Total_Bilheteria'],
+        'Num_Filmes': partials['Num_Filmes'],
+        'Rating_Médio': partials['IMDbRating_sum'] / partials['IMDbRating_n'].replace(0, np.nan),
+        'ROI_Médio': partials['ROI_sum'] / partials['ROI_n'].replace(0, np.nan)
+    }).round(2)
+    stats['Bilheteria_por_Filme'] = (stats['Total_Bilheteria'] / stats['Num_Filmes']).round(2)
+    return stats
+
+
+@memoize(maxsize=2)
+def talent_leaderboard(group_col):
+    """
+    Índices ordenados por métrica da tabela de talentos (ver talents.py).
+    """
+    return TalentLeaderboard(talent_stats(group_col))
+
+
+@memoize(maxsize=2)
+def talent_grid(group_col):
+    """
+    Grade pré-calculada do gráfico de produtividade dos talentos (ver talents.TalentGrid).
+    """
+    return TalentGrid(talent_stats(group_col))
+
+
+@memoize
+def top_talents(group_col, min_films, metric, n):
+    """
+    Top `n` diretores ou atores por `metric`, entre os com pelo menos `min_films` filmes.
+    """
+    return talent_leaderboard(group_col).top(min_films, metric, n)
+
+
+# --- Países ---
+
+@memoize
+def country_rollup():
+    """
+    Número de filmes, orçamento, bilheteria, nota, ROI e participação
+    internacional médios por país, do país com mais filmes para o com menos.
+    Tabela pequena (uma linha por país): a seleção de países apenas a indexa.
+    """
+    result = rollup(load_cube(), 'Country')[[
+        'count',
+        'BudgetUSD_mean',
+        'Global_BoxOfficeUSD_mean',
+        'IMDbRating_mean',
+        'ROI_mean',
+        'International_Percentage_mean'
+    ]].round(2)
+    result.columns = ['Num_Filmes', 'Orçamento_Médio', 'Bilheteria_Média', 'Rating_Médio', 'ROI_Médio',
+                      'International_Percentage']
+    return result.sort_values('Num_Filmes', ascending=False)
+
+
+@memoize
+def country_stats():
+    """
+    Número de filmes, orçamento, bilheteria, nota e ROI médios por país,
+    do país com mais filmes para o com menos.
+    """
+    return country_rollup().drop(columns='International_Percentage')
+
+
+@memoize
+def country_medians(countries, exact=False):
+    """
+    Orçamento, bilheteria e ROI medianos por país selecionado (ver quantile_table).
+    """
+    names = {'BudgetUSD': 'Orçamento_Mediano', 'Global_BoxOfficeUSD': 'Bilheteria_Mediana', 'ROI': 'ROI_Mediano'}
+    result = pd.DataFrame({name: quantile_table(value, 'Country', (50,), groups=countries, exact=exact)['p50']
+                           for value, name in names.items()})
+    return result.round(2)
+
+
+@memoize
+def international_by_country(countries):
+    """
+    Percentual médio da bilheteria obtido fora dos EUA, por país selecionado.
+    """
+    table = country_rollup()
+    result = table.loc[table.index.isin(countries), ['International_Percentage']]
+    return result.sort_values('International_Percentage', ascending=False)
+
+
+# --- Correlações ---
+
+def correlation_groups(group):
+    """
+    Valores de 'Genre' ou 'ReleaseYear' para os quais há matriz de correlação própria.
+    """
+    return group_values(load_artifact('moments'), group)
+
+
+@memoize
+def correlation_matrix(columns=tuple(NUMERIC_COLUMNS), group=ALL_ROWS, value=ALL_ROWS):
+    """
+    Matriz de correlação de Pearson entre as colunas numéricas escolhidas,
+    para todos os filmes ou só para um gênero/ano (`group`='Genre' ou
+    'ReleaseYear' e `value` o gênero ou ano). Sai das estatísticas suficientes
+    pré-calculadas (ver correlation.py), sem percorrer as linhas.
+    """
+    return pearson_matrix(load_artifact('moments'), columns, group, value)
+
+
+@memoize
+def strong_correlations(columns, threshold, group=ALL_ROWS, value=ALL_ROWS):
+    """
+    Pares de variáveis com |correlação| acima do limiar, do mais forte para o mais fraco.
+    """
+    return strong_pairs(correlation_matrix(columns, group, value), threshold)
@@ -0,0 +1,25 @@
+"""
+Chaves de cache a partir dos argumentos das funções e dos filtros das páginas.
+
+Módulo leve (só numpy), usado pelo motor de agregações (memoize) e pelo
+cache de figuras, sem que a camada de gráficos importe o motor de agregações.
+"""
+
+import numpy as np
+
+
+def normalize_args(value):
+    """
+    Converte argumentos em uma chave hashable e estável
+    (listas viram tuplas, tipos numpy viram tipos Python, dicts são ordenados).
+    Listas cuja ordem não importa devem ser ordenadas por quem chama.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, normalize_args(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(normalize_args(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(normalize_args(v) for v in value))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
@@ -0,0 +1,239 @@
+"""
+Backends de desenho dos gráficos das páginas.
+
+- 'matplotlib' (padrão): a página desenha a figura com matplotlib/seaborn no
+  servidor e o Streamlit recebe um PNG (com cache, ver figure_cache.py).
+- 'client': a página monta uma especificação Vega-Lite (Altair) só com as
+  tabelas agregadas que já calculou; o navegador desenha o gráfico, e hover,
+  zoom e tooltips acontecem no cliente, sem rerun nem rasterização no servidor.
+
+O modo é escolhido por DASHBOARD_CHARTS=client ou pelo parâmetro ?charts=client
+da URL. Cada gráfico é exibido com show_chart, que recebe as duas versões:
+`draw` (figura matplotlib) e `client` (gráfico Altair, montado com as funções
+deste módulo). O Altair só é importado quando o modo cliente é usado.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from figure_cache import cached_pyplot
+from timing import phase
+
+CHART_BACKENDS = ['matplotlib', 'client']
+
+CHART_HEIGHT = 400
+
+
+def chart_backend():
+    """
+    Backend dos gráficos desta execução ('matplotlib' ou 'client').
+    """
+    backend = st.query_params.get('charts') or os.environ.get('DASHBOARD_CHARTS', 'matplotlib')
+    return backend if backend in CHART_BACKENDS else 'matplotlib'
+
+
+def show_chart(page, chart, filters, draw, data_version=None, client=None):
+    """
+    Exibe o gráfico no backend atual. Sem versão `client`, o gráfico é
+    sempre desenhado pelo matplotlib (ver figure_cache.cached_pyplot).
+    """
+    if client is None or chart_backend() != 'client':
+        cached_pyplot(page, chart, filters, draw, data_version)
+        return
+    with phase('render'):
+        spec = client()
+    with phase('serialize'):
+        st.altair_chart(spec, use_container_width=True)
+
+
+def _altair():
+    import altair as alt
+    return alt
+
+
+def _scale(scheme=None, domain=None, reverse=False, **kwargs):
+    alt = _altair()
+    options = {key: value for key, value in kwargs.items() if value is not None}
+    if scheme is not None:
+        options['scheme'] = scheme
+    if domain is not None:
+        options['domain'] = list(domain)
+    if reverse:
+        options['reverse'] = True
+    return alt.Scale(**options)
+
+
+def bar_chart(data, category, value, value_title, category_title=None, scheme='viridis',
+              value_domain=None, horizontal=True, order=None, value_format=',.2f'):
+    """
+    Barras de `value` por `category`, coloridas pelo valor.
+    Na horizontal, as categorias seguem `order` (ou o maior valor no topo).
+    """
+    alt = _altair()
+    data = data.reset_index() if category not in data.columns else data
+    sort = order if order is not None else alt.EncodingSortField(value, order='descending')
+    category_enc = alt.X(f"{category}:O", title=category_title, sort=sort) if not horizontal \
+        else alt.Y(f"{category}:N", title=category_title, sort=sort)
+    value_scale = _scale(domain=value_domain, zero=value_domain is None)
+    value_enc = (alt.X if horizontal else alt.Y)(f"{value}:Q", title=value_title, scale=value_scale)
+    return alt.Chart(data[[category, value]]).mark_bar(clip=True).encode(
+        category_enc,
+        value_enc,
+        color=alt.Color(f"{value}:Q", scale=_scale(scheme), legend=None),
+        tooltip=[alt.Tooltip(f"{category}:N"), alt.Tooltip(value, format=value_format)],
+    ).properties(height=CHART_HEIGHT)
+
+
+def line_chart(data, x, series, y_title, x_title=None, area=False, y_domain=None, value_format=',.2f'):
+    """
+    Uma linha por coluna de `series` ({coluna: (rótulo, cor)}), com zoom e hover no cliente.
+    Com `area=True` a área sob a (única) linha é preenchida.
+    """
+    alt = _altair()
+    long = data[[x, *series]].melt(x, var_name='Série', value_name='Valor')
+    long['Série'] = long['Série'].map({col: label for col, (label, _) in series.items()})
+    labels = [label for label, _ in series.values()]
+    colors = [color for _, color in series.values()]
+    base = alt.Chart(long).encode(
+        x=alt.X(f"{x}:Q", title=x_title, axis=alt.Axis(format='d'), scale=_scale(zero=False)),
+        y=alt.Y('Valor:Q', title=y_title, scale=_scale(domain=y_domain, zero=False)),
+        color=alt.Color('Série:N', scale=alt.Scale(domain=labels, range=colors),
+                        legend=alt.Legend(title=None) if len(series) > 1 else None),
+        tooltip=[alt.Tooltip(f"{x}:Q", format='d'), 'Série:N', alt.Tooltip('Valor:Q', format=value_format)],
+    )
+    layers = [base.mark_line(point=True)]
+    if area:
+        layers.insert(0, base.mark_area(opacity=0.3, clip=True))
+    return alt.layer(*layers).properties(height=CHART_HEIGHT).interactive()
+
+
+def box_chart(summary, category, value_title, category_title=None, order=None, scheme='set2', value_format=',.2f'):
+    """
+    Box plot a partir de um resumo por categoria (colunas lower, q1, median,
+    q3, upper), sem enviar as linhas ao navegador.
+    """
+    alt = _altair()
+    data = summary.reset_index() if category not in summary.columns else summary
+    tooltip = [alt.Tooltip(f"{category}:N")] + [alt.Tooltip(col, format=value_format)
+                                         for col in ['lower', 'q1', 'median', 'q3', 'upper']]
+    base = alt.Chart(data).encode(
+        y=alt.Y(f"{category}:N", title=category_title, sort=order),
+        tooltip=tooltip,
+    )
+    whiskers = base.mark_rule().encode(x=alt.X('lower:Q', title=value_title), x2='upper:Q')
+    boxes = base.mark_bar(size=22).encode(
+        x='q1:Q', x2='q3:Q',
+        color=alt.Color(f"{category}:N", scale=_scale(scheme), legend=None, sort=order),
+    )
+    medians = base.mark_tick(color='black', size=22, thickness=2).encode(x='median:Q')
+    return alt.layer(whiskers, boxes, medians).properties(height=CHART_HEIGHT)
+
+
+def histogram_chart(bins, x_title, mean=None, color='teal', value_format='.2f'):
+    """
+    Histograma a partir de faixas já contadas (colunas start, end e count),
+    com uma linha vertical opcional na média.
+    """
+    alt = _altair()
+    bars = alt.Chart(bins).mark_bar(color=color, opacity=0.7, stroke='black', strokeWidth=0.5).encode(
+        x=alt.X('start:Q', title=x_title, scale=_scale(zero=False)),
+        x2='end:Q',
+        y=alt.Y('count:Q', title='Frequência'),
+        tooltip=[alt.Tooltip('start:Q', format=value_format), alt.Tooltip('end:Q', format=value_format),
+                 alt.Tooltip('count:Q', format=',')],
+    )
+    layers = [bars]
+    if mean is not None:
+        rule = pd.DataFrame({'Média': [mean]})
+        layers.append(alt.Chart(rule).mark_rule(color='red', strokeDash=[6, 4], size=2).encode(
+            x='Média:Q', tooltip=[alt.Tooltip('Média:Q', format=value_format)]))
+    return alt.layer(*layers).properties(height=CHART_HEIGHT)
+
+
+def pie_chart(data, category, value, scheme='set3'):
+    """
+    Pizza (rosca) com a participação de cada categoria no total.
+    """
+    alt = _altair()
+    data = data.reset_index() if category not in data.columns else data
+    data = data[[category, value]].assign(Percentual=data[value] / data[value].sum())
+    return alt.Chart(data).mark_arc(innerRadius=40).encode(
+        theta=alt.Theta(f"{value}:Q", stack=True),
+        color=alt.Color(f"{category}:N", scale=_scale(scheme), sort=None),
+        order=alt.Order(f"{value}:Q", sort='descending'),
+        tooltip=[alt.Tooltip(f"{category}:N"), alt.Tooltip(value, format=','),
+                 alt.Tooltip('Percentual:Q', format='.1%')],
+    ).properties(height=CHART_HEIGHT)
+
+
+def scatter_chart(data, x, y, color, x_title, y_title, color_title, size=None, tooltip=(),
+                  scheme='blueorange', log_x=False, size_range=(30, 1000)):
+    """
+    Dispersão com cor (e tamanho opcional) por valor, com zoom e hover no cliente.
+    """
+    alt = _altair()
+    encodings = {
+        'x': alt.X(f"{x}:Q", title=x_title, scale=_scale(type='log' if log_x else None, zero=False)),
+        'y': alt.Y(f"{y}:Q", title=y_title, scale=_scale(zero=False)),
+        'color': alt.Color(f"{color}:Q", title=color_title, scale=_scale(scheme)),
+        'tooltip': list(tooltip) or [x, y, color],
+    }
+    if size is not None:
+        encodings['size'] = alt.Size(f"{size}:Q", scale=_scale(range=list(size_range)), legend=None)
+    return alt.Chart(data).mark_circle(opacity=0.7, stroke='black', strokeWidth=0.5).encode(
+        **encodings
+    ).properties(height=CHART_HEIGHT).interactive()
+
+
+def heatmap_chart(matrix, color_title, scheme='redblue', reverse=True, domain=(-1, 1), lower_only=True,
+                  value_format='.2f'):
+    """
+    Mapa de calor anotado de uma matriz quadrada (apenas o triângulo inferior,
+    sem a diagonal, com `lower_only`).
+    """
+    alt = _altair()
+    names = list(matrix.columns)
+    values = matrix.to_numpy(dtype='float64')
+    rows, cols = np.tril_indices(len(names), -1) if lower_only else np.indices(values.shape).reshape(2, -1)
+    data = pd.DataFrame({
+        'Linha': [names[i] for i in rows],
+        'Coluna': [names[j] for j in cols],
+        'Valor': values[rows, cols],
+    })
+    base = alt.Chart(data).encode(
+        x=alt.X('Coluna:N', title=None, sort=names),
+        y=alt.Y('Linha:N', title=None, sort=names),
+    )
+    cells = base.mark_rect(stroke='white', strokeWidth=1).encode(
+        color=alt.Color('Valor:Q', title=color_title, scale=_scale(scheme, domain=domain, reverse=reverse)),
+        tooltip=['Linha', 'Coluna', alt.Tooltip('Valor:Q', format=value_format)],
+    )
+    labels = base.mark_text(fontSize=11).encode(text=alt.Text('Valor:Q', format=value_format))
+    return alt.layer(cells, labels).properties(height=max(CHART_HEIGHT, 45 * len(names)))
+
+
+def density_chart(x_edges, y_edges, counts, values, x_title, y_title, color_title,
+                  scheme='blueorange', log_x=False):
+    """
+    Grade 2D pré-calculada (bordas, quantidade e valor médio por célula),
+    desenhada como retângulos; células vazias ficam de fora.
+    """
+    alt = _altair()
+    ix, iy = np.nonzero(counts)
+    data = pd.DataFrame({
+        'x': x_edges[ix], 'x2': x_edges[ix + 1],
+        'y': y_edges[iy], 'y2': y_edges[iy + 1],
+        'Quantidade': counts[ix, iy].astype('int64'),
+        'Valor': values[ix, iy],
+    })
+    return alt.Chart(data).mark_rect().encode(
+        x=alt.X('x:Q', title=x_title, scale=_scale(type='log' if log_x else None, zero=False)),
+        x2='x2:Q',
+        y=alt.Y('y:Q', title=y_title),
+        y2='y2:Q',
+        color=alt.Color('Valor:Q', title=color_title, scale=_scale(scheme)),
+        tooltip=[alt.Tooltip('Quantidade:Q', format=','), alt.Tooltip('Valor:Q', format='.2f')],
+    ).properties(height=CHART_HEIGHT).interactive()
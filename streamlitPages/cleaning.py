@@ -0,0 +1,307 @@
+"""
+Tratamento e limpeza do dataset completo (o que o Tratamento-e-Limpeza.ipynb
+fazia sobre uma amostra de 10 mil linhas).
+
+O CSV é lido em blocos (ver streaming.iter_chunks) e cada bloco passa pelas
+verificações, vetorizadas e executadas em paralelo (um bloco por thread, com
+no máximo `workers` blocos em memória):
+
+- nulos:      valores ausentes e textos vazios, por coluna
+- duplicatas: linhas inteiras repetidas, no bloco e em relação aos blocos
+              anteriores (pela impressão de 64 bits de cada linha, ver
+              fingerprints.py)
+- faixas:     valores fora de RANGE_RULES (ex.: orçamento negativo, nota
+              IMDb acima de 10)
+- contagens:  valores de Genre e Country (como os value_counts do notebook)
+
+As verificações marcam as linhas de cada coluna; as contagens de nulos,
+faixas e valores do relatório são feitas depois da remoção das duplicatas,
+sobre as mesmas linhas do arquivo limpo (e das estatísticas por coluna).
+
+A limpeza remove as linhas duplicadas (fica a primeira ocorrência) e troca
+valores fora da faixa por nulos; as colunas derivadas (ROI etc.) são
+recalculadas sobre os valores limpos. O resultado é gravado em Parquet
+(CLEAN_PATH). Em seguida os outliers de cada coluna numérica (fora de
+Q1 − 1,5·IQR e Q3 + 1,5·IQR) são contados sobre o arquivo limpo, uma coluna
+por thread. Os outliers são apenas relatados, não removidos.
+
+O relatório de qualidade (REPORT_PATH, JSON pequeno) guarda as contagens por
+coluna junto com o tamanho e o mtime do CSV de origem; ensure_clean refaz a
+limpeza só quando o CSV muda. utils.load_data(cleaned=True) lê o arquivo
+limpo e devolve o relatório em `df.attrs['quality']`.
+
+Uso: python cleaning.py [--workers N]   (refaz a limpeza e imprime o relatório)
+"""
+
+import json
+import os
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from fingerprints import EMPTY_INDEX, first_seen, merge_index, row_fingerprints
+from snapshot import (CACHE_DIR, CSV_PATH, CSV_SCHEMA, DERIVED_SCHEMA, _snapshot_lock, _source_stat,
+                      _write_json_atomic, add_derived_columns)
+from streaming import STREAM_MEMORY_BYTES, iter_chunks
+
+CLEAN_DIR = os.path.join(CACHE_DIR, 'clean')
+CLEAN_PATH = os.path.join(CLEAN_DIR, 'movies.clean.parquet')
+REPORT_PATH = os.path.join(CLEAN_DIR, 'quality.json')
+LOCK_PATH = os.path.join(CLEAN_DIR, 'clean.lock')
+
+# Versão do formato do relatório: incrementar quando as regras mudarem
+REPORT_FORMAT = 3
+
+# Faixa válida de cada coluna (None = sem limite)
+RANGE_RULES = {
+    'ReleaseYear': (1888, 2100),
+    'BudgetUSD': (0, None),
+    'US_BoxOfficeUSD': (0, None),
+    'Global_BoxOfficeUSD': (0, None),
+    'Opening_Day_SalesUSD': (0, None),
+    'One_Week_SalesUSD': (0, None),
+    'IMDbRating': (0, 10),
+    'RottenTomatoesScore': (0, 100),
+    'NumVotesIMDb': (0, None),
+    'NumVotesRT': (0, None),
+}
+
+# Colunas com contagem de valores no relatório
+VALUE_COUNT_COLUMNS = ['Genre', 'Country']
+
+# Comprimento das cercas de outliers em intervalos interquartis
+OUTLIER_IQR = 1.5
+
+DERIVED_COLUMNS = DERIVED_SCHEMA.names
+
+
+def _check_chunk(chunk):
+    """
+    Verificações e limpeza de um bloco. Devolve (bloco limpo, marcas por
+    coluna, impressão de cada linha); as marcas são máscaras por linha de
+    'nulls' e 'out_of_range', contadas depois da remoção das duplicatas.
+    """
+    source = chunk.drop(columns=[c for c in DERIVED_COLUMNS if c in chunk.columns])
+    fingerprints = row_fingerprints(source)
+
+    flags = {}
+    for col in source.columns:
+        values = source[col]
+        missing = values.isna()
+        if values.dtype == object:
+            # Textos vazios contam (e são gravados) como nulos
+            blank = values.str.strip().eq('').fillna(False).to_numpy(dtype=bool)
+            if blank.any():
+                source[col] = values.mask(blank)
+            missing = missing | blank
+        column = {'nulls': np.asarray(missing, dtype=bool), 'out_of_range': None}
+
+        if col in RANGE_RULES:
+            low, high = RANGE_RULES[col]
+            numbers = values.to_numpy(dtype='float64', na_value=np.nan)
+            invalid = np.zeros(len(numbers), dtype=bool)
+            if low is not None:
+                invalid |= numbers < low
+            if high is not None:
+                invalid |= numbers > high
+            column['out_of_range'] = invalid
+            if invalid.any():
+                source[col] = values.astype('float64').mask(invalid)
+        flags[col] = column
+
+    return add_derived_columns(source), flags, fingerprints
+
+
+def _count_flags(chunk, flags, keep):
+    """
+    Estatísticas das linhas mantidas (`keep`) de um bloco verificado.
+    """
+    stats = {}
+    for col, column in flags.items():
+        out_of_range = column['out_of_range']
+        stats[col] = {
+            'nulls': int(column['nulls'][keep].sum()),
+            'out_of_range': 0 if out_of_range is None else int(out_of_range[keep].sum()),
+        }
+        if col in VALUE_COUNT_COLUMNS:
+            stats[col]['values'] = Counter(chunk.loc[keep, col].value_counts(sort=False).to_dict())
+    return stats
+
+
+def _merge_stats(total, part):
+    for col, column in part.items():
+        if col not in total:
+            total[col] = column
+            continue
+        for key, value in column.items():
+            total[col][key] = total[col][key] + value
+
+
+def _file_schema(chunk):
+    """
+    Schema do arquivo limpo: tipos do CSV e das colunas derivadas fixados
+    (colunas extras com o tipo inferido no primeiro bloco).
+    """
+    inferred = pa.Schema.from_pandas(chunk, preserve_index=False)
+    fields = []
+    for name in chunk.columns:
+        for schema in (CSV_SCHEMA, DERIVED_SCHEMA, inferred):
+            if name in schema.names:
+                fields.append(schema.field(name))
+                break
+    return pa.schema(fields)
+
+
+def _column_profile(path, col):
+    """
+    Estatísticas e outliers (regra do IQR) de uma coluna numérica do arquivo limpo.
+    """
+    values = pq.read_table(path, columns=[col]).column(0).to_numpy(zero_copy_only=False)
+    values = values.astype('float64')
+    values = values[~np.isnan(values)]
+    if len(values) == 0:
+        return col, {}
+    q1, q3 = np.percentile(values, [25, 75])
+    low, high = q1 - OUTLIER_IQR * (q3 - q1), q3 + OUTLIER_IQR * (q3 - q1)
+    return col, {
+        'valid': len(values), 'min': float(values.min()), 'max': float(values.max()), 'mean': float(values.mean()),
+        'q1': float(q1), 'q3': float(q3), 'lower_fence': float(low), 'upper_fence': float(high),
+        'outliers': int(((values < low) | (values > high)).sum()),
+    }
+
+
+def clean_dataset(csv_path=CSV_PATH, output_path=CLEAN_PATH, report_path=REPORT_PATH,
+                  workers=None, memory_bytes=None):
+    """
+    Lê o CSV em blocos, verifica e limpa as linhas, grava o arquivo limpo e
+    o relatório de qualidade. Devolve o relatório.
+    """
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    stat = _source_stat(csv_path)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+
+    totals, seen = {}, EMPTY_INDEX
+    rows_read = rows_written = duplicates = chunks = 0
+    writer = None
+
+    def consume(result):
+        nonlocal seen, rows_read, rows_written, duplicates, chunks, writer
+        chunk, flags, fingerprints = result
+        # Duplicatas: repetidas no bloco ou já vistas em blocos anteriores
+        repeated = ~first_seen(fingerprints, seen)
+        seen = merge_index(seen, fingerprints[~repeated])
+
+        kept = chunk[~repeated]
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_path, _file_schema(kept), compression='zstd')
+        writer.write_table(pa.Table.from_pandas(kept, schema=writer.schema, preserve_index=False))
+        _merge_stats(totals, _count_flags(chunk, flags, ~repeated))
+        rows_read += len(chunk)
+        rows_written += len(kept)
+        duplicates += int(repeated.sum())
+        chunks += 1
+
+    # Cada bloco em leitura ocupa uma fração do orçamento de memória
+    chunk_memory = (memory_bytes or STREAM_MEMORY_BYTES) // (workers + 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in iter_chunks(csv_path, memory_bytes=chunk_memory):
+            pending.append(pool.submit(_check_chunk, chunk))
+            if len(pending) >= workers:
+                consume(pending.popleft().result())
+        while pending:
+            consume(pending.popleft().result())
+        if writer is None:
+            raise ValueError(f"CSV sem linhas: {csv_path}")
+        writer.close()
+        os.replace(tmp_path, output_path)
+
+        numeric = [f.name for f in writer.schema if pa.types.is_integer(f.type) or pa.types.is_floating(f.type)]
+        profiles = dict(pool.map(lambda col: _column_profile(output_path, col), numeric))
+
+    columns = {}
+    for col in writer.schema.names:
+        # Colunas derivadas: nulos contados no arquivo limpo
+        derived_nulls = rows_written - profiles.get(col, {}).get('valid', 0)
+        column = dict(totals.get(col, {'nulls': derived_nulls, 'out_of_range': 0}))
+        if 'values' in column:
+            column['values'] = dict(column['values'].most_common())
+        columns[col] = {**column, **profiles.get(col, {})}
+
+    report = {
+        'format': REPORT_FORMAT, 'source': stat, 'output': output_path,
+        'rows_read': rows_read, 'rows_written': rows_written, 'duplicates': duplicates,
+        'chunks': chunks, 'elapsed_s': round(time.perf_counter() - started, 3),
+        'columns': columns,
+    }
+    _write_json_atomic(report_path, report)
+    return report
+
+
+def read_report(csv_path=CSV_PATH, report_path=REPORT_PATH):
+    """
+    Relatório de qualidade, se ainda corresponde ao CSV atual; senão None.
+    """
+    try:
+        with open(report_path, encoding='utf-8') as f:
+            report = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if report.get('format') != REPORT_FORMAT or report.get('source') != _source_stat(csv_path):
+        return None
+    return report if os.path.exists(report['output']) else None
+
+
+def ensure_clean(csv_path=CSV_PATH):
+    """
+    Garante que o arquivo limpo e o relatório correspondem ao CSV atual e
+    devolve o relatório (a limpeza roda em um processo por vez).
+    """
+    report = read_report(csv_path)
+    if report is not None:
+        return report
+    with _snapshot_lock(lock_path=LOCK_PATH):
+        report = read_report(csv_path)
+        if report is None:
+            report = clean_dataset(csv_path)
+    return report
+
+
+def read_clean(columns=None, csv_path=CSV_PATH):
+    """
+    Linhas limpas (na ordem do CSV), apenas com as colunas pedidas, com o
+    relatório de qualidade em `df.attrs['quality']`.
+    """
+    report = ensure_clean(csv_path)
+    df = pq.read_table(report['output'], columns=columns).to_pandas()
+    df.attrs['quality'] = report
+    return df
+
+
+def quality_table(report):
+    """
+    Relatório por coluna como DataFrame (nulos, fora da faixa, outliers e estatísticas).
+    """
+    table = pd.DataFrame.from_dict(report['columns'], orient='index').drop(columns='values', errors='ignore')
+    return table.rename_axis('Coluna')
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Limpa o dataset completo e grava o relatório de qualidade.")
+    parser.add_argument('--workers', type=int, default=None, help="threads (padrão: número de CPUs)")
+    args = parser.parse_args()
+
+    with _snapshot_lock(lock_path=LOCK_PATH):
+        report = clean_dataset(workers=args.workers)
+    print(quality_table(report).to_string())
+    print(f"\n{report['rows_read']} linhas lidas, {report['duplicates']} duplicadas, "
+          f"{report['rows_written']} gravadas em {report['output']} ({report['elapsed_s']:.1f}s)")
@@ -0,0 +1,127 @@
+"""
+Representação compacta em memória do DataFrame de filmes.
+
+Colunas de texto com poucos valores distintos viram categorias, notas e
+contagens de votos são reduzidas para tipos menores e ReleaseYear vira
+um inteiro de 16 bits. Colunas monetárias e o ROI continuam em float64
+para não perder precisão em somas na casa dos bilhões.
+
+Uso: python compact.py   (imprime o relatório de memória antes/depois)
+"""
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Colunas de texto candidatas a categoria
+CATEGORY_COLUMNS = ['Genre', 'Country', 'Director', 'LeadActor', 'Title']
+
+# Acima dessa proporção de valores distintos a categoria não compensa
+# e a coluna vira string do pyarrow
+MAX_CATEGORY_RATIO = 0.5
+
+FLOAT32_COLUMNS = ['IMDbRating', 'RottenTomatoesScore']
+UNSIGNED_COLUMNS = ['NumVotesIMDb', 'NumVotesRT']
+
+
+def compact_dataframe(df):
+    """
+    Converte o DataFrame para a representação compacta (devolve uma cópia).
+    """
+    df = df.copy()
+
+    for col in CATEGORY_COLUMNS:
+        if col not in df.columns:
+            continue
+        if df[col].nunique() <= MAX_CATEGORY_RATIO * max(len(df), 1):
+            df[col] = df[col].astype('category')
+        else:
+            df[col] = df[col].astype('string[pyarrow]')
+
+    for col in FLOAT32_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('float32')
+
+    for col in UNSIGNED_COLUMNS:
+        if col in df.columns and not df[col].isna().any():
+            df[col] = pd.to_numeric(df[col], downcast='unsigned')
+
+    if 'ReleaseYear' in df.columns:
+        # Inteiro nullable quando há anos faltando
+        df['ReleaseYear'] = df['ReleaseYear'].astype('Int16' if df['ReleaseYear'].isna().any() else 'int16')
+
+    return df
+
+
+def append_rows(frame, delta):
+    """
+    Acrescenta as linhas de `delta` a um DataFrame compacto, preservando os tipos
+    (ver concat_rows).
+    """
+    return concat_rows([frame, delta[frame.columns]])
+
+
+def concat_rows(frames):
+    """
+    Concatena DataFrames com as mesmas colunas preservando os tipos do primeiro:
+    categorias são unidas (sem voltar a texto) e os demais tipos são mantidos.
+    """
+    first = frames[0]
+    columns = {}
+    for col in first.columns:
+        old = first[col]
+        if isinstance(old.dtype, pd.CategoricalDtype):
+            parts = [f[col].astype('category') for f in frames]
+            columns[col] = pd.Series(union_categoricals(parts, ignore_order=True), name=col)
+        else:
+            values = pd.concat([f[col] for f in frames], ignore_index=True)
+            dtype = old.dtype
+            if getattr(dtype, 'kind', None) in ('i', 'u'):
+                dtype = _integer_dtype(values, dtype)
+            columns[col] = values.astype(dtype)
+    return pd.DataFrame(columns)
+
+
+def _integer_dtype(values, dtype):
+    """
+    Menor inteiro, com o mesmo sinal e pelo menos o tamanho de `dtype`, que
+    comporta os valores. Havendo nulos, usa a versão nullable (ex.: int16 -> Int16).
+    """
+    prefix = 'uint' if dtype.kind == 'u' else 'int'
+    valid = values.dropna()
+    for bits in (8, 16, 32, 64):
+        if bits < dtype.itemsize * 8:
+            continue
+        info = np.iinfo(f'{prefix}{bits}')
+        if valid.empty or (info.min <= valid.min() and valid.max() <= info.max):
+            break
+    name = f'{prefix}{bits}'
+    return name.replace('uint', 'UInt').replace('int', 'Int') if values.isna().any() else name
+
+
+def memory_report(original, compact):
+    """
+    Tabela com o uso de memória (bytes) por coluna antes e depois da compactação.
+    """
+    before = original.memory_usage(deep=True, index=False)
+    after = compact.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        'Tipo_Original': original.dtypes.astype(str),
+        'Tipo_Compacto': compact.dtypes.astype(str),
+        'Bytes_Antes': before,
+        'Bytes_Depois': after,
+    })
+    report.loc['TOTAL'] = ['', '', before.sum(), after.sum()]
+    report['Reducao_%'] = (100 * (1 - report['Bytes_Depois'] / report['Bytes_Antes'])).round(1)
+    return report
+
+
+if __name__ == '__main__':
+    from snapshot import CSV_PATH, ensure_snapshot, read_snapshot
+
+    ensure_snapshot(CSV_PATH)
+    original = read_snapshot()
+    report = memory_report(original, compact_dataframe(original))
+    print(report.to_string())
+    total = report.loc['TOTAL']
+    print(f"\nAntes: {total['Bytes_Antes'] / 1e6:.1f} MB | Depois: {total['Bytes_Depois'] / 1e6:.1f} MB")
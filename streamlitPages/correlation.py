@@ -0,0 +1,115 @@
+"""
+Correlações de Pearson a partir de estatísticas suficientes.
+
+Para cada par de colunas numéricas guardamos, considerando apenas as linhas
+em que as duas colunas têm valor (mesma regra do `DataFrame.corr`):
+
+- n:     quantidade de linhas
+- sum:   soma da coluna da linha
+- sumsq: soma dos quadrados da coluna da linha
+- cross: soma dos produtos das duas colunas
+
+São quatro matrizes k × k por grupo (todos os filmes, cada gênero e cada
+ano), somáveis entre lotes. A matriz de correlação de qualquer subconjunto de
+colunas sai dessas somas em O(k²), sem voltar às linhas.
+"""
+
+import numpy as np
+import pandas as pd
+
+MOMENT_STATS = ['n', 'sum', 'sumsq', 'cross']
+
+# Dimensões com matrizes de correlação próprias (além do total)
+MOMENT_GROUPS = ['Genre', 'ReleaseYear']
+
+# Rótulo do grupo com todos os filmes
+ALL_ROWS = 'Todos'
+
+
+def _moment_matrices(values):
+    """
+    As quatro matrizes de estatísticas de um bloco de linhas (array n × k).
+    """
+    present = ~np.isnan(values)
+    filled = np.where(present, values, 0.0)
+    mask = present.astype('float64')
+    # [i, j] considera só as linhas em que i e j têm valor
+    return {
+        'n': mask.T @ mask,
+        'sum': filled.T @ mask,
+        'sumsq': (filled ** 2).T @ mask,
+        'cross': filled.T @ filled,
+    }
+
+
+def build_moments(df, columns, groups=MOMENT_GROUPS):
+    """
+    Tabela de estatísticas suficientes indexada por (Grupo, Valor, Estatística,
+    Variável), com uma coluna por variável. Tabelas de lotes diferentes podem
+    ser somadas com cube.add_tables.
+    """
+    values = df[list(columns)].to_numpy(dtype='float64', na_value=np.nan)
+    blocks = [((ALL_ROWS, ALL_ROWS), values)]
+    for group in groups:
+        keys = df[group]
+        if isinstance(keys.dtype, pd.CategoricalDtype):
+            keys = keys.astype(object)
+        codes, uniques = pd.factorize(keys)
+        for code, value in enumerate(uniques):
+            if group == 'ReleaseYear':
+                value = int(value)
+            blocks.append(((group, value), values[codes == code]))
+
+    frames, index = [], []
+    for (group, value), block in blocks:
+        for stat, matrix in _moment_matrices(block).items():
+            frames.append(matrix)
+            index.extend((group, value, stat, col) for col in columns)
+    data = np.vstack(frames) if frames else np.empty((0, len(columns)))
+    index = pd.MultiIndex.from_tuples(index, names=['Grupo', 'Valor', 'Estatística', 'Variável'])
+    return pd.DataFrame(data, index=index, columns=list(columns))
+
+
+def group_values(moments, group):
+    """
+    Valores de `group` (ex.: gêneros ou anos) com matrizes próprias.
+    """
+    values = moments.xs(group, level='Grupo').index.get_level_values('Valor').unique()
+    return sorted(values)
+
+
+def pearson_matrix(moments, columns, group=ALL_ROWS, value=ALL_ROWS):
+    """
+    Matriz de correlação de Pearson das colunas escolhidas, no grupo pedido.
+    Pares sem variação ou com menos de duas linhas ficam NaN.
+    """
+    columns = list(columns)
+    cells = moments.xs((group, value), level=['Grupo', 'Valor'])
+    n, s, q, p = (cells.xs(stat, level='Estatística').loc[columns, columns].to_numpy() for stat in MOMENT_STATS)
+
+    # s[i, j] é a soma de i nas linhas em que j existe; s.T[i, j] é a soma de j
+    cov = n * p - s * s.T
+    var_i = n * q - s ** 2
+    var_j = var_i.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = cov / np.sqrt(var_i * var_j)
+    corr[(n < 2) | (var_i <= 0) | (var_j <= 0)] = np.nan
+    np.fill_diagonal(corr, np.where(np.diag(n) >= 2, 1.0, np.nan))
+    return pd.DataFrame(np.clip(corr, -1, 1), index=columns, columns=columns)
+
+
+def strong_pairs(matrix, threshold):
+    """
+    Pares (acima da diagonal) com |correlação| > threshold, do mais forte
+    para o mais fraco, com as colunas 'Variável 1', 'Variável 2' e 'Correlação'.
+    """
+    rows, cols = np.triu_indices(len(matrix.columns), k=1)
+    values = matrix.to_numpy()[rows, cols]
+    keep = np.abs(values) > threshold
+    pairs = pd.DataFrame({
+        'Variável 1': matrix.columns[rows[keep]],
+        'Variável 2': matrix.columns[cols[keep]],
+        'Correlação': values[keep].round(3)
+    })
+    order = np.argsort(-pairs['Correlação'].abs().to_numpy(), kind='stable')
+    return pairs.iloc[order].reset_index(drop=True)
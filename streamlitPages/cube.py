@@ -0,0 +1,102 @@
+"""
+Cubo pré-agregado Genre × ReleaseYear × Country.
+
+Cada célula guarda a quantidade de filmes e, para cada métrica, a soma,
+a soma dos quadrados e a quantidade de valores não nulos. Com isso médias,
+desvios, totais e contagens de qualquer combinação de filtros saem de
+algumas centenas de células, sem voltar às linhas originais.
+"""
+
+import numpy as np
+import pandas as pd
+
+CUBE_DIMENSIONS = ['Genre', 'ReleaseYear', 'Country']
+CUBE_MEASURES = ['BudgetUSD', 'Global_BoxOfficeUSD', 'US_BoxOfficeUSD', 'ROI', 'IMDbRating', 'International_Percentage']
+CUBE_COLUMNS = CUBE_DIMENSIONS + CUBE_MEASURES
+
+
+def build_cube(df):
+    """
+    Monta o cubo a partir do DataFrame de filmes (uma passada sobre as linhas).
+    """
+    keys = [df[dim] for dim in CUBE_DIMENSIONS]
+    values = df[CUBE_MEASURES].astype('float64')
+
+    # dropna=False: linhas com dimensão faltando também entram nos totais
+    sums = values.groupby(keys, observed=True, dropna=False).sum()
+    sumsq = (values ** 2).groupby(keys, observed=True, dropna=False).sum()
+    counts = values.groupby(keys, observed=True, dropna=False).count()
+
+    cube = pd.DataFrame({'count': df.groupby(keys, observed=True, dropna=False).size()})
+    for m in CUBE_MEASURES:
+        cube[f'{m}_sum'] = sums[m]
+        cube[f'{m}_sumsq'] = sumsq[m]
+        cube[f'{m}_n'] = counts[m]
+    return plain_index(cube)
+
+
+def plain_index(table):
+    """
+    Troca níveis categóricos do índice por valores simples, para que tabelas
+    montadas a partir de lotes diferentes possam ser somadas (ver add_tables).
+    """
+    index = table.index
+    if isinstance(index, pd.MultiIndex):
+        levels = [lvl.astype(object) if isinstance(lvl, pd.CategoricalIndex) else lvl for lvl in index.levels]
+        table.index = index.set_levels(levels)
+    elif isinstance(index, pd.CategoricalIndex):
+        table.index = index.astype(object)
+    return table
+
+
+def add_tables(left, right):
+    """
+    Soma duas tabelas aditivas (contagens e somas) célula a célula; células
+    presentes em apenas uma delas são mantidas. É assim que o cubo e as
+    demais tabelas parciais incorporam linhas novas.
+    """
+    result = left.add(right, fill_value=0)
+    return result.astype(left.dtypes.to_dict())
+
+
+def filter_cube(cube, year_range=None, genres=None, countries=None):
+    """
+    Seleciona as células do cubo que atendem aos filtros (None = sem filtro).
+    """
+    mask = np.ones(len(cube), dtype=bool)
+    if year_range is not None:
+        years = cube.index.get_level_values('ReleaseYear').to_numpy(dtype='float64', na_value=np.nan)
+        mask &= (years >= year_range[0]) & (years <= year_range[1])
+    if genres is not None:
+        mask &= cube.index.get_level_values('Genre').isin(genres)
+    if countries is not None:
+        mask &= cube.index.get_level_values('Country').isin(countries)
+    return cube[mask]
+
+
+def rollup(cells, by=None):
+    """
+    Agrega células do cubo e devolve, por grupo, 'count' e, para cada métrica,
+    '<métrica>_sum', '<métrica>_mean' e '<métrica>_std'.
+
+    `by` pode ser o nome de uma dimensão, uma lista de dimensões ou um array
+    alinhado às células (ex.: a década de cada ano). Com `by=None` o resultado
+    é uma única linha com o total das células.
+    """
+    if by is None:
+        totals = cells.sum().to_frame().T
+    else:
+        if isinstance(by, (str, list)):
+            by = [cells.index.get_level_values(level) for level in np.atleast_1d(by)]
+        totals = cells.groupby(by, observed=True).sum()
+
+    result = pd.DataFrame({'count': totals['count']}, index=totals.index)
+    for m in CUBE_MEASURES:
+        n = totals[f'{m}_n'].replace(0, np.nan)
+        mean = totals[f'{m}_sum'] / n
+        # Variância amostral a partir das somas (clip evita negativos por arredondamento)
+        var = ((totals[f'{m}_sumsq'] - n * mean ** 2) / (n - 1).replace(0, np.nan)).clip(lower=0)
+        result[f'{m}_sum'] = totals[f'{m}_sum']
+        result[f'{m}_mean'] = mean
+        result[f'{m}_std'] = np.sqrt(var)
+    return result
@@ -0,0 +1,115 @@
+"""
+Cache de figuras renderizadas (PNG), indexado por página, gráfico e filtros.
+
+Os gráficos matplotlib/seaborn são desenhados apenas quando a combinação
+(página, gráfico, estado dos filtros, versão dos dados) ainda não foi vista.
+Nas demais execuções o Streamlit recebe os bytes já prontos. O cache é um
+LRU com limite de memória compartilhado por todas as sessões do processo.
+"""
+
+import io
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from cache_keys import normalize_args
+from plotting import plt
+from timing import phase
+
+# Limite total de memória das imagens em cache
+FIGURE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Mesmas opções que o st.pyplot usa para gerar o PNG
+SAVEFIG_OPTIONS = {'bbox_inches': 'tight', 'dpi': 200, 'format': 'png'}
+
+
+class FigureCache:
+    """
+    LRU de imagens PNG limitado pelo total de bytes armazenados.
+    """
+
+    def __init__(self, max_bytes=FIGURE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            image = self._entries.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key, image):
+        # Imagens maiores que o orçamento inteiro não são guardadas
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self.total_bytes -= len(self._entries.pop(key))
+            self._entries[key] = image
+            self.total_bytes += len(image)
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.total_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def figure_to_png(fig):
+    """
+    Rasteriza a figura em PNG e fecha a figura, mesmo em caso de erro.
+    """
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, **SAVEFIG_OPTIONS)
+        return buffer.getvalue()
+    finally:
+        plt.close(fig)
+
+
+@st.cache_resource
+def get_figure_cache():
+    """
+    Instância única do cache de figuras por processo.
+    """
+    return FigureCache()
+
+
+def cached_pyplot(page, chart, filters, draw, data_version=None):
+    """
+    Substitui `st.pyplot(fig)`: `draw()` monta e devolve a figura e só é
+    chamada quando a combinação (página, gráfico, filtros, versão) não está
+    no cache.
+    """
+    cache = get_figure_cache()
+    key = (page, chart, normalize_args(filters), data_version)
+    image = cache.get(key)
+    if image is None:
+        opened = set(plt.get_fignums())
+        try:
+            with phase('render'):
+                fig = draw()
+            with phase('serialize'):
+                image = figure_to_png(fig)
+        finally:
+            # Figuras abertas por draw() (inclusive se ela falhar) saem do
+            # pyplot; fechar não impede salvar uma figura de outra sessão
+            for num in set(plt.get_fignums()) - opened:
+                plt.close(num)
+        cache.put(key, image)
+    with phase('serialize'):
+        st.image(image, width='stretch')
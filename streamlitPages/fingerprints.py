@@ -0,0 +1,104 @@
+"""
+Impressões digitais (fingerprints) de 64 bits das linhas do CSV, para achar
+linhas duplicadas sem comparar linhas inteiras.
+
+A impressão de cada linha é o hash de 64 bits (pd.util.hash_pandas_object)
+dos valores das colunas do CSV, calculado de forma vetorizada. Colunas
+numéricas entram como float64, para que um mesmo valor tenha o mesmo hash em
+blocos onde a coluna tem ou não nulos (inteiros com nulos viram float no pandas).
+
+O índice é o array ordenado das impressões já gravadas (uint64). Verificar um
+lote novo é uma busca binária por linha (np.searchsorted), em vez do
+df.duplicated() sobre o dataset inteiro em memória; o índice ocupa 8 bytes
+por linha e é lido do disco como memmap. Dois valores diferentes com o mesmo
+hash são tratados como duplicata (probabilidade desprezível: cerca de n²/2⁶⁵).
+
+Na ingestão (snapshot.build_snapshot / append_snapshot e o banco SQLite),
+linhas repetidas, dentro do lote ou em relação ao que já foi ingerido, são
+descartadas (fica a primeira ocorrência) e não contam duas vezes a
+bilheteria nas agregações. O snapshot guarda a impressão de cada linha na
+coluna FINGERPRINT_COLUMN, da qual o índice pode ser refeito. No modo
+streaming as impressões não ficam em um índice em memória: são separadas em
+partições no disco (ver streaming.duplicate_rows).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+FINGERPRINT_COLUMN = 'RowFingerprint'
+
+EMPTY_INDEX = np.empty(0, dtype='uint64')
+
+
+def row_fingerprints(df, exclude=()):
+    """
+    Impressão de 64 bits de cada linha, sobre as colunas de `df` (menos `exclude`).
+    """
+    columns = [col for col in df.columns if col not in exclude and col != FINGERPRINT_COLUMN]
+    values = pd.DataFrame({
+        col: df[col].astype('float64') if df[col].dtype.kind in 'biuf' else df[col]
+        for col in columns
+    }, index=df.index, copy=False)
+    return pd.util.hash_pandas_object(values, index=False).to_numpy(dtype='uint64')
+
+
+def contains(index, fingerprints):
+    """
+    Máscara das impressões já presentes no índice (busca binária).
+    """
+    if len(index) == 0:
+        return np.zeros(len(fingerprints), dtype=bool)
+    position = np.minimum(np.searchsorted(index, fingerprints), len(index) - 1)
+    return np.asarray(index)[position] == fingerprints
+
+
+def first_seen(fingerprints, index=EMPTY_INDEX):
+    """
+    Máscara das linhas novas: nem repetidas no lote, nem presentes no índice.
+    """
+    return ~(pd.Series(fingerprints).duplicated().to_numpy() | contains(index, fingerprints))
+
+
+def merge_index(index, fingerprints):
+    """
+    Índice com as impressões novas (já sem repetições, ver first_seen) incluídas.
+    """
+    fingerprints = np.sort(np.asarray(fingerprints, dtype='uint64'))
+    if len(index) == 0:
+        return fingerprints
+    index = np.asarray(index)
+    # Intercala dois arrays ordenados sem reordenar o índice inteiro
+    return np.insert(index, np.searchsorted(index, fingerprints), fingerprints)
+
+
+def build_index(fingerprints):
+    """
+    Índice (ordenado, sem repetições) de um conjunto de impressões.
+    """
+    return np.unique(np.asarray(fingerprints, dtype='uint64'))
+
+
+def write_index(path, index):
+    """
+    Grava o índice em disco (.npy, escrita atômica).
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.asarray(index, dtype='uint64'))
+    os.replace(tmp_path, path)
+
+
+def read_index(path, size=None):
+    """
+    Índice gravado em `path`, mapeado somente leitura; None se não existe ou
+    se não tem `size` impressões (gravado para outra versão dos dados).
+    """
+    try:
+        index = np.load(path, mmap_mode='r')
+    except (FileNotFoundError, ValueError):
+        return None
+    if size is not None and len(index) != size:
+        return None
+    return index
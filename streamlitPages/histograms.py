@@ -0,0 +1,109 @@
+"""
+Histogramas pré-calculados por célula (ex.: Genre × ReleaseYear) de medidas
+em percentual (as proporções de abertura, ver snapshot.OPENING_RATIOS).
+
+As faixas são fixas (HISTOGRAM_BINS faixas iguais entre HISTOGRAM_RANGE, mais
+uma faixa abaixo e uma acima), de modo que histogramas de lotes diferentes
+se somam célula a célula (ver cube.add_tables). Para cada medida a tabela
+guarda, por célula:
+
+- <medida>_h0 .. <medida>_h{B+1}: quantidade de valores em cada faixa
+  (h0: abaixo do início; h{B+1}: acima do fim)
+- <medida>_sum, <medida>_n: soma e quantidade de valores não nulos (médias exatas)
+
+A distribuição de qualquer período sai da soma das células selecionadas, com
+custo proporcional ao número de células (gêneros × anos), não ao número de
+filmes. Quantis lidos do histograma têm erro de no máximo uma faixa
+(HISTOGRAM_RANGE / HISTOGRAM_BINS).
+"""
+
+import numpy as np
+import pandas as pd
+
+from cube import plain_index
+
+HISTOGRAM_RANGE = (0.0, 100.0)
+HISTOGRAM_BINS = 400
+HISTOGRAM_EDGES = np.linspace(*HISTOGRAM_RANGE, HISTOGRAM_BINS + 1)
+
+
+def bin_columns(value):
+    """
+    Colunas das faixas de `value` na tabela de histogramas (incluindo abaixo e acima).
+    """
+    return [f"{value}_h{i}" for i in range(HISTOGRAM_BINS + 2)]
+
+
+def _bin_index(values):
+    """
+    Faixa de cada valor: 0 abaixo do início, 1..B dentro, B + 1 acima do fim
+    (o fim da faixa conta na última faixa interna).
+    """
+    low, high = HISTOGRAM_RANGE
+    width = (high - low) / HISTOGRAM_BINS
+    index = np.floor((values - low) / width).astype('int64') + 1
+    index = np.where(values == high, HISTOGRAM_BINS, index)
+    return np.clip(index, 0, HISTOGRAM_BINS + 1)
+
+
+def build_histograms(df, values, by):
+    """
+    Histograma, soma e quantidade de cada coluna de `values` por célula de `by`.
+    """
+    grouped = df.groupby(list(by), observed=True, dropna=False, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    index = grouped.size().index
+    cells = len(index)
+
+    columns = {}
+    for value in values:
+        data = df[value].to_numpy(dtype='float64', na_value=np.nan)
+        valid = ~np.isnan(data)
+        slots = codes[valid] * (HISTOGRAM_BINS + 2) + _bin_index(data[valid])
+        counts = np.bincount(slots, minlength=cells * (HISTOGRAM_BINS + 2)).reshape(cells, HISTOGRAM_BINS + 2)
+        columns.update(zip(bin_columns(value), counts.T))
+        columns[f"{value}_sum"] = np.bincount(codes[valid], weights=data[valid], minlength=cells)
+        columns[f"{value}_n"] = np.bincount(codes[valid], minlength=cells)
+    return plain_index(pd.DataFrame(columns, index=index))
+
+
+def histogram_quantiles(counts, levels):
+    """
+    Quantis `levels` (entre 0 e 1) de um histograma (contagens de bin_columns),
+    com interpolação linear dentro da faixa. Valores abaixo ou acima do
+    intervalo contam como o início ou o fim.
+    """
+    counts = np.asarray(counts, dtype='float64')
+    total = counts.sum()
+    if total == 0:
+        return np.full(len(levels), np.nan)
+    # Faixa de baixo colapsada no início e a de cima no fim
+    edges = np.concatenate([[HISTOGRAM_EDGES[0]], HISTOGRAM_EDGES, [HISTOGRAM_EDGES[-1]]])
+    cumulative = np.concatenate([[0.0], np.cumsum(counts)])
+    targets = np.asarray(levels, dtype='float64') * total
+    position = np.clip(np.searchsorted(cumulative, targets, side='left'), 1, len(counts))
+    before, inside = cumulative[position - 1], counts[position - 1]
+    fraction = np.where(inside > 0, (targets - before) / np.where(inside > 0, inside, 1.0), 0.0)
+    start, end = edges[position - 1], edges[position]
+    return start + fraction * (end - start)
+
+
+def rebin(counts, max_bins=30):
+    """
+    Junta faixas vizinhas para exibição: no máximo `max_bins` faixas cobrindo
+    só o trecho com valores. Devolve um DataFrame (start, end, count) e a
+    quantidade de valores fora do intervalo.
+    """
+    counts = np.asarray(counts)
+    inner, outside = counts[1:-1], int(counts[0] + counts[-1])
+    occupied = np.flatnonzero(inner)
+    if len(occupied) == 0:
+        return pd.DataFrame(columns=['start', 'end', 'count']), outside
+    first, last = occupied[0], occupied[-1] + 1
+    step = int(np.ceil((last - first) / max_bins))
+    groups = np.arange(first, last, step)
+    return pd.DataFrame({
+        'start': HISTOGRAM_EDGES[groups],
+        'end': HISTOGRAM_EDGES[np.minimum(groups + step, HISTOGRAM_BINS)],
+        'count': np.add.reduceat(inner[first:last], groups - first),
+    }), outside
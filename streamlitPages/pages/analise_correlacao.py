@@ -1,21 +1,21 @@
 # analise_correlacao.py
 
 import streamlit as st
-import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import numpy as np
-from utils import load_data
+import aggregations as agg
+import charts
+from plotting import plt, sns
+from timing import phase
+from utils import load_dataset_version, show_timing_panel, start_page_timing
 
 # --- Configuração da Página ---
 st.set_page_config(page_title="Análise de Correlações", layout="wide")
+start_page_timing('analise_correlacao')
 
 # --- Carregamento dos Dados ---
-@st.cache_data
-def load_cached_data():
-    return load_data()
-
-df = load_cached_data()
+# A matriz de correlação vem do motor de agregações compartilhado (aggregations.py),
+# calculada a partir de somas pré-calculadas por versão do dataset (correlation.py)
+data_version = load_dataset_version()
 
 # --- Título do Dashboard ---
 st.title("🔗 Dashboard de Análise de Correlações")
@@ -28,11 +28,7 @@ Use os filtros para construir um mapa de calor de correlações personalizado.
 st.header("🔍 Filtros de Variáveis")
 
 # Lista de todas as variáveis numéricas disponíveis para seleção
-all_numeric_cols = [
-    'BudgetUSD', 'US_BoxOfficeUSD', 'Global_BoxOfficeUSD',
-    'Opening_Day_SalesUSD', 'One_Week_SalesUSD',
-    'IMDbRating', 'RottenTomatoesScore', 'NumVotesIMDb', 'NumVotesRT', 'ROI'
-]
+all_numeric_cols = agg.NUMERIC_COLUMNS
 
 # Filtro para selecionar as variáveis para a matriz de correlação
 selected_cols = st.multiselect(
@@ -41,40 +37,66 @@ selected_cols = st.multiselect(
     default=all_numeric_cols  # Todas as colunas são selecionadas por padrão
 )
 
+# Filtro para calcular as correlações de um gênero ou ano específico
+scope_options = {'Todos os filmes': None, 'Por gênero': 'Genre', 'Por ano': 'ReleaseYear'}
+scope = st.radio('Calcular as correlações para:', options=list(scope_options), horizontal=True)
+group = scope_options[scope]
+
+if group is None:
+    group, group_value = agg.ALL_ROWS, agg.ALL_ROWS
+else:
+    group_value = st.selectbox(
+        'Selecione o gênero:' if group == 'Genre' else 'Selecione o ano:',
+        options=agg.correlation_groups(group)
+    )
+
 # --- Lógica de Validação ---
 if len(selected_cols) < 2:
     st.warning("⚠️ Por favor, selecione pelo menos duas variáveis para calcular a correlação.")
+    show_timing_panel()
     st.stop()
 
 # --- Análise de Correlação ---
 # Calculando a matriz de correlação com base nas colunas selecionadas
-correlation_matrix = df[selected_cols].corr()
+with phase('aggregate'):
+    correlation_matrix = agg.correlation_matrix(selected_cols, group, group_value)
+
+# Estado dos filtros (a ordem das colunas define a ordem da matriz)
+filter_state = {'columns': selected_cols, 'group': group, 'value': group_value}
 
 # --- Visualização do Mapa de Calor ---
 st.header("🌡️ Mapa de Calor (Heatmap) de Correlações")
 
 # Ocupa a largura total da coluna para melhor visualização
-fig, ax = plt.subplots(figsize=(14, 10))
-
-# Máscara para ocultar a parte superior da matriz (triângulo superior)
-mask = np.triu(np.ones_like(correlation_matrix, dtype=bool))
-
-sns.heatmap(
-    correlation_matrix,
-    mask=mask,
-    annot=True,
-    fmt='.2f',          # Formata os números com duas casas decimais
-    cmap='RdBu_r',      # Paleta de cores (Vermelho-Branco-Azul)
-    center=0,           # Centraliza a escala de cores em zero
-    square=True,
-    linewidths=1,
-    cbar_kws={"shrink": 0.8, "label": "Coeficiente de Correlação"},
-    vmin=-1, vmax=1,    # Garante que a escala de cores vá de -1 a 1
-    ax=ax
-)
 
-ax.set_title('Mapa de Correlações entre as Variáveis Selecionadas', fontsize=16, pad=20)
-st.pyplot(fig)
+def draw_heatmap():
+    fig, ax = plt.subplots(figsize=(14, 10))
+
+    # Máscara para ocultar a parte superior da matriz (triângulo superior)
+    mask = np.triu(np.ones_like(correlation_matrix, dtype=bool))
+
+    sns.heatmap(
+        correlation_matrix,
+        mask=mask,
+        annot=True,
+        fmt='.2f',          # Formata os números com duas casas decimais
+        cmap='RdBu_r',      # Paleta de cores (Vermelho-Branco-Azul)
+        center=0,           # Centraliza a escala de cores em zero
+        square=True,
+        linewidths=1,
+        cbar_kws={"shrink": 0.8, "label": "Coeficiente de Correlação"},
+        vmin=-1, vmax=1,    # Garante que a escala de cores vá de -1 a 1
+        ax=ax
+    )
+
+    ax.set_title('Mapa de Correlações entre as Variáveis Selecionadas', fontsize=16, pad=20)
+    return fig
+
+def client_heatmap():
+    return charts.heatmap_chart(correlation_matrix, 'Coeficiente de Correlação')
+
+charts.show_chart('analise_correlacao', 'heatmap', filter_state, draw_heatmap, data_version,
+                  client=client_heatmap)
 
 st.info("""
 **Como interpretar o mapa:**
@@ -96,27 +118,14 @@ threshold = st.slider(
     step=0.05
 )
 
-strong_correlations = []
-# Iterando sobre a matriz para encontrar correlações acima do limiar
-for i in range(len(correlation_matrix.columns)):
-    for j in range(i + 1, len(correlation_matrix.columns)):
-        corr_value = correlation_matrix.iloc[i, j]
-        if abs(corr_value) > threshold:
-            strong_correlations.append({
-                'Variável 1': correlation_matrix.columns[i],
-                'Variável 2': correlation_matrix.columns[j],
-                'Correlação': round(corr_value, 3)
-            })
-
-if strong_correlations:
-    # Criando um DataFrame para exibir os resultados de forma organizada
-    df_strong = pd.DataFrame(strong_correlations)
-    
-    # Ordenando pela correlação mais forte (em valor absoluto)
-    df_strong['Correlação_Abs'] = df_strong['Correlação'].abs()
-    df_strong = df_strong.sort_values(by='Correlação_Abs', ascending=False).drop(columns=['Correlação_Abs'])
-    
+# Pares acima do limiar no triângulo superior, já ordenados pela correlação mais forte (em valor absoluto)
+with phase('filter'):
+    df_strong = agg.strong_correlations(selected_cols, threshold, group, group_value)
+
+if not df_strong.empty:
     st.subheader(f"Principais Relações com Correlação > {threshold}")
     st.dataframe(df_strong, use_container_width=True, hide_index=True)
 else:
-    st.success(f"✅ Nenhuma correlação com valor absoluto maior que {threshold} foi encontrada entre as variáveis selecionadas.")
\ No newline at end of file
+    st.success(f"✅ Nenhuma correlação com valor absoluto maior que {threshold} foi encontrada entre as variáveis selecionadas.")
+
+show_timing_panel()
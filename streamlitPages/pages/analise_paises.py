@@ -2,35 +2,29 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-from utils import load_data
+import aggregations as agg
+import charts
+from plotting import plt
+from timing import phase
+from utils import load_dataset_version, show_timing_panel, start_page_timing
 
 # --- Configuração da Página ---
 st.set_page_config(page_title="Análise por Países", layout="wide")
+start_page_timing('analise_paises')
 
 # --- Carregamento dos Dados ---
-@st.cache_data
-def load_cached_data():
-    return load_data()
-
-df = load_cached_data()
+# As tabelas vêm do motor de agregações compartilhado (aggregations.py)
+data_version = load_dataset_version()
 
 # --- Título do Dashboard ---
 st.title("🌎 Análise Comparativa da Indústria Cinematográfica por País")
 st.markdown("Explore e compare as métricas de produção, performance financeira e avaliação dos filmes de diferentes países.")
 
 # --- Processamento de Dados (executado antes dos filtros) ---
-# Agrupamento para obter as estatísticas de todos os países
-country_stats = df.groupby('Country').agg({
-    'Title': 'count',
-    'BudgetUSD': 'mean',
-    'Global_BoxOfficeUSD': 'mean',
-    'IMDbRating': 'mean',
-    'ROI': 'mean'
-}).round(2)
-country_stats.columns = ['Num_Filmes', 'Orçamento_Médio', 'Bilheteria_Média', 'Rating_Médio', 'ROI_Médio']
-country_stats = country_stats.sort_values('Num_Filmes', ascending=False)
+# Estatísticas de todos os países, do país com mais filmes para o com menos
+with phase('aggregate'):
+    country_stats = agg.country_stats()
 
 # --- Filtros Interativos ---
 st.header("🔍 Filtros da Análise")
@@ -48,10 +42,16 @@ selected_countries = st.multiselect(
 # --- Validação dos Filtros ---
 if not selected_countries:
     st.warning("⚠️ Por favor, selecione pelo menos um país para visualizar a análise.")
+    show_timing_panel()
     st.stop()
 
 # Filtra o DataFrame de estatísticas com base na seleção
-stats_filtered = country_stats.loc[selected_countries]
+# (mantém a ordem por número de filmes, independente da ordem de seleção)
+with phase('filter'):
+    stats_filtered = country_stats[country_stats.index.isin(selected_countries)]
+
+# Estado normalizado dos filtros (chave do cache de figuras)
+filter_state = {'countries': sorted(selected_countries)}
 
 # --- Métricas Principais (KPIs) ---
 st.header("📊 Visão Geral dos Países Selecionados")
@@ -69,113 +69,173 @@ col1, col2 = st.columns(2)
 with col1:
     # 1. Gráfico de Pizza: Distribuição de Filmes
     st.subheader("Distribuição de Filmes por País")
-    fig1, ax1 = plt.subplots(figsize=(8, 6))
-    colors_pie = plt.cm.Set3(np.linspace(0, 1, len(stats_filtered)))
-    
-    data_pie = stats_filtered['Num_Filmes']
-    labels_pie = stats_filtered.index
-    
-    wedges, texts, autotexts = ax1.pie(
-        data_pie,
-        labels=labels_pie,
-        autopct='%1.1f%%',
-        colors=colors_pie,
-        startangle=90
-    )
-    for autotext in autotexts:
-        autotext.set_color('black')
-        autotext.set_fontsize(10)
-    st.pyplot(fig1)
+
+    def draw_pizza():
+        fig1, ax1 = plt.subplots(figsize=(8, 6))
+        colors_pie = plt.cm.Set3(np.linspace(0, 1, len(stats_filtered)))
+
+        data_pie = stats_filtered['Num_Filmes']
+        labels_pie = stats_filtered.index
+
+        wedges, texts, autotexts = ax1.pie(
+            data_pie,
+            labels=labels_pie,
+            autopct='%1.1f%%',
+            colors=colors_pie,
+            startangle=90
+        )
+        for autotext in autotexts:
+            autotext.set_color('black')
+            autotext.set_fontsize(10)
+        return fig1
+
+    def client_pizza():
+        return charts.pie_chart(stats_filtered, 'Country', 'Num_Filmes')
+
+    charts.show_chart('analise_paises', 'pizza', filter_state, draw_pizza, data_version, client=client_pizza)
 
     # 2. Gráfico de Barras: Orçamento Médio
     st.subheader("Orçamento Médio de Produção")
-    fig2, ax2 = plt.subplots(figsize=(8, 6))
-    data_bar = stats_filtered['Orçamento_Médio'] / 1e6
-    colors_bar = plt.cm.YlOrRd(np.linspace(0.4, 0.9, len(data_bar)))
-    ax2.barh(data_bar.index, data_bar, color=colors_bar)
-    ax2.set_xlabel('Orçamento Médio (Milhões USD)')
-    ax2.set_xlim(left=9) # Força o eixo X a começar em 8
-    ax2.grid(True, alpha=0.3, axis='x')
-    st.pyplot(fig2)
+
+    def draw_orcamento():
+        fig2, ax2 = plt.subplots(figsize=(8, 6))
+        data_bar = stats_filtered['Orçamento_Médio'] / 1e6
+        colors_bar = plt.cm.YlOrRd(np.linspace(0.4, 0.9, len(data_bar)))
+        ax2.barh(data_bar.index, data_bar, color=colors_bar)
+        ax2.set_xlabel('Orçamento Médio (Milhões USD)')
+        ax2.set_xlim(left=9) # Força o eixo X a começar em 8
+        ax2.grid(True, alpha=0.3, axis='x')
+        return fig2
+
+    def client_orcamento():
+        data = stats_filtered.assign(Orçamento_Médio=stats_filtered['Orçamento_Médio'] / 1e6)
+        return charts.bar_chart(data, 'Country', 'Orçamento_Médio', 'Orçamento Médio (Milhões USD)',
+                                scheme='yelloworangered', order=data.index.tolist(),
+                                value_domain=(9, data['Orçamento_Médio'].max()))
+
+    charts.show_chart('analise_paises', 'orcamento', filter_state, draw_orcamento, data_version,
+                      client=client_orcamento)
 
     # 3. Gráfico de Barras: Rating Médio
     st.subheader("Avaliação Média (IMDb)")
-    fig3, ax3 = plt.subplots(figsize=(8, 6))
-    data_rating = stats_filtered['Rating_Médio']
-    colors_rating = plt.cm.Purples(np.linspace(0.4, 0.9, len(data_rating)))
-    ax3.barh(data_rating.index, data_rating, color=colors_rating)
-    ax3.set_xlabel('Rating IMDb Médio')
-    ax3.set_xlim(left=max(0, data_rating.min() - 0.5)) # Ajuste dinâmico do eixo
-    ax3.set_xlim(left=6.4, right=6.6) # Força o eixo X a começar em 6.4
-    ax3.grid(True, alpha=0.3, axis='x')
-    st.pyplot(fig3)
+
+    def draw_rating():
+        fig3, ax3 = plt.subplots(figsize=(8, 6))
+        data_rating = stats_filtered['Rating_Médio']
+        colors_rating = plt.cm.Purples(np.linspace(0.4, 0.9, len(data_rating)))
+        ax3.barh(data_rating.index, data_rating, color=colors_rating)
+        ax3.set_xlabel('Rating IMDb Médio')
+        ax3.set_xlim(left=max(0, data_rating.min() - 0.5)) # Ajuste dinâmico do eixo
+        ax3.set_xlim(left=6.4, right=6.6) # Força o eixo X a começar em 6.4
+        ax3.grid(True, alpha=0.3, axis='x')
+        return fig3
+
+    def client_rating():
+        return charts.bar_chart(stats_filtered, 'Country', 'Rating_Médio', 'Rating IMDb Médio',
+                                scheme='purples', order=stats_filtered.index.tolist(), value_domain=(6.4, 6.6))
+
+    charts.show_chart('analise_paises', 'rating', filter_state, draw_rating, data_version, client=client_rating)
 
 
 with col2:
     st.subheader("Relação Orçamento vs. Bilheteria")
-    fig4, ax4 = plt.subplots(figsize=(8, 6))
-    
-    # --- CORREÇÃO APLICADA AQUI ---
-    # 1. Defina o tamanho mínimo e máximo que você quer para as bolhas
-    min_bubble_size = 30
-    max_bubble_size = 1000
-
-    # 2. Pega os valores mínimo e máximo da sua variável de tamanho
-    min_val = stats_filtered['Num_Filmes'].min()
-    max_val = stats_filtered['Num_Filmes'].max()
-
-    # 3. Normaliza os tamanhos para o intervalo desejado
-    # Evita divisão por zero se todos os valores forem iguais
-    if max_val == min_val:
-        scaled_sizes = [min_bubble_size] * len(stats_filtered)
-    else:
-        scaled_sizes = min_bubble_size + (stats_filtered['Num_Filmes'] - min_val) * \
-                       (max_bubble_size - min_bubble_size) / (max_val - min_val)
-    # --- FIM DA CORREÇÃO ---
-
-    scatter = ax4.scatter(
-        stats_filtered['Orçamento_Médio'] / 1e6,
-        stats_filtered['Bilheteria_Média'] / 1e6,
-        s=scaled_sizes * 5, # Use os tamanhos normalizados aqui
-        c=stats_filtered['ROI_Médio'],
-        cmap='coolwarm',
-        alpha=0.7, # Reduzir um pouco a opacidade ajuda na sobreposição
-        edgecolors='black',
-        linewidth=1
-    )
-    
-    ax4.set_xlabel('Orçamento Médio (Milhões USD)')
-    ax4.set_ylabel('Bilheteria Média (Milhões USD)')
-    ax4.grid(True, alpha=0.3)
-    cbar = plt.colorbar(scatter, ax=ax4)
-    cbar.set_label('ROI Médio (%)')
-    
-    st.pyplot(fig4)
+
+    def draw_orcamento_bilheteria():
+        fig4, ax4 = plt.subplots(figsize=(8, 6))
+
+        # --- CORREÇÃO APLICADA AQUI ---
+        # 1. Defina o tamanho mínimo e máximo que você quer para as bolhas
+        min_bubble_size = 30
+        max_bubble_size = 1000
+
+        # 2. Pega os valores mínimo e máximo da sua variável de tamanho
+        min_val = stats_filtered['Num_Filmes'].min()
+        max_val = stats_filtered['Num_Filmes'].max()
+
+        # 3. Normaliza os tamanhos para o intervalo desejado
+        # Evita divisão por zero se todos os valores forem iguais
+        if max_val == min_val:
+            scaled_sizes = np.full(len(stats_filtered), min_bubble_size)
+        else:
+            scaled_sizes = min_bubble_size + (stats_filtered['Num_Filmes'] - min_val) * \
+                           (max_bubble_size - min_bubble_size) / (max_val - min_val)
+        # --- FIM DA CORREÇÃO ---
+
+        scatter = ax4.scatter(
+            stats_filtered['Orçamento_Médio'] / 1e6,
+            stats_filtered['Bilheteria_Média'] / 1e6,
+            s=scaled_sizes * 5, # Use os tamanhos normalizados aqui
+            c=stats_filtered['ROI_Médio'],
+            cmap='coolwarm',
+            alpha=0.7, # Reduzir um pouco a opacidade ajuda na sobreposição
+            edgecolors='black',
+            linewidth=1
+        )
+
+        ax4.set_xlabel('Orçamento Médio (Milhões USD)')
+        ax4.set_ylabel('Bilheteria Média (Milhões USD)')
+        ax4.grid(True, alpha=0.3)
+        cbar = plt.colorbar(scatter, ax=ax4)
+        cbar.set_label('ROI Médio (%)')
+        return fig4
+
+    def client_orcamento_bilheteria():
+        data = stats_filtered.reset_index().assign(
+            Orçamento_Médio=stats_filtered['Orçamento_Médio'].to_numpy() / 1e6,
+            Bilheteria_Média=stats_filtered['Bilheteria_Média'].to_numpy() / 1e6
+        )
+        return charts.scatter_chart(data, 'Orçamento_Médio', 'Bilheteria_Média', 'ROI_Médio',
+                                    'Orçamento Médio (Milhões USD)', 'Bilheteria Média (Milhões USD)',
+                                    'ROI Médio (%)', size='Num_Filmes',
+                                    tooltip=['Country', 'Num_Filmes', 'Orçamento_Médio', 'Bilheteria_Média',
+                                             'ROI_Médio'])
+
+    charts.show_chart('analise_paises', 'orcamento_bilheteria', filter_state, draw_orcamento_bilheteria, data_version,
+                      client=client_orcamento_bilheteria)
 
     # 5. Gráfico de Barras: Bilheteria Média
     st.subheader("Bilheteria Média Global")
-    fig5, ax5 = plt.subplots(figsize=(8, 6))
-    data_box = stats_filtered['Bilheteria_Média'] / 1e6
-    colors_box = plt.cm.GnBu(np.linspace(0.4, 0.9, len(data_box)))
-    ax5.barh(data_box.index, data_box, color=colors_box)
-    ax5.set_xlabel('Bilheteria Média (Milhões USD)')
-    ax5.set_xlim(left=24) # Força o eixo X a começar em 24
 
-    ax5.grid(True, alpha=0.3, axis='x')
-    st.pyplot(fig5)
+    def draw_bilheteria():
+        fig5, ax5 = plt.subplots(figsize=(8, 6))
+        data_box = stats_filtered['Bilheteria_Média'] / 1e6
+        colors_box = plt.cm.GnBu(np.linspace(0.4, 0.9, len(data_box)))
+        ax5.barh(data_box.index, data_box, color=colors_box)
+        ax5.set_xlabel('Bilheteria Média (Milhões USD)')
+        ax5.set_xlim(left=24) # Força o eixo X a começar em 24
+
+        ax5.grid(True, alpha=0.3, axis='x')
+        return fig5
+
+    def client_bilheteria():
+        data = stats_filtered.assign(Bilheteria_Média=stats_filtered['Bilheteria_Média'] / 1e6)
+        return charts.bar_chart(data, 'Country', 'Bilheteria_Média', 'Bilheteria Média (Milhões USD)',
+                                scheme='greenblue', order=data.index.tolist(),
+                                value_domain=(24, data['Bilheteria_Média'].max()))
+
+    charts.show_chart('analise_paises', 'bilheteria', filter_state, draw_bilheteria, data_version,
+                      client=client_bilheteria)
 
 
     # 6. Gráfico de Barras: ROI Médio
     st.subheader("Retorno sobre Investimento (ROI) Médio")
-    fig6, ax6 = plt.subplots(figsize=(8, 6))
-    data_roi = stats_filtered['ROI_Médio']
-    colors_roi = plt.cm.RdYlGn(np.linspace(0.3, 0.9, len(data_roi)))
-    ax6.barh(data_roi.index, data_roi, color=colors_roi)
-    ax6.set_xlabel('ROI Médio (%)')
-    ax6.set_xlim(left=170, right=184) # Força o eixo X a começar em 170
 
-    ax6.grid(True, alpha=0.3, axis='x')
-    st.pyplot(fig6)
+    def draw_roi():
+        fig6, ax6 = plt.subplots(figsize=(8, 6))
+        data_roi = stats_filtered['ROI_Médio']
+        colors_roi = plt.cm.RdYlGn(np.linspace(0.3, 0.9, len(data_roi)))
+        ax6.barh(data_roi.index, data_roi, color=colors_roi)
+        ax6.set_xlabel('ROI Médio (%)')
+        ax6.set_xlim(left=170, right=184) # Força o eixo X a começar em 170
+
+        ax6.grid(True, alpha=0.3, axis='x')
+        return fig6
+
+    def client_roi():
+        return charts.bar_chart(stats_filtered, 'Country', 'ROI_Médio', 'ROI Médio (%)',
+                                scheme='redyellowgreen', order=stats_filtered.index.tolist(), value_domain=(170, 184))
+
+    charts.show_chart('analise_paises', 'roi', filter_state, draw_roi, data_version, client=client_roi)
 
 
 st.header("📋 Dados Detalhados")
@@ -192,8 +252,12 @@ with col2:
         options=sort_options,
         label_visibility="collapsed" # Oculta o label principal do radio
     )
+    exact_medians = st.checkbox("Medianas exatas", value=False,
+                                help="Calcula sobre os filmes em vez de combinar os resumos de quantis.")
 
-    sorted_df = stats_filtered.sort_values(by=sort_by_option, ascending=False)
+    with phase('aggregate'):
+        medians = agg.country_medians(filter_state['countries'], exact_medians)
+    sorted_df = stats_filtered.join(medians).sort_values(by=sort_by_option, ascending=False)
 
 with col1:
     # Tabela 1: Estatísticas Gerais
@@ -204,7 +268,10 @@ with col1:
             'Orçamento_Médio': '${:,.0f}',
             'Bilheteria_Média': '${:,.0f}',
             'ROI_Médio': '{:.2f}%',
-            'Rating_Médio': '{:.2f}'
+            'Rating_Médio': '{:.2f}',
+            'Orçamento_Mediano': '${:,.0f}',
+            'Bilheteria_Mediana': '${:,.0f}',
+            'ROI_Mediano': '{:.2f}%'
         }),
         use_container_width=True
     )
@@ -212,17 +279,12 @@ with col1:
 
 # Tabela 2: Performance Internacional
 st.subheader("Performance no Mercado Internacional")
-df_filtered_countries = df[df['Country'].isin(selected_countries)]
-df_filtered_countries['International_BoxOffice'] = df_filtered_countries['Global_BoxOfficeUSD'] - df_filtered_countries['US_BoxOfficeUSD']
-# Evitar divisão por zero se bilheteria global for 0
-df_filtered_countries['International_Percentage'] = (
-    df_filtered_countries['International_BoxOffice'] / df_filtered_countries['Global_BoxOfficeUSD'] * 100
-).fillna(0)
-
-international_by_country = df_filtered_countries.groupby('Country')['International_Percentage'].mean().round(2)
-international_by_country = international_by_country.sort_values(ascending=False).to_frame()
+with phase('filter'):
+    international_by_country = agg.international_by_country(filter_state['countries'])
 
 st.dataframe(
     international_by_country.style.format('{:.2f}%'),
     use_container_width=True
-)
\ No newline at end of file
+)
+
+show_timing_panel()
@@ -0,0 +1,216 @@
+# performance_abertura.py
+
+import streamlit as st
+import numpy as np
+import aggregations as agg
+import charts
+from plotting import plt
+from timing import phase
+from utils import load_dataset_version, show_timing_panel, start_page_timing
+
+# --- Configuração da Página ---
+st.set_page_config(page_title="Performance de Abertura", layout="wide")
+start_page_timing('performance_abertura')
+
+# --- Carregamento dos Dados ---
+# As proporções de abertura já vêm calculadas no snapshot e a página usa
+# apenas os histogramas e somas por (gênero, ano), não as linhas
+data_version = load_dataset_version()
+
+# --- Título do Dashboard ---
+st.title("🎟️ Performance de Abertura: Dia de Estreia e Primeira Semana")
+st.markdown("Veja quanto da bilheteria total de cada filme vem do dia de abertura e da primeira semana, "
+            "e como essa dependência varia entre gêneros e ao longo do tempo.")
+
+# Proporções analisadas: coluna -> rótulo
+RATIO_LABELS = {
+    'Opening_to_Total_Ratio': '% da Bilheteria Total no Dia de Abertura',
+    'Week_to_Total_Ratio': '% da Bilheteria Total na Primeira Semana',
+    'Opening_to_Week_Ratio': '% da Primeira Semana no Dia de Abertura',
+}
+
+# --- Filtros ---
+st.header("🔍 Filtros Interativos")
+col1, gap, col2 = st.columns([0.55, 0.15, 0.3])
+with col1:
+    st.subheader("Período de Lançamento")
+    min_year, max_year = agg.year_bounds()
+
+    year_range = st.slider(
+        "Selecione o período (anos)",
+        min_value=min_year,
+        max_value=max_year,
+        value=(min_year, max_year),
+        label_visibility="collapsed"
+    )
+with gap:
+    st.write("")
+with col2:
+    selected_genres = []
+    st.subheader("Gêneros")
+    subcol1, subcol2 = st.columns(2)
+    with subcol1:
+        for genre in ['Comedy', 'Documentary', 'Drama', 'Horror']:
+            if st.checkbox(genre, value=True):
+                selected_genres.append(genre)
+    with subcol2:
+        for genre in ['Action', 'Thriller', 'Romance', 'Sci-Fi']:
+            if st.checkbox(genre, value=True):
+                selected_genres.append(genre)
+
+if not selected_genres:
+    st.warning("⚠️ Selecione pelo menos um gênero para visualizar os dados.")
+    show_timing_panel()
+    st.stop()
+
+# Estado normalizado dos filtros (chave do cache de figuras e das agregações)
+filter_state = {'years': year_range, 'genres': sorted(selected_genres)}
+
+# --- Análise de Dados ---
+with phase('aggregate'):
+    opening_by_genre = agg.opening_by_genre(year_range, filter_state['genres'])
+    overview = agg.opening_overview(year_range, filter_state['genres'])
+    opening_trends = agg.opening_trends(year_range, filter_state['genres'])
+
+if opening_by_genre.empty:
+    st.warning("⚠️ Nenhum dado disponível para o período selecionado. Por favor, ajuste os filtros.")
+    show_timing_panel()
+    st.stop()
+
+# --- Métricas Principais ---
+st.header("📊 Visão Geral")
+kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+kpi1.metric("Total de Filmes", f"{overview['Total_Filmes']:,}")
+kpi2.metric("Média no Dia de Abertura", f"{overview['Opening_to_Total_Ratio']:.2f}%")
+kpi3.metric("Média na Primeira Semana", f"{overview['Week_to_Total_Ratio']:.2f}%")
+kpi4.metric("Multiplicador Mediano", f"{overview['Multiplicador_Mediano']:.2f}x",
+            help="Bilheteria total dividida pelas vendas do dia de abertura (mediana).")
+
+# --- Visualizações ---
+st.header("📈 Abertura vs. Bilheteria Total")
+
+col1, col2 = st.columns(2)
+
+with col1:
+    # 1. Proporção média do dia de abertura por gênero
+    st.subheader("Importância do Dia de Abertura por Gênero")
+
+    def draw_abertura_genero():
+        fig1, ax1 = plt.subplots(figsize=(8, 6))
+        data = opening_by_genre['Abertura_Total_Médio_%'].iloc[::-1]
+        colors = plt.cm.plasma(np.linspace(0.3, 0.9, len(data)))
+        ax1.barh(range(len(data)), data.values, color=colors)
+        ax1.set_yticks(range(len(data)))
+        ax1.set_yticklabels(data.index)
+        ax1.set_xlabel(RATIO_LABELS['Opening_to_Total_Ratio'])
+        ax1.set_ylabel('Gênero')
+        ax1.grid(True, alpha=0.3, axis='x')
+        return fig1
+
+    def client_abertura_genero():
+        return charts.bar_chart(opening_by_genre, 'Genre', 'Abertura_Total_Médio_%',
+                                RATIO_LABELS['Opening_to_Total_Ratio'], 'Gênero', scheme='plasma',
+                                order=opening_by_genre.index.tolist())
+
+    charts.show_chart('performance_abertura', 'abertura_genero', filter_state, draw_abertura_genero, data_version,
+                      client=client_abertura_genero)
+
+    # 3. Evolução da proporção do dia de abertura
+    st.subheader("Evolução da Importância do Dia de Abertura")
+
+    def draw_abertura_anos():
+        fig3, ax3 = plt.subplots(figsize=(8, 5))
+        ax3.plot(opening_trends['ReleaseYear'], opening_trends['Opening_to_Total_Ratio'],
+                 marker='o', linewidth=2, color='#E63946')
+        ax3.fill_between(opening_trends['ReleaseYear'], opening_trends['Opening_to_Total_Ratio'],
+                         alpha=0.3, color='#E63946')
+        ax3.set_xlabel('Ano de Lançamento')
+        ax3.set_ylabel('% Média da Bilheteria no Dia de Abertura')
+        ax3.grid(True, alpha=0.3)
+        return fig3
+
+    def client_abertura_anos():
+        return charts.line_chart(opening_trends, 'ReleaseYear',
+                                 {'Opening_to_Total_Ratio': ('Dia de abertura', '#E63946')},
+                                 '% Média da Bilheteria no Dia de Abertura', 'Ano de Lançamento', area=True)
+
+    charts.show_chart('performance_abertura', 'abertura_anos', filter_state, draw_abertura_anos, data_version,
+                      client=client_abertura_anos)
+
+with col2:
+    # 2. Distribuição de uma proporção (histograma pré-calculado)
+    st.subheader("Distribuição das Proporções")
+    selected_ratio = st.selectbox(
+        "Proporção:",
+        options=list(RATIO_LABELS),
+        index=1,
+        format_func=RATIO_LABELS.get
+    )
+    with phase('aggregate'):
+        ratio_bins = agg.ratio_histogram(selected_ratio, year_range, filter_state['genres'])
+    ratio_mean = overview[selected_ratio]
+
+    def draw_distribuicao():
+        fig2, ax2 = plt.subplots(figsize=(8, 5))
+        ax2.bar(ratio_bins['start'], ratio_bins['count'], width=ratio_bins['end'] - ratio_bins['start'],
+                align='edge', color='teal', alpha=0.7, edgecolor='black')
+        ax2.axvline(ratio_mean, color='red', linestyle='--', label=f'Média: {ratio_mean:.1f}%')
+        ax2.set_xlabel(RATIO_LABELS[selected_ratio])
+        ax2.set_ylabel('Frequência')
+        ax2.legend()
+        ax2.grid(True, alpha=0.3)
+        return fig2
+
+    def client_distribuicao():
+        return charts.histogram_chart(ratio_bins, RATIO_LABELS[selected_ratio], mean=ratio_mean)
+
+    charts.show_chart('performance_abertura', 'distribuicao', {**filter_state, 'ratio': selected_ratio},
+                      draw_distribuicao, data_version, client=client_distribuicao)
+    if ratio_bins.attrs['outside']:
+        st.caption(f"{ratio_bins.attrs['outside']:,} filmes com proporção fora de 0–100% não aparecem no gráfico.")
+
+    # 4. Multiplicador mediano por gênero
+    st.subheader("Multiplicadores de Bilheteria por Gênero")
+    multiplier = opening_by_genre['Multiplicador_Mediano'].sort_values()
+
+    def draw_multiplicador():
+        fig4, ax4 = plt.subplots(figsize=(8, 6))
+        colors = plt.cm.BrBG(np.linspace(0.2, 0.8, len(multiplier)))
+        ax4.barh(range(len(multiplier)), multiplier.values, color=colors)
+        ax4.set_yticks(range(len(multiplier)))
+        ax4.set_yticklabels(multiplier.index)
+        ax4.set_xlabel('Multiplicador (Bilheteria Total / Abertura)')
+        ax4.set_ylabel('Gênero')
+        ax4.grid(True, alpha=0.3, axis='x')
+        return fig4
+
+    def client_multiplicador():
+        return charts.bar_chart(multiplier.to_frame(), 'Genre', 'Multiplicador_Mediano',
+                                'Multiplicador (Bilheteria Total / Abertura)', 'Gênero', scheme='brownbluegreen',
+                                order=multiplier.index[::-1].tolist())
+
+    charts.show_chart('performance_abertura', 'multiplicador', filter_state, draw_multiplicador, data_version,
+                      client=client_multiplicador)
+
+# --- Tabela Detalhada ---
+st.header("📋 Estatísticas Detalhadas por Gênero")
+st.dataframe(
+    opening_by_genre.style.format({
+        'Abertura_Total_Médio_%': "{:.2f}%",
+        'Semana_Total_Médio_%': "{:.2f}%",
+        'Abertura_Semana_Médio_%': "{:.2f}%",
+        'Abertura_Total_Mediana_%': "{:.2f}%",
+        'Multiplicador_Mediano': "{:.2f}x",
+        'Quantidade_Filmes': "{:,}",
+    }),
+    use_container_width=True
+)
+
+st.info("""
+**Observações:**
+- **Gêneros front-loaded** (multiplicador baixo) concentram a bilheteria na estreia; multiplicadores altos indicam maior sustentação ao longo do tempo.
+- As proporções são calculadas uma vez, na carga dos dados; filmes sem bilheteria (ou sem vendas na semana) ficam fora das médias.
+- Medianas e distribuições vêm de histogramas pré-calculados por gênero e ano (faixas de 0,25 ponto percentual).
+""")
+
+show_timing_panel()
@@ -2,19 +2,21 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-from utils import load_data
+import aggregations as agg
+import charts
+from plotting import plt
+from talents import SCATTER_MAX_POINTS
+from timing import phase
+from utils import load_dataset_version, show_timing_panel, start_page_timing
 
 # --- Configuração da Página ---
 st.set_page_config(page_title="Performance de Talentos", layout="wide")
+start_page_timing('performance_talentos')
 
 # --- Carregamento dos Dados ---
-@st.cache_data
-def load_cached_data():
-    return load_data()
-
-df = load_cached_data()
+# As tabelas vêm do motor de agregações compartilhado (aggregations.py)
+data_version = load_dataset_version()
 
 # --- Título do Dashboard ---
 st.title("🏆 Análise de Performance: Diretores e Atores")
@@ -66,22 +68,17 @@ with col4:
 
 
 # --- Processamento dos Dados ---
-# Agrupamento e cálculo das estatísticas com base no talento selecionado
-stats = df.groupby(group_col).agg({
-    'Global_BoxOfficeUSD': 'sum',
-    'Title': 'count',
-    'IMDbRating': 'mean',
-    'ROI': 'mean'
-}).round(2)
-
-stats.columns = ['Total_Bilheteria', 'Num_Filmes', 'Rating_Médio', 'ROI_Médio']
-stats['Bilheteria_por_Filme'] = (stats['Total_Bilheteria'] / stats['Num_Filmes']).round(2)
+# Estatísticas por talento (calculadas uma vez por versão dos dados)
+with phase('aggregate'):
+    stats = agg.talent_stats(group_col)
 
-# Aplicando o filtro de número mínimo de filmes
-stats_filtered = stats[stats['Num_Filmes'] >= min_films]
+# Selecionando o Top N com base na métrica escolhida, entre os talentos com o
+# número mínimo de filmes (consulta ao ranking pré-ordenado por métrica)
+with phase('filter'):
+    top_talents = agg.top_talents(group_col, min_films, sort_metric, top_n)
 
-# Selecionando o Top N com base na métrica escolhida
-top_talents = stats_filtered.nlargest(top_n, sort_metric)
+# Estado normalizado dos filtros (chave do cache de figuras)
+filter_state = {'talent': group_col, 'min_films': min_films, 'metric': sort_metric, 'top_n': top_n}
 
 
 # --- Visualizações ---
@@ -89,6 +86,7 @@ st.header(f"📊 Gráficos de Performance para {talent_type}es")
 
 if top_talents.empty:
     st.warning(f"Nenhum {talent_type} atende aos critérios de filtro selecionados.")
+    show_timing_panel()
     st.stop()
 
 # Layout em duas colunas para os gráficos
@@ -98,43 +96,103 @@ with plot_col1:
     # Gráfico 1: Top N Talentos pela métrica selecionada
     st.subheader(f"Top {top_n} {talent_type}es por {sort_metric.replace('_', ' ')}")
     
-    fig1, ax1 = plt.subplots(figsize=(8, 8))
-    
-    # Invertendo a ordem para o maior valor ficar no topo
-    data_to_plot = top_talents[sort_metric].sort_values(ascending=True)
-    colors = plt.cm.viridis(np.linspace(0.3, 0.9, len(data_to_plot)))
-    
-    ax1.barh(data_to_plot.index, data_to_plot, color=colors)
-    ax1.set_xlabel(f"{sort_metric.replace('_', ' ')}")
-    ax1.grid(True, alpha=0.3, axis='x')
-    ax1.set_xlim(data_to_plot.min() * 0.9) # Espaço extra para melhor visualização
-    
-    st.pyplot(fig1)
+    def draw_top_talentos():
+        fig1, ax1 = plt.subplots(figsize=(8, 8))
+
+        # Invertendo a ordem para o maior valor ficar no topo
+        data_to_plot = top_talents[sort_metric].sort_values(ascending=True)
+        colors = plt.cm.viridis(np.linspace(0.3, 0.9, len(data_to_plot)))
+
+        ax1.barh(data_to_plot.index, data_to_plot, color=colors)
+        ax1.set_xlabel(f"{sort_metric.replace('_', ' ')}")
+        ax1.grid(True, alpha=0.3, axis='x')
+        ax1.set_xlim(data_to_plot.min() * 0.9) # Espaço extra para melhor visualização
+        return fig1
+
+    def client_top_talentos():
+        return charts.bar_chart(top_talents, group_col, sort_metric, sort_metric.replace('_', ' '),
+                                value_domain=(top_talents[sort_metric].min() * 0.9, top_talents[sort_metric].max()))
+
+    charts.show_chart('performance_talentos', 'top_talentos', filter_state, draw_top_talentos, data_version,
+                      client=client_top_talentos)
 
 with plot_col2:
     # Gráfico 2: Scatter plot de Produtividade vs. Performance
     st.subheader("Produtividade vs. Performance Financeira")
-    
-    fig2, ax2 = plt.subplots(figsize=(8, 8))
-    
-    scatter = ax2.scatter(
-        stats_filtered['Num_Filmes'],
-        stats_filtered['Bilheteria_por_Filme'] / 1e6, # Em milhões
-        c=stats_filtered['Rating_Médio'],
-        s=100,
-        alpha=0.7,
-        cmap='coolwarm'
-    )
-    
-    ax2.set_xlabel('Número de Filmes')
-    ax2.set_ylabel('Bilheteria Média por Filme (Milhões USD)')
-    ax2.grid(True, alpha=0.3)
-    
-    # Adicionando a colorbar
-    cbar = plt.colorbar(scatter, ax=ax2)
-    cbar.set_label('Rating IMDb Médio')
-    
-    st.pyplot(fig2)
+
+    # Com muitos talentos os pontos viram um mapa de densidade (grade pré-calculada)
+    talent_count = agg.talent_leaderboard(group_col).count(min_films)
+    dense_mode = talent_count > SCATTER_MAX_POINTS
+
+    def draw_produtividade_densidade():
+        fig2, ax2 = plt.subplots(figsize=(8, 8))
+
+        film_edges, value_edges, counts, mean_rating = agg.talent_grid(group_col).select(min_films)
+        mesh = ax2.pcolormesh(
+            film_edges,
+            value_edges,
+            np.ma.masked_where(counts.T == 0, mean_rating.T),
+            cmap='coolwarm'
+        )
+
+        ax2.set_xscale('log')
+        ax2.set_xlabel('Número de Filmes')
+        ax2.set_ylabel('Bilheteria Média por Filme (Milhões USD)')
+        ax2.grid(True, alpha=0.3)
+
+        # Adicionando a colorbar
+        cbar = plt.colorbar(mesh, ax=ax2)
+        cbar.set_label('Rating IMDb Médio (média por célula)')
+        return fig2
+
+    def draw_produtividade():
+        # Aplicando o filtro de número mínimo de filmes
+        stats_filtered = stats[stats['Num_Filmes'] >= min_films]
+
+        fig2, ax2 = plt.subplots(figsize=(8, 8))
+
+        scatter = ax2.scatter(
+            stats_filtered['Num_Filmes'],
+            stats_filtered['Bilheteria_por_Filme'] / 1e6, # Em milhões
+            c=stats_filtered['Rating_Médio'],
+            s=100,
+            alpha=0.7,
+            cmap='coolwarm'
+        )
+
+        ax2.set_xlabel('Número de Filmes')
+        ax2.set_ylabel('Bilheteria Média por Filme (Milhões USD)')
+        ax2.grid(True, alpha=0.3)
+
+        # Adicionando a colorbar
+        cbar = plt.colorbar(scatter, ax=ax2)
+        cbar.set_label('Rating IMDb Médio')
+        return fig2
+
+    def client_produtividade_densidade():
+        film_edges, value_edges, counts, mean_rating = agg.talent_grid(group_col).select(min_films)
+        return charts.density_chart(film_edges, value_edges, counts, mean_rating, 'Número de Filmes',
+                                    'Bilheteria Média por Filme (Milhões USD)',
+                                    'Rating IMDb Médio (média por célula)', log_x=True)
+
+    def client_produtividade():
+        stats_filtered = stats[stats['Num_Filmes'] >= min_films]
+        data = stats_filtered.reset_index().assign(
+            Bilheteria_por_Filme=stats_filtered['Bilheteria_por_Filme'].to_numpy() / 1e6
+        )
+        return charts.scatter_chart(data, 'Num_Filmes', 'Bilheteria_por_Filme', 'Rating_Médio',
+                                    'Número de Filmes', 'Bilheteria Média por Filme (Milhões USD)',
+                                    'Rating IMDb Médio',
+                                    tooltip=[group_col, 'Num_Filmes', 'Bilheteria_por_Filme', 'Rating_Médio'])
+
+    if dense_mode:
+        charts.show_chart('performance_talentos', 'produtividade_densidade',
+                          {'talent': group_col, 'min_films': min_films}, draw_produtividade_densidade, data_version,
+                          client=client_produtividade_densidade)
+        st.caption(f"{talent_count:,} talentos: exibindo a densidade em vez de um ponto por talento.")
+    else:
+        charts.show_chart('performance_talentos', 'produtividade', {'talent': group_col, 'min_films': min_films},
+                          draw_produtividade, data_version, client=client_produtividade)
 
 
 # --- Tabela de Dados ---
@@ -147,4 +205,6 @@ st.dataframe(
         'Rating_Médio': '{:.2f}'
     }),
     use_container_width=True
-)
\ No newline at end of file
+)
+
+show_timing_panel()
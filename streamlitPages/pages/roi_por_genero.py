@@ -1,14 +1,17 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from utils import load_data
+import aggregations as agg
+import charts
+from plotting import plt, sns
+from timing import phase
+from utils import load_dataset_version, show_timing_panel, start_page_timing
 
 # Configuração da página
 st.set_page_config(page_title="Análise de ROI - Filmes", layout="wide")
+start_page_timing('roi_por_genero')
 
-# Carregamento dos dados
-df = load_data()
+# Versão dos dados (as agregações vêm do motor compartilhado em aggregations.py)
+data_version = load_dataset_version()
 
 # # Sidebar de navegação
 # create_sidebar()
@@ -21,8 +24,7 @@ st.title("🎬 Dashboard de Análise de ROI por Gênero de Filme")
 col1, gap, col2 = st.columns([0.55, 0.15, 0.3])
 with col1:
     st.subheader("Período de Lançamento")
-    min_year = int(df['ReleaseYear'].min())
-    max_year = int(df['ReleaseYear'].max())
+    min_year, max_year = agg.year_bounds()
 
     year_range = st.slider(
         "Selecione o período (anos)",
@@ -31,6 +33,12 @@ with col1:
         value=(min_year, max_year),
         label_visibility="collapsed" # Oculta o label do slider para não repetir
     )
+    # Medianas e quartis aproximados (resumos de quantis por ano) ou calculados sobre as linhas
+    exact_quantiles = st.toggle(
+        "Mediana e quartis exatos",
+        value=False,
+        help="Calcula sobre os filmes do período em vez de combinar os resumos por ano (mais lento)."
+    )
 with gap:
     st.write("")
 ## FILTRO GENERO
@@ -49,28 +57,21 @@ with col2:
             if st.checkbox(genre, value=True):
                 selected_genres.append(genre)
 ### APLICANDO FILTROS ###
-df_filtered = df.copy()
-
-if year_range and 'ReleaseYear' in df.columns:
-    df_filtered = df_filtered[(df_filtered['ReleaseYear'] >= year_range[0]) & 
-                            (df_filtered['ReleaseYear'] <= year_range[1])]
-
-if selected_genres:
-    df_filtered = df_filtered[df_filtered['Genre'].isin(selected_genres)]
-else:
+if not selected_genres:
     st.warning("⚠️ Selecione pelo menos um gênero para visualizar os dados.")
+    show_timing_panel()
     st.stop()
 
+# Estado normalizado dos filtros (chave do cache de figuras e das agregações)
+filter_state = {'years': year_range, 'genres': sorted(selected_genres), 'exact': exact_quantiles}
 
 ### CALCULOS ###
 ## CALCULO ESTATISTICO
-roi_by_genre = df_filtered.groupby('Genre').agg({
-    'ROI': ['mean', 'median'],
-    'Title': 'count'
-}).round(2)
-
-roi_by_genre.columns = ['ROI_Médio_%', 'ROI_Mediana_%', 'Quantidade_Filmes']
-roi_by_genre = roi_by_genre.sort_values('ROI_Médio_%', ascending=False)
+with phase('aggregate'):
+    roi_by_genre = agg.roi_by_genre(year_range, filter_state['genres'], exact_quantiles)
+    overview = agg.roi_overview(year_range, filter_state['genres'])
+    # Caixas do box plot a partir dos resumos de quantis por (gênero, ano), sem as linhas
+    roi_boxes = agg.roi_box_stats(year_range, filter_state['genres'], exact_quantiles)
 
 
 # Métricas principais
@@ -78,9 +79,9 @@ st.header("📊 Visão Geral")
 col1, col2, col3, col4 = st.columns(4)
 
 with col1:
-    st.metric("Total de Filmes", len(df_filtered))
+    st.metric("Total de Filmes", overview['Total_Filmes'])
 with col2:
-    st.metric("ROI Médio Geral", f"{df_filtered['ROI'].mean():.2f}%")
+    st.metric("ROI Médio Geral", f"{overview['ROI_Médio']:.2f}%")
 with col3:
     st.metric("Gêneros Analisados", len(selected_genres))
 with col4:
@@ -94,35 +95,58 @@ col1, col2 = st.columns(2)
 
 with col1:
     st.subheader("ROI Médio por Gênero")
-    fig1, ax1 = plt.subplots(figsize=(8, 6))
-    
-    sns.barplot(data=roi_by_genre.reset_index(), 
-                x='ROI_Médio_%', 
-                y='Genre', 
-                palette='viridis',
-                ax=ax1)
-    ax1.set_xlabel('ROI Médio (%)', fontsize=12)
-    ax1.set_ylabel('Gênero', fontsize=12)
-    ax1.set_title('Retorno sobre Investimento Médio', fontsize=14, fontweight='bold')
-    ax1.grid(True, alpha=0.3)
-    
-    st.pyplot(fig1)
+
+    def draw_roi_medio():
+        fig1, ax1 = plt.subplots(figsize=(8, 6))
+
+        sns.barplot(data=roi_by_genre.reset_index(), 
+                    x='ROI_Médio_%', 
+                    y='Genre', 
+                    order=roi_by_genre.index.tolist(),
+                    palette='viridis',
+                    ax=ax1)
+        ax1.set_xlabel('ROI Médio (%)', fontsize=12)
+        ax1.set_ylabel('Gênero', fontsize=12)
+        ax1.set_title('Retorno sobre Investimento Médio', fontsize=14, fontweight='bold')
+        ax1.grid(True, alpha=0.3)
+        return fig1
+
+    def client_roi_medio():
+        return charts.bar_chart(roi_by_genre, 'Genre', 'ROI_Médio_%', 'ROI Médio (%)', 'Gênero',
+                                order=roi_by_genre.index.tolist())
+
+    charts.show_chart('roi_por_genero', 'roi_medio', filter_state, draw_roi_medio, data_version,
+                      client=client_roi_medio)
 
 with col2:
     st.subheader("Distribuição de ROI por Gênero")
-    fig2, ax2 = plt.subplots(figsize=(8, 6))
-    
-    sns.boxplot(data=df_filtered, 
-                y='Genre', 
-                x='ROI',
-                palette='Set2',
-                ax=ax2)
-    ax2.set_xlabel('ROI (%)', fontsize=12)
-    ax2.set_ylabel('Gênero', fontsize=12)
-    ax2.set_title('Distribuição de ROI', fontsize=14, fontweight='bold')
-    ax2.grid(True, alpha=0.3)
-    
-    st.pyplot(fig2)
+
+    def draw_roi_distribuicao():
+        fig2, ax2 = plt.subplots(figsize=(8, 6))
+
+        # Primeiro gênero no topo, como no boxplot do seaborn
+        boxes = roi_boxes.iloc[::-1]
+        stats = [{'label': genre, 'med': box['median'], 'q1': box['q1'], 'q3': box['q3'],
+                  'whislo': box['lower'], 'whishi': box['upper'], 'fliers': box['fliers']}
+                 for genre, box in boxes.iterrows()]
+        artists = ax2.bxp(stats, vert=False, patch_artist=True, widths=0.8,
+                          flierprops={'marker': 'd', 'markersize': 4, 'markerfacecolor': 'gray'},
+                          medianprops={'color': 'black'})
+        colors = sns.color_palette('Set2', len(stats))[::-1]
+        for patch, color in zip(artists['boxes'], colors):
+            patch.set_facecolor(color)
+        ax2.set_xlabel('ROI (%)', fontsize=12)
+        ax2.set_ylabel('Gênero', fontsize=12)
+        ax2.set_title('Distribuição de ROI', fontsize=14, fontweight='bold')
+        ax2.grid(True, alpha=0.3)
+        return fig2
+
+    def client_roi_distribuicao():
+        return charts.box_chart(roi_boxes.drop(columns='fliers'), 'Genre', 'ROI (%)', 'Gênero',
+                                order=roi_boxes.index.tolist())
+
+    charts.show_chart('roi_por_genero', 'roi_distribuicao', filter_state, draw_roi_distribuicao, data_version,
+                      client=client_roi_distribuicao)
 
 # Tabelas de dados
 st.header("📋 Estatísticas Detalhadas")
@@ -135,4 +159,6 @@ with col1:
 
 with col2:
     st.subheader("📉 Bottom 3 Gêneros - Pior ROI")
-    st.dataframe(roi_by_genre.tail(3), use_container_width=True)
\ No newline at end of file
+    st.dataframe(roi_by_genre.tail(3), use_container_width=True)
+
+show_timing_panel()
@@ -2,20 +2,20 @@
 
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 import numpy as np
-from utils import load_data
+import aggregations as agg
+import charts
+from plotting import plt
+from timing import phase
+from utils import load_dataset_version, show_timing_panel, start_page_timing
 
 # --- Configuração da Página ---
 st.set_page_config(page_title="Análise de Tendências Temporais", layout="wide")
+start_page_timing('tendencias_temporais')
 
 # --- Carregamento dos Dados ---
-# Garante que os dados sejam carregados apenas uma vez
-@st.cache_data
-def load_cached_data():
-    return load_data()
-
-df = load_cached_data()
+# A página usa apenas agregações do cubo (Genre × Ano × País), não as linhas
+data_version = load_dataset_version()
 
 # --- Título do Dashboard ---
 st.title("🎬 Dashboard de Análise de Tendências Temporais")
@@ -23,8 +23,7 @@ st.markdown("Explore como as métricas de orçamento, bilheteria e avaliação d
 
 # --- Filtros ---
 st.header("🔍 Filtros Interativos")
-min_year = int(df['ReleaseYear'].min())
-max_year = int(df['ReleaseYear'].max())
+min_year, max_year = agg.year_bounds()
 
 year_range = st.slider(
     "Selecione o período que deseja analisar:",
@@ -33,22 +32,18 @@ year_range = st.slider(
     value=(min_year, max_year) # Inicia com o período completo selecionado
 )
 
-# --- Aplicação dos Filtros ---
-df_filtered = df[(df['ReleaseYear'] >= year_range[0]) & (df['ReleaseYear'] <= year_range[1])]
+# --- Análise de Dados ---
+# Médias por ano de lançamento no período filtrado
+with phase('aggregate'):
+    df_temporal = agg.yearly_trends(year_range)
 
-if df_filtered.empty:
+if df_temporal.empty:
     st.warning("⚠️ Nenhum dado disponível para o período selecionado. Por favor, ajuste o filtro.")
+    show_timing_panel()
     st.stop()
 
-# --- Análise de Dados ---
-# Agrupando os dados pelo ano de lançamento após filtrar
-df_temporal = df_filtered.groupby('ReleaseYear').agg({
-    'BudgetUSD': 'mean',
-    'Global_BoxOfficeUSD': 'mean',
-    'US_BoxOfficeUSD': 'mean',
-    'IMDbRating': 'mean',
-    'Title': 'count'
-}).reset_index()
+# Estado normalizado dos filtros (chave do cache de figuras)
+filter_state = {'years': year_range}
 
 # --- Visualizações ---
 st.header("📊 Análise Gráfica da Indústria Cinematográfica")
@@ -59,73 +54,101 @@ col1, col2 = st.columns(2)
 with col1:
     # 1. Evolução do orçamento médio ao longo dos anos
     st.subheader("Evolução do Orçamento Médio")
-    fig1, ax1 = plt.subplots(figsize=(8, 5))
-    ax1.plot(df_temporal['ReleaseYear'], df_temporal['BudgetUSD'] / 1e6,
-             marker='o', linewidth=2, markersize=4, color='#2E86AB')
-    ax1.fill_between(df_temporal['ReleaseYear'], df_temporal['BudgetUSD'] / 1e6,
-                     alpha=0.3, color='#2E86AB')
-    ax1.set_xlabel('Ano de Lançamento')
-    ax1.set_ylabel('Orçamento Médio (Milhões USD)')
-    ax1.grid(True, alpha=0.3)
-    ax1.set_xlim(df_temporal['ReleaseYear'].min(), df_temporal['ReleaseYear'].max())
-    st.pyplot(fig1)
+
+    def draw_orcamento():
+        fig1, ax1 = plt.subplots(figsize=(8, 5))
+        ax1.plot(df_temporal['ReleaseYear'], df_temporal['BudgetUSD'] / 1e6,
+                 marker='o', linewidth=2, markersize=4, color='#2E86AB')
+        ax1.fill_between(df_temporal['ReleaseYear'], df_temporal['BudgetUSD'] / 1e6,
+                         alpha=0.3, color='#2E86AB')
+        ax1.set_xlabel('Ano de Lançamento')
+        ax1.set_ylabel('Orçamento Médio (Milhões USD)')
+        ax1.grid(True, alpha=0.3)
+        ax1.set_xlim(df_temporal['ReleaseYear'].min(), df_temporal['ReleaseYear'].max())
+        return fig1
+
+    def client_orcamento():
+        data = df_temporal.assign(BudgetUSD=df_temporal['BudgetUSD'] / 1e6)
+        return charts.line_chart(data, 'ReleaseYear', {'BudgetUSD': ('Orçamento', '#2E86AB')},
+                                 'Orçamento Médio (Milhões USD)', 'Ano de Lançamento', area=True)
+
+    charts.show_chart('tendencias_temporais', 'orcamento', filter_state, draw_orcamento, data_version,
+                      client=client_orcamento)
 
     # 3. Quantidade de filmes lançados por ano
     st.subheader("Quantidade de Filmes Lançados por Ano")
-    fig3, ax3 = plt.subplots(figsize=(8, 5))
-    colors = plt.cm.coolwarm(np.linspace(0.3, 0.8, len(df_temporal)))
-    ax3.bar(df_temporal['ReleaseYear'], df_temporal['Title'], color=colors)
-    ax3.set_xlabel('Ano de Lançamento')
-    ax3.set_ylabel('Quantidade de Filmes')
-    ax3.grid(True, alpha=0.3, axis='y')
-    st.pyplot(fig3)
+
+    def draw_quantidade():
+        fig3, ax3 = plt.subplots(figsize=(8, 5))
+        colors = plt.cm.coolwarm(np.linspace(0.3, 0.8, len(df_temporal)))
+        ax3.bar(df_temporal['ReleaseYear'], df_temporal['Title'], color=colors)
+        ax3.set_xlabel('Ano de Lançamento')
+        ax3.set_ylabel('Quantidade de Filmes')
+        ax3.grid(True, alpha=0.3, axis='y')
+        return fig3
+
+    def client_quantidade():
+        return charts.bar_chart(df_temporal, 'ReleaseYear', 'Title', 'Quantidade de Filmes', 'Ano de Lançamento',
+                                scheme='blueorange', horizontal=False,
+                                order=df_temporal['ReleaseYear'].tolist(), value_format=',')
+
+    charts.show_chart('tendencias_temporais', 'quantidade', filter_state, draw_quantidade, data_version,
+                      client=client_quantidade)
 
 with col2:
     # 2. Comparação Bilheteria Global vs US
     st.subheader("Evolução da Bilheteria: Global vs. USA")
-    fig2, ax2 = plt.subplots(figsize=(8, 5))
-    ax2.plot(df_temporal['ReleaseYear'], df_temporal['Global_BoxOfficeUSD'] / 1e6,
-             label='Global', marker='s', linewidth=2, color='#A23B72')
-    ax2.plot(df_temporal['ReleaseYear'], df_temporal['US_BoxOfficeUSD'] / 1e6,
-             label='USA', marker='^', linewidth=2, color='#F18F01')
-    ax2.set_xlabel('Ano de Lançamento')
-    ax2.set_ylabel('Bilheteria Média (Milhões USD)')
-    ax2.legend(loc='best')
-    ax2.grid(True, alpha=0.3)
-    st.pyplot(fig2)
+
+    def draw_bilheteria():
+        fig2, ax2 = plt.subplots(figsize=(8, 5))
+        ax2.plot(df_temporal['ReleaseYear'], df_temporal['Global_BoxOfficeUSD'] / 1e6,
+                 label='Global', marker='s', linewidth=2, color='#A23B72')
+        ax2.plot(df_temporal['ReleaseYear'], df_temporal['US_BoxOfficeUSD'] / 1e6,
+                 label='USA', marker='^', linewidth=2, color='#F18F01')
+        ax2.set_xlabel('Ano de Lançamento')
+        ax2.set_ylabel('Bilheteria Média (Milhões USD)')
+        ax2.legend(loc='best')
+        ax2.grid(True, alpha=0.3)
+        return fig2
+
+    def client_bilheteria():
+        data = df_temporal.assign(Global_BoxOfficeUSD=df_temporal['Global_BoxOfficeUSD'] / 1e6,
+                                  US_BoxOfficeUSD=df_temporal['US_BoxOfficeUSD'] / 1e6)
+        series = {'Global_BoxOfficeUSD': ('Global', '#A23B72'), 'US_BoxOfficeUSD': ('USA', '#F18F01')}
+        return charts.line_chart(data, 'ReleaseYear', series, 'Bilheteria Média (Milhões USD)', 'Ano de Lançamento')
+
+    charts.show_chart('tendencias_temporais', 'bilheteria', filter_state, draw_bilheteria, data_version,
+                      client=client_bilheteria)
 
     # 4. Evolução da nota média IMDb
     st.subheader("Evolução da Nota Média no IMDb")
-    fig4, ax4 = plt.subplots(figsize=(8, 5))
-    ax4.plot(df_temporal['ReleaseYear'], df_temporal['IMDbRating'],
-             marker='o', linewidth=2, markersize=6, color='#C73E1D')
-    ax4.fill_between(df_temporal['ReleaseYear'], df_temporal['IMDbRating'],
-                     df_temporal['IMDbRating'].min() * 0.95, alpha=0.3, color='#C73E1D')
-    ax4.set_xlabel('Ano de Lançamento')
-    ax4.set_ylabel('Nota Média IMDb')
-    ax4.set_ylim(5.5, max(7.5, df_temporal['IMDbRating'].max() * 1.05)) # Ajuste dinâmico do eixo Y
-    ax4.grid(True, alpha=0.3)
-    st.pyplot(fig4)
+
+    def draw_nota_imdb():
+        fig4, ax4 = plt.subplots(figsize=(8, 5))
+        ax4.plot(df_temporal['ReleaseYear'], df_temporal['IMDbRating'],
+                 marker='o', linewidth=2, markersize=6, color='#C73E1D')
+        ax4.fill_between(df_temporal['ReleaseYear'], df_temporal['IMDbRating'],
+                         df_temporal['IMDbRating'].min() * 0.95, alpha=0.3, color='#C73E1D')
+        ax4.set_xlabel('Ano de Lançamento')
+        ax4.set_ylabel('Nota Média IMDb')
+        ax4.set_ylim(5.5, max(7.5, df_temporal['IMDbRating'].max() * 1.05)) # Ajuste dinâmico do eixo Y
+        ax4.grid(True, alpha=0.3)
+        return fig4
+
+    def client_nota_imdb():
+        y_domain = (5.5, max(7.5, df_temporal['IMDbRating'].max() * 1.05))
+        return charts.line_chart(df_temporal, 'ReleaseYear', {'IMDbRating': ('Nota IMDb', '#C73E1D')},
+                                 'Nota Média IMDb', 'Ano de Lançamento', area=True, y_domain=y_domain)
+
+    charts.show_chart('tendencias_temporais', 'nota_imdb', filter_state, draw_nota_imdb, data_version,
+                      client=client_nota_imdb)
 
 # --- Análise por Década ---
 st.header("🗓️ Análise Consolidada por Década")
 
-# Adiciona a coluna 'Decade' e agrupa os dados
-df_filtered['Decade'] = (df_filtered['ReleaseYear'] // 10) * 10
-decade_analysis = df_filtered.groupby('Decade').agg({
-    'BudgetUSD': 'mean',
-    'Global_BoxOfficeUSD': 'mean',
-    'ROI': 'mean',
-    'IMDbRating': 'mean'
-})
-
-# Renomeando colunas para melhor apresentação
-decade_analysis.columns = [
-    "Orçamento Médio (USD)",
-    "Bilheteria Global Média (USD)",
-    "ROI Médio (%)",
-    "Nota Média IMDb"
-]
+# Médias por década, já com os nomes de colunas de apresentação
+with phase('aggregate'):
+    decade_analysis = agg.decade_analysis(year_range)
 
 # --- Layout de Colunas e Ordenação para a Tabela de Década ---
 col_decade1, col_decade2 = st.columns([0.7, 0.3])
@@ -178,4 +201,6 @@ st.info("""
 - **Orçamento e Bilheteria:** Os valores são apresentados em médias por ano para normalizar a análise.
 - **ROI (Retorno sobre Investimento):** O ROI médio por década oferece uma visão de longo prazo da rentabilidade.
 - **Nota IMDb:** Reflete a percepção de qualidade dos filmes pelo público ao longo do tempo.
-""")
\ No newline at end of file
+""")
+
+show_timing_panel()
@@ -0,0 +1,9 @@
+"""
+Caminhos dos arquivos do dashboard.
+
+Módulo sem dependências pesadas, para que a página inicial e a medição de
+tempos possam usá-lo sem importar pandas/pyarrow (ver summary.py).
+"""
+
+CSV_PATH = 'movies_dataset.csv'
+CACHE_DIR = '.dashboard_cache'
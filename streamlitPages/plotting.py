@@ -0,0 +1,43 @@
+"""
+Importação preguiçosa das bibliotecas de gráficos.
+
+matplotlib.pyplot e seaborn respondem por boa parte do tempo de import das
+páginas, mas só são necessários quando uma figura precisa ser desenhada (as
+demais execuções usam o cache de figuras, ver figure_cache.py). As páginas
+importam `plt` e `sns` daqui; o módulo real só é carregado no primeiro uso
+de um atributo, com o backend não interativo (Agg) configurado uma única vez
+antes do primeiro import do pyplot.
+"""
+
+import importlib
+import threading
+
+PLOT_BACKEND = 'Agg'
+
+_lock = threading.Lock()
+
+
+class LazyModule:
+    """
+    Representa um módulo que só é importado no primeiro acesso a um atributo.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            with _lock:
+                if self._module is None:
+                    import matplotlib
+                    matplotlib.use(PLOT_BACKEND)
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+plt = LazyModule('matplotlib.pyplot')
+sns = LazyModule('seaborn')
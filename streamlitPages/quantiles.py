@@ -0,0 +1,301 @@
+"""
+Resumos de quantis (sketches) por célula (ex.: Genre × ReleaseYear), para
+medianas, percentis e box plots de qualquer período sem reler as linhas.
+
+Para cada célula guardamos uma ou mais linhas (partes), com:
+
+- n:      quantidade de valores não nulos
+- q0..qS: o valor em cada um dos S + 1 quantis igualmente espaçados
+          (q0 e qS são o mínimo e o máximo; S = QUANTILE_SEGMENTS)
+- low0.., high0..: os OUTLIER_SAMPLE menores e maiores valores
+- level:  nível da parte (ver abaixo)
+
+Os quantis de um período juntam as células selecionadas: a distribuição de
+cada célula é aproximada por S faixas de mesma massa entre quantis
+consecutivos, e o resultado sai da mistura dessas faixas. O custo depende do
+número de células (gêneros × anos), não do número de filmes.
+
+Erro: em qualquer valor x, a CDF aproximada e a real de uma célula caem na
+mesma faixa, então diferem em no máximo 1/S do total da célula; a mistura
+herda o mesmo limite. Um quantil pedido tem, portanto, erro de posto (rank)
+de no máximo 1/S (1% com o padrão S = 100); em células com menos de S
+valores o limite é 1/(2n). Mínimo, máximo e outliers extremos são exatos.
+S é configurável por DASHBOARD_QUANTILE_SEGMENTS.
+
+Resumos de lotes diferentes (blocos do modo streaming, deltas do snapshot)
+são combinados por merge_quantile_summaries sem recalcular quantis: cada
+resumo vira uma parte da célula, e uma célula pode ter várias linhas. A
+mistura de partes exatas mantém o erro de 1/S, qualquer que seja o número de
+combinações. Para limitar o tamanho, QUANTILE_FANOUT partes do mesmo nível de
+uma célula são fundidas (de uma vez, para todas as células) em uma parte do
+nível seguinte; cada fusão soma no máximo 1/S ao erro das partes fundidas.
+Com P partes originais por célula, o erro fica em (1 + ⌈log_F P⌉)/S
+(F = QUANTILE_FANOUT) e cada célula guarda no máximo F − 1 partes por nível.
+
+Os outliers exibidos no box plot são uma amostra (no máximo MAX_FLIERS de
+cada lado) dos quantis e extremos guardados que ficam fora dos bigodes.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from cube import plain_index
+
+# Faixas de mesma massa por célula (erro de posto de no máximo 1/S)
+QUANTILE_SEGMENTS = int(os.environ.get('DASHBOARD_QUANTILE_SEGMENTS', 100))
+
+QUANTILE_LEVELS = np.linspace(0, 1, QUANTILE_SEGMENTS + 1)
+QUANTILE_COLUMNS = [f"q{i}" for i in range(len(QUANTILE_LEVELS))]
+
+# Menores e maiores valores guardados por célula
+OUTLIER_SAMPLE = 10
+LOW_COLUMNS = [f"low{i}" for i in range(OUTLIER_SAMPLE)]
+HIGH_COLUMNS = [f"high{i}" for i in range(OUTLIER_SAMPLE)]
+
+# Nível de cada parte: 0 se montada das linhas, L + 1 se fundida de partes do nível L
+LEVEL_COLUMN = 'level'
+
+SUMMARY_COLUMNS = ['n'] + QUANTILE_COLUMNS + LOW_COLUMNS + HIGH_COLUMNS + [LEVEL_COLUMN]
+
+# Partes de um mesmo nível que uma célula acumula antes de serem fundidas
+QUANTILE_FANOUT = 8
+
+# Outliers exibidos por caixa, de cada lado (amostra espaçada, com os extremos)
+MAX_FLIERS = 25
+
+# Comprimento dos bigodes em intervalos interquartis (como no seaborn/matplotlib)
+WHISKER_IQR = 1.5
+
+
+def build_quantile_summary(df, value, by):
+    """
+    Resumo de quantis de `value` por célula de `by` (uma ordenação das linhas).
+    """
+    values = df[value].to_numpy(dtype='float64', na_value=np.nan)
+    valid = ~np.isnan(values)
+    keys = df.loc[valid, list(by)]
+    values = values[valid]
+
+    grouped = keys.groupby(list(by), observed=True, dropna=False, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    sizes = grouped.size()
+    n = sizes.to_numpy()
+
+    # Valores ordenados por célula: cada célula vira uma fatia contígua
+    ordered = values[np.lexsort((values, codes))]
+    starts = np.concatenate([[0], np.cumsum(n)[:-1]]).astype('int64')
+
+    # Posições de Hazen: o i-ésimo valor ordenado fica no quantil (i + 0,5)/n,
+    # de modo que a faixa de massa 1/n de cada valor fica centrada nele (e
+    # partes pequenas não enviesam a mistura para as caudas)
+    positions = np.clip(QUANTILE_LEVELS[None, :] * n[:, None] - 0.5, 0, n[:, None] - 1)
+    below = np.floor(positions).astype('int64')
+    above = np.ceil(positions).astype('int64')
+    fraction = positions - below
+    grid = (ordered[starts[:, None] + below] * (1 - fraction)
+            + ordered[starts[:, None] + above] * fraction)
+
+    rank = np.arange(OUTLIER_SAMPLE)
+    present = rank[None, :] < n[:, None]
+    low_index = np.where(present, starts[:, None] + rank[None, :], 0)
+    high_index = np.where(present, starts[:, None] + n[:, None] - 1 - rank[None, :], 0)
+    lows = np.where(present, ordered[low_index], np.nan) if len(ordered) else np.full(present.shape, np.nan)
+    highs = np.where(present, ordered[high_index], np.nan) if len(ordered) else np.full(present.shape, np.nan)
+
+    summary = pd.DataFrame(np.column_stack([n, grid, lows, highs, np.zeros(len(n))]), index=sizes.index,
+                           columns=SUMMARY_COLUMNS)
+    return plain_index(summary)
+
+
+def _grouped_mixture(groups, counts, grids, levels):
+    """
+    Quantis `levels` da mistura das partes de cada grupo (`groups`: código
+    0..G-1 de cada parte; `counts` valores por parte, distribuídos
+    uniformemente entre percentis consecutivos de `grids`). Devolve uma
+    matriz G × len(levels), com NaN nos grupos sem valores.
+    """
+    groups = np.asarray(groups, dtype='int64')
+    counts = np.asarray(counts, dtype='float64')
+    grids = np.asarray(grids, dtype='float64')
+    levels = np.asarray(levels, dtype='float64')
+    result = np.full((groups.max() + 1 if len(groups) else 0, len(levels)), np.nan)
+    present = counts > 0
+    if not present.any():
+        return result
+    filled, row = np.unique(groups[present], return_inverse=True)
+    counts, grids = counts[present], grids[present]
+    order = np.argsort(row, kind='stable')
+    row, counts, grids = row[order], counts[order], grids[order]
+
+    # Uma linha por grupo com as faixas de todas as suas partes; grupos com
+    # menos partes são completados com faixas vazias no máximo do grupo
+    num_rows, segments = len(filled), grids.shape[1] - 1
+    slot = np.arange(len(row)) - np.searchsorted(row, row)
+    width = (slot.max() + 1) * segments
+    minimum = np.full(num_rows, np.inf)
+    maximum = np.full(num_rows, -np.inf)
+    np.minimum.at(minimum, row, grids[:, 0])
+    np.maximum.at(maximum, row, grids[:, -1])
+    start = np.repeat(maximum[:, None], width, axis=1)
+    end = start.copy()
+    mass = np.zeros((num_rows, width))
+    start.reshape(num_rows, -1, segments)[row, slot] = grids[:, :-1]
+    end.reshape(num_rows, -1, segments)[row, slot] = grids[:, 1:]
+    totals = np.bincount(row, weights=counts)
+    mass.reshape(num_rows, -1, segments)[row, slot] = (counts / totals[row] / segments)[:, None]
+
+    # CDF linear por partes (em fração do total do grupo): cada faixa soma
+    # massa/largura à inclinação entre seu início e seu fim; faixas de
+    # largura zero são saltos
+    span = end - start
+    flat = span <= 0
+    slope = np.where(flat, 0.0, mass / np.where(flat, 1.0, span))
+    points = np.concatenate([start, end], axis=1)
+    slope_change = np.concatenate([slope, -slope], axis=1)
+    jump = np.concatenate([np.where(flat, mass, 0.0), np.zeros_like(mass)], axis=1)
+    order = np.argsort(points, axis=1, kind='stable')
+    points = np.take_along_axis(points, order, axis=1)
+    slope_change = np.take_along_axis(slope_change, order, axis=1)
+    jump = np.take_along_axis(jump, order, axis=1)
+
+    slope_after = np.cumsum(slope_change, axis=1)
+    ramp = np.concatenate([np.zeros((num_rows, 1)), slope_after[:, :-1] * np.diff(points, axis=1)], axis=1)
+    cdf_after = np.minimum(np.cumsum(jump, axis=1) + np.cumsum(ramp, axis=1), 1.0)
+    cdf_before = cdf_after - jump
+
+    # Somando o número da linha, as CDFs de todas as linhas formam um único
+    # vetor crescente: uma só busca para todos os grupos e níveis
+    offset = np.arange(num_rows)[:, None]
+    size = points.shape[1]
+    points, slope_after, cdf_after, cdf_before = (a.ravel() for a in (points, slope_after, cdf_after, cdf_before))
+    lo, hi = offset * size, offset * size + size - 1
+    targets = np.broadcast_to(levels[None, :], (num_rows, len(levels)))
+    k = np.clip(np.searchsorted(cdf_after + np.repeat(offset.ravel(), size), targets + offset, side='left'), lo, hi)
+    previous = np.maximum(k - 1, lo)
+    on_ramp = (targets < cdf_before[k]) & (k > lo) & (slope_after[previous] > 0)
+    ramp_value = points[previous] + (targets - cdf_after[previous]) / np.where(on_ramp, slope_after[previous], 1.0)
+    values = np.where(on_ramp, np.minimum(ramp_value, points[k]), points[k])
+
+    # Extremos exatos: o quantil 0 é o menor mínimo e o 1 o maior máximo
+    values = np.where(levels[None, :] <= 0, minimum[:, None], values)
+    result[filled] = np.where(levels[None, :] >= 1, maximum[:, None], values)
+    return result
+
+
+def mixture_quantiles(counts, grids, levels):
+    """
+    Quantis `levels` da mistura das células (`counts` valores cada uma,
+    distribuídos uniformemente entre percentis consecutivos de `grids`).
+    """
+    if len(counts) == 0:
+        return np.full(len(levels), np.nan)
+    return _grouped_mixture(np.zeros(len(counts), dtype='int64'), counts, grids, levels)[0]
+
+
+def _grouped_extremes(groups, values, num_groups, largest=False):
+    """
+    Os OUTLIER_SAMPLE menores (ou maiores) valores de cada grupo, em uma
+    matriz G × OUTLIER_SAMPLE completada com NaN.
+    """
+    owner = np.repeat(groups, values.shape[1])
+    values = values.ravel()
+    order = np.lexsort((-values if largest else values, owner))
+    owner, values = owner[order], values[order]
+    rank = np.arange(len(owner)) - np.searchsorted(owner, np.arange(num_groups))[owner]
+    result = np.full((num_groups, OUTLIER_SAMPLE), np.nan)
+    keep = rank < OUTLIER_SAMPLE
+    result[owner[keep], rank[keep]] = values[keep]
+    return result
+
+
+def _collapse(parts, groups):
+    """
+    Funde as partes de cada grupo (`groups`: código 0..G-1 de cada linha de
+    `parts`) em uma parte do nível seguinte, com a chave da primeira linha do grupo.
+    """
+    num_groups = groups.max() + 1
+    first = np.unique(groups, return_index=True)[1]
+    counts = parts['n'].to_numpy(dtype='float64')
+    merged = np.column_stack([
+        np.bincount(groups, weights=counts, minlength=num_groups),
+        _grouped_mixture(groups, counts, parts[QUANTILE_COLUMNS].to_numpy(dtype='float64'), QUANTILE_LEVELS),
+        _grouped_extremes(groups, parts[LOW_COLUMNS].to_numpy(dtype='float64'), num_groups),
+        _grouped_extremes(groups, parts[HIGH_COLUMNS].to_numpy(dtype='float64'), num_groups, largest=True),
+        parts[LEVEL_COLUMN].to_numpy(dtype='float64')[first] + 1,
+    ])
+    return pd.DataFrame(merged, index=parts.index[first], columns=SUMMARY_COLUMNS)
+
+
+def compact_quantile_summary(summary):
+    """
+    Funde, célula a célula, cada QUANTILE_FANOUT partes do mesmo nível em uma
+    parte do nível seguinte, até nenhuma célula ter tantas partes em um nível.
+    """
+    while True:
+        keys = summary.index.to_frame(index=False)
+        keys[LEVEL_COLUMN] = summary[LEVEL_COLUMN].to_numpy()
+        groups = keys.groupby(list(keys.columns), dropna=False, sort=False).ngroup().to_numpy()
+        full = np.bincount(groups, minlength=1)[groups] >= QUANTILE_FANOUT
+        if not full.any():
+            return summary
+        codes = np.unique(groups[full], return_inverse=True)[1]
+        summary = pd.concat([summary[~full], _collapse(summary[full], codes)])
+
+
+def merge_quantile_summaries(left, right):
+    """
+    Junta dois resumos (ex.: snapshot e linhas novas). As linhas dos dois
+    viram partes das mesmas células, sem recalcular quantis; só as células
+    com partes demais em um nível são fundidas (ver compact_quantile_summary).
+    """
+    return compact_quantile_summary(pd.concat([left, right])).sort_index(kind='stable')
+
+
+def _spread(values, size=MAX_FLIERS):
+    if len(values) <= size:
+        return values
+    return values[np.unique(np.linspace(0, len(values) - 1, size).round().astype('int64'))]
+
+
+def summary_quantiles(cells, levels):
+    """
+    Quantis `levels` (entre 0 e 1) dos valores de um conjunto de células.
+    """
+    return mixture_quantiles(cells['n'].to_numpy(), cells[QUANTILE_COLUMNS].to_numpy(), levels)
+
+
+def box_stats(cells, quartiles=None):
+    """
+    Quartis, bigodes e amostra de outliers de um conjunto de células.
+    Devolve um dict com q1, median, q3, lower, upper e fliers.
+    Passe `quartiles` (q1, mediana, q3) para usar quartis já calculados (ex.: exatos).
+    """
+    counts = cells['n'].to_numpy()
+    if counts.sum() == 0:
+        return None
+    grids = cells[QUANTILE_COLUMNS].to_numpy()
+    if quartiles is None:
+        quartiles = mixture_quantiles(counts, grids, [0.25, 0.5, 0.75])
+    q1, median, q3 = quartiles
+    iqr = q3 - q1
+    low_limit, high_limit = q1 - WHISKER_IQR * iqr, q3 + WHISKER_IQR * iqr
+
+    # Bigodes: valores conhecidos mais distantes dentro dos limites
+    lows = cells[LOW_COLUMNS].to_numpy().ravel()
+    highs = cells[HIGH_COLUMNS].to_numpy().ravel()
+    known = np.concatenate([grids.ravel(), lows, highs])
+    known = known[~np.isnan(known)]
+    inside = known[(known >= low_limit) & (known <= high_limit)]
+    lower = inside.min() if len(inside) else q1
+    upper = inside.max() if len(inside) else q3
+
+    # Outliers: amostra espaçada (por posição) dos valores conhecidos fora dos
+    # bigodes, sempre com os extremos
+    low_fliers = _spread(np.unique(known[known < lower]))
+    high_fliers = _spread(np.unique(known[known > upper]))
+    return {
+        'q1': q1, 'median': median, 'q3': q3, 'lower': lower, 'upper': upper,
+        'fliers': np.concatenate([low_fliers, high_fliers]),
+    }
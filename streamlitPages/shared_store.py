@@ -0,0 +1,261 @@
+"""
+Dataset compartilhado entre processos em arquivos Arrow IPC mapeados em memória.
+
+Com vários servidores Streamlit na mesma máquina, cada processo guardava sua
+própria cópia das linhas e das tabelas agregadas. Com DASHBOARD_BACKEND=shared
+as linhas compactas (ver compact.py) e as tabelas aditivas de cada versão do
+dataset são gravadas uma única vez em arquivos Arrow IPC sem compressão, em
+SHARED_DIR/<versão>/. Cada processo mapeia os arquivos somente leitura
+(pa.memory_map) e monta os DataFrames sobre os buffers do arquivo, sem cópia:
+colunas numéricas, códigos das categorias e textos apontam para as páginas do
+arquivo, que o sistema operacional mantém uma vez só no page cache. A memória
+por máquina fica aproximadamente constante, independente do número de réplicas
+e de sessões.
+
+- Floats são gravados com NaN (sem bitmap de nulos), para serem lidos sem cópia.
+- Categorias com valores faltando e anos nullable (Int16) são convertidos com
+  cópia dos códigos (1 a 2 bytes por linha); índices das tabelas agregadas
+  (pequenas) também são copiados.
+- Tabelas que o Arrow não representa (tipos misturados em uma coluna ou nível
+  do índice, como as estatísticas de correlação) são gravadas em pickle e
+  copiadas em cada processo (são pequenas).
+- Os arrays são somente leitura: os DataFrames devolvidos não podem ser
+  modificados no lugar (o que já vale para os resultados do motor de agregações).
+
+O primeiro processo que precisa de um arquivo o grava, com lock entre
+processos (um por tabela) e escrita atômica; os demais esperam e mapeiam o
+mesmo arquivo. Quando o CSV muda, a nova versão ganha um diretório próprio e
+as versões além de SHARED_HISTORY são apagadas (processos que ainda mapeiam
+os arquivos antigos continuam lendo até soltá-los).
+
+Os mesmos arquivos guardam as tabelas pré-calculadas pelo warmup.py (em
+qualquer backend), listadas no manifesto MANIFEST_PATH junto com o hash do
+dataset de onde saíram (ver read_manifest e prebuilt_names).
+
+Uso: python shared_store.py   (grava as linhas da versão atual e imprime o tamanho)
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+from compact import compact_dataframe
+from snapshot import (CACHE_DIR, CSV_PATH, SNAPSHOT_FORMAT, _snapshot_lock, _source_stat, _write_json_atomic,
+                      ensure_snapshot, read_snapshot)
+
+SHARED_DIR = os.path.join(CACHE_DIR, 'shared')
+MANIFEST_PATH = os.path.join(CACHE_DIR, 'manifest.json')
+
+# Versão do formato do manifesto: incrementar quando as tabelas mudarem
+MANIFEST_FORMAT = 3
+
+# Versões mantidas em disco (a atual e as anteriores ainda em uso)
+SHARED_HISTORY = 2
+
+ROWS_NAME = 'rows'
+
+# Tabelas Arrow mapeadas por este processo: caminho -> pa.Table
+_mapped = {}
+_mapped_lock = threading.Lock()
+
+
+def shared_enabled():
+    """
+    Indica se o dashboard deve usar os arquivos compartilhados (DASHBOARD_BACKEND=shared).
+    """
+    return os.environ.get('DASHBOARD_BACKEND') == 'shared'
+
+
+def _version_dir(version):
+    # Os formatos do snapshot e das tabelas entram no nome: o mesmo CSV com
+    # outras colunas derivadas (ou outra deduplicação, ou tabelas com outras
+    # colunas) gera outros arquivos
+    return os.path.join(SHARED_DIR, f"{version[:16]}-{SNAPSHOT_FORMAT}.{MANIFEST_FORMAT}")
+
+
+def _table_path(version, name, suffix='arrow'):
+    return os.path.join(_version_dir(version), f"{name}.{suffix}")
+
+
+def _to_arrow(frame, preserve_index):
+    """
+    Converte o DataFrame para Arrow mantendo NaN nos floats (sem bitmap de
+    nulos), para que a leitura de volta seja sem cópia.
+    """
+    table = pa.Table.from_pandas(frame, preserve_index=preserve_index)
+    for name in frame.columns:
+        values = frame[name]
+        if values.dtype.kind == 'f':
+            index = table.schema.get_field_index(name)
+            table = table.set_column(index, table.schema.field(index),
+                                     pa.array(values.to_numpy(), from_pandas=False))
+    return table
+
+
+def _write_atomic(table, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink, ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def _write_pickle_atomic(frame, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    frame.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _map(path):
+    """
+    Tabela Arrow do arquivo, mapeada somente leitura (uma vez por processo).
+    """
+    with _mapped_lock:
+        table = _mapped.get(path)
+        if table is None:
+            table = ipc.open_file(pa.memory_map(path, 'r')).read_all()
+            # Solta as versões anteriores (DataFrames ainda em uso mantêm seus buffers)
+            version_dir = os.path.dirname(path)
+            for old in [p for p in _mapped if os.path.dirname(p) != version_dir]:
+                del _mapped[old]
+            _mapped[path] = table
+        return table
+
+
+# Colunas de texto das linhas continuam no buffer Arrow (string[pyarrow], como em compact.py)
+_STRING_TYPES = {pa.string(): pd.StringDtype('pyarrow'), pa.large_string(): pd.StringDtype('pyarrow')}
+
+
+def _to_pandas(table, strings=False):
+    # split_blocks evita consolidar as colunas em blocos (o que copiaria tudo)
+    return table.to_pandas(split_blocks=True, types_mapper=_STRING_TYPES.get if strings else None)
+
+
+def _prune(keep_version):
+    """
+    Apaga os diretórios de versões antigas além de SHARED_HISTORY.
+    """
+    keep = os.path.basename(_version_dir(keep_version))
+    entries = [e for e in os.scandir(SHARED_DIR) if e.is_dir() and e.name != keep]
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    for entry in entries[SHARED_HISTORY - 1:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def write_table(version, name, frame, preserve_index=True):
+    """
+    Grava `frame` como a tabela `name` da versão `version`.
+    """
+    try:
+        table = _to_arrow(frame, preserve_index)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Tipos misturados em uma coluna ou nível do índice (ex.: o rótulo
+        # 'Todos' junto com anos): pickle, lido com cópia
+        _write_pickle_atomic(frame, _table_path(version, name, 'pkl'))
+    else:
+        _write_atomic(table, _table_path(version, name))
+    _prune(version)
+
+
+def read_table(version, name, strings=False):
+    """
+    Tabela `name` da versão `version` (mapeada, sem cópia), ou None se ainda não foi gravada.
+    """
+    path = _table_path(version, name)
+    if os.path.exists(path):
+        return _to_pandas(_map(path), strings)
+    path = _table_path(version, name, 'pkl')
+    if os.path.exists(path):
+        return pd.read_pickle(path)
+    return None
+
+
+def shared_table(version, name, build, preserve_index=True):
+    """
+    Tabela `name` da versão `version` como DataFrame sobre o arquivo mapeado.
+    Se o arquivo ainda não existe, `build()` monta o DataFrame e ele é gravado
+    (apenas um processo por vez; os outros esperam e reutilizam o arquivo).
+    """
+    frame = read_table(version, name, strings=not preserve_index)
+    if frame is not None:
+        return frame
+    with _snapshot_lock(lock_path=_table_path(version, name, 'lock')):
+        frame = read_table(version, name, strings=not preserve_index)
+        if frame is None:
+            write_table(version, name, build(), preserve_index)
+            frame = read_table(version, name, strings=not preserve_index)
+    return frame
+
+
+def _build_rows():
+    return compact_dataframe(read_snapshot())
+
+
+def read_frame(version, columns=None):
+    """
+    Linhas compactas da versão `version` (na ordem do snapshot), apenas com
+    as colunas pedidas, sem cópia dos dados do arquivo mapeado.
+    """
+    path = _table_path(version, ROWS_NAME)
+    if not os.path.exists(path):
+        shared_table(version, ROWS_NAME, _build_rows, preserve_index=False)
+    table = _map(path)
+    if columns is not None:
+        table = table.select(list(columns))
+    return _to_pandas(table, strings=True)
+
+
+def write_manifest(version, stat, names, **details):
+    """
+    Grava o manifesto das tabelas pré-calculadas da versão `version`
+    (`stat`: tamanho e mtime do CSV lidos antes do cálculo).
+    """
+    _write_json_atomic(MANIFEST_PATH, {
+        'format': MANIFEST_FORMAT, 'sha256': version, 'source': stat,
+        'artifacts': sorted(names), 'built_at': time.time(), **details,
+    })
+
+
+def _read_manifest_file():
+    try:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return manifest if manifest.get('format') == MANIFEST_FORMAT else None
+
+
+def read_manifest(csv_path=CSV_PATH):
+    """
+    Manifesto, se ainda corresponde ao CSV atual (mesmo tamanho e mtime: um
+    stat, sem ler o arquivo); senão None.
+    """
+    manifest = _read_manifest_file()
+    if manifest is None or manifest['source'] != _source_stat(csv_path):
+        return None
+    return manifest
+
+
+def prebuilt_names(version):
+    """
+    Nomes das tabelas pré-calculadas para a versão `version` (vazio se o
+    manifesto é de outra versão).
+    """
+    manifest = _read_manifest_file()
+    if manifest is None or manifest['sha256'] != version:
+        return set()
+    return set(manifest['artifacts'])
+
+
+if __name__ == '__main__':
+    meta = ensure_snapshot(CSV_PATH)
+    frame = read_frame(meta['sha256'])
+    path = _table_path(meta['sha256'], ROWS_NAME)
+    print(f"{path}: {len(frame)} linhas, {os.path.getsize(path) / 1e6:.1f} MB")
@@ -0,0 +1,492 @@
+"""
+Snapshot colunar (Parquet) do dataset de filmes.
+
+O CSV é lido uma única vez, com schema explícito, e as colunas derivadas
+(ROI, ReleaseYear, a participação internacional e as proporções de abertura)
+já são gravadas no arquivo. Nas próximas execuções o
+servidor lê apenas o Parquet, e apenas as colunas que a página pede.
+O snapshot é reconstruído quando o tamanho, o mtime ou o hash do CSV mudam.
+
+As linhas são gravadas ordenadas por ReleaseYear (anos faltando no fim), de
+modo que filtros de período viram fatias contíguas (ver year_slice).
+
+Quando o CSV apenas recebeu linhas novas no fim (ingestão diária), somente
+essas linhas são lidas: elas são intercaladas no snapshot e também gravadas
+em um arquivo de delta, que os processos já em execução usam para atualizar
+suas agregações sem recalcular tudo (ver aggregations.current_state).
+
+Linhas repetidas (mesmos valores em todas as colunas do CSV) são descartadas
+na ingestão, inclusive quando o lote acrescentado repete linhas já gravadas:
+cada linha tem uma impressão de 64 bits, guardada na coluna RowFingerprint,
+e as novas são procuradas no índice ordenado FINGERPRINT_PATH (ver
+fingerprints.py). O total descartado fica em meta['duplicates'].
+"""
+
+import hashlib
+import io
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.parquet as pq
+
+from fingerprints import (EMPTY_INDEX, FINGERPRINT_COLUMN, build_index, first_seen, merge_index, read_index,
+                          row_fingerprints, write_index)
+from paths import CACHE_DIR, CSV_PATH
+SNAPSHOT_PATH = os.path.join(CACHE_DIR, 'movies.parquet')
+META_PATH = os.path.join(CACHE_DIR, 'movies.meta.json')
+LOCK_PATH = os.path.join(CACHE_DIR, 'movies.lock')
+DELTA_DIR = os.path.join(CACHE_DIR, 'deltas')
+FINGERPRINT_PATH = os.path.join(CACHE_DIR, 'movies.fingerprints.npy')
+
+# Quantos deltas recentes manter (processos atrasados além disso recarregam tudo)
+DELTA_HISTORY = 8
+
+# Tempo após o qual um lock abandonado (processo morto) é descartado
+LOCK_STALE_SECONDS = 600
+
+# Versão do formato do snapshot: incrementar quando a derivação mudar
+SNAPSHOT_FORMAT = 5
+
+# Schema explícito das colunas conhecidas do CSV (colunas extras são inferidas)
+CSV_SCHEMA = pa.schema([
+    ('Title', pa.string()),
+    ('Genre', pa.string()),
+    ('Country', pa.string()),
+    ('Director', pa.string()),
+    ('LeadActor', pa.string()),
+    ('ReleaseYear', pa.int64()),
+    ('BudgetUSD', pa.float64()),
+    ('US_BoxOfficeUSD', pa.float64()),
+    ('Global_BoxOfficeUSD', pa.float64()),
+    ('Opening_Day_SalesUSD', pa.float64()),
+    ('One_Week_SalesUSD', pa.float64()),
+    ('IMDbRating', pa.float64()),
+    ('RottenTomatoesScore', pa.float64()),
+    ('NumVotesIMDb', pa.int64()),
+    ('NumVotesRT', pa.int64()),
+])
+
+# Tipos usados na leitura: as colunas inteiras são lidas como float64 (o pandas
+# grava inteiros como '2021.0' quando a coluna tem nulos) e convertidas por
+# cast_csv_integers
+CSV_READ_TYPES = {field.name: pa.float64() if pa.types.is_integer(field.type) else field.type
+                  for field in CSV_SCHEMA}
+
+# Colunas calculadas e materializadas no snapshot
+DERIVED_SCHEMA = pa.schema([
+    ('ROI', pa.float64()),
+    ('International_BoxOffice', pa.float64()),
+    ('International_Percentage', pa.float64()),
+    ('Opening_to_Total_Ratio', pa.float64()),
+    ('Week_to_Total_Ratio', pa.float64()),
+    ('Opening_to_Week_Ratio', pa.float64()),
+])
+
+# Proporções de abertura (em %): coluna -> (numerador, denominador)
+OPENING_RATIOS = {
+    'Opening_to_Total_Ratio': ('Opening_Day_SalesUSD', 'Global_BoxOfficeUSD'),
+    'Week_to_Total_Ratio': ('One_Week_SalesUSD', 'Global_BoxOfficeUSD'),
+    'Opening_to_Week_Ratio': ('Opening_Day_SalesUSD', 'One_Week_SalesUSD'),
+}
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    Calcula o SHA-256 do arquivo lendo em blocos (não carrega o arquivo inteiro).
+    """
+    return file_hashes(path, chunk_size=chunk_size)[1]
+
+
+def file_hashes(path, prefix_size=None, chunk_size=1 << 20):
+    """
+    Calcula, em uma única leitura, o SHA-256 dos primeiros `prefix_size` bytes
+    e o SHA-256 do arquivo inteiro. Devolve (hash_do_prefixo, hash_total).
+    """
+    digest = hashlib.sha256()
+    prefix_digest = None
+    read = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            if prefix_size is not None and prefix_digest is None and read + len(chunk) >= prefix_size:
+                cut = prefix_size - read
+                digest.update(chunk[:cut])
+                prefix_digest = digest.hexdigest()
+                digest.update(chunk[cut:])
+            else:
+                digest.update(chunk)
+            read += len(chunk)
+    return prefix_digest, digest.hexdigest()
+
+
+def add_derived_columns(df):
+    """
+    Adiciona as colunas derivadas (ROI, ReleaseYear, International_BoxOffice,
+    International_Percentage e as proporções de OPENING_RATIOS) a um DataFrame do CSV.
+    Com apenas parte das colunas (leitura em blocos), só deriva o que for possível.
+    """
+    # Cálculo do ROI
+    if 'ROI' not in df.columns and {'Global_BoxOfficeUSD', 'BudgetUSD'} <= set(df.columns):
+        df['ROI'] = ((df['Global_BoxOfficeUSD'] - df['BudgetUSD']) / df['BudgetUSD']) * 100
+
+    # Bilheteria fora dos EUA e sua participação na bilheteria global
+    if 'International_BoxOffice' not in df.columns and {'Global_BoxOfficeUSD', 'US_BoxOfficeUSD'} <= set(df.columns):
+        df['International_BoxOffice'] = df['Global_BoxOfficeUSD'] - df['US_BoxOfficeUSD']
+        # Evitar divisão por zero se bilheteria global for 0
+        df['International_Percentage'] = (df['International_BoxOffice'] / df['Global_BoxOfficeUSD'] * 100).fillna(0)
+
+    # Proporções de abertura: denominador zero, negativo ou ausente vira nulo
+    # (e fica fora das médias), em vez de infinito
+    for ratio, (numerator, denominator) in OPENING_RATIOS.items():
+        if ratio not in df.columns and {numerator, denominator} <= set(df.columns):
+            df[ratio] = df[numerator] / df[denominator].where(df[denominator] > 0) * 100
+
+    # Garantir que ReleaseYear existe
+    if 'ReleaseYear' not in df.columns:
+        if 'ReleaseDate' in df.columns:
+            df['ReleaseYear'] = pd.to_datetime(df['ReleaseDate'], errors='coerce').dt.year
+        elif 'Year' in df.columns:
+            df['ReleaseYear'] = df['Year']
+
+    return df
+
+
+def cast_csv_integers(table):
+    """
+    Converte as colunas inteiras de CSV_SCHEMA (lidas como float64, ver
+    CSV_READ_TYPES) para inteiros. Aceita uma tabela ou um bloco do pyarrow.
+    """
+    if isinstance(table, pa.RecordBatch):
+        table = pa.Table.from_batches([table])
+    for field in CSV_SCHEMA:
+        if not pa.types.is_integer(field.type) or field.name not in table.column_names:
+            continue
+        i = table.column_names.index(field.name)
+        try:
+            column = table.column(i).cast(field.type)
+        except pa.ArrowInvalid:
+            raise ValueError(f"A coluna '{field.name}' do CSV deve conter apenas números inteiros") from None
+        table = table.set_column(i, field.name, column)
+    return table
+
+
+def read_csv(csv_path=CSV_PATH):
+    """
+    Lê o CSV com o leitor multi-thread do pyarrow usando o schema explícito.
+    Colunas do schema ausentes no arquivo são ignoradas pelo pyarrow.
+    """
+    table = pv.read_csv(csv_path, convert_options=pv.ConvertOptions(column_types=CSV_READ_TYPES))
+    return cast_csv_integers(table).to_pandas()
+
+
+def read_appended_rows(csv_path, offset):
+    """
+    Lê apenas as linhas do CSV a partir do byte `offset` (linhas acrescentadas),
+    reaproveitando o cabeçalho do arquivo.
+    """
+    with open(csv_path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        tail = f.read()
+    return read_csv(io.BytesIO(header + tail))
+
+
+def _source_stat(csv_path):
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _read_meta():
+    try:
+        with open(META_PATH, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _write_json_atomic(path, payload):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _snapshot_lock(timeout=LOCK_STALE_SECONDS, lock_path=LOCK_PATH):
+    """
+    Lock entre processos (arquivo criado com O_EXCL) para que apenas um
+    servidor reconstrua ou estenda o snapshot por vez. Outros arquivos
+    compartilhados usam o mesmo mecanismo com o próprio `lock_path`.
+    """
+    os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > LOCK_STALE_SECONDS:
+                    os.remove(lock_path)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Lock ocupado: {lock_path}")
+            time.sleep(0.1)
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def _to_table(df, schema=None):
+    """
+    Converte o DataFrame para Arrow com os tipos das colunas derivadas fixados
+    (ou com o schema do snapshot existente, quando informado).
+    """
+    if schema is not None:
+        return pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for field in DERIVED_SCHEMA:
+        index = table.schema.get_field_index(field.name)
+        table = table.set_column(index, field, table.column(index).cast(field.type))
+    return table
+
+
+def _drop_duplicates(df, index=EMPTY_INDEX):
+    """
+    Descarta as linhas repetidas no lote ou já presentes no `index` e grava a
+    impressão das restantes em FINGERPRINT_COLUMN. Devolve (linhas, descartadas).
+    """
+    fingerprints = row_fingerprints(df)
+    keep = first_seen(fingerprints, index)
+    df = df[keep].reset_index(drop=True) if not keep.all() else df
+    df[FINGERPRINT_COLUMN] = fingerprints[keep]
+    return df, int((~keep).sum())
+
+
+def _fingerprint_index(meta, table):
+    """
+    Índice das impressões do snapshot: o arquivo gravado, ou refeito a partir
+    da coluna de impressões se o arquivo faltar ou for de outra versão.
+    """
+    index = read_index(FINGERPRINT_PATH, meta['num_rows'])
+    if index is None:
+        index = build_index(table.column(FINGERPRINT_COLUMN).to_numpy())
+    return index
+
+
+def _write_table_atomic(table, path):
+    tmp_path = f"{path}.tmp"
+    pq.write_table(table, tmp_path, compression='zstd')
+    os.replace(tmp_path, path)
+
+
+def build_snapshot(csv_path=CSV_PATH, source_hash=None):
+    """
+    Lê o CSV, materializa as colunas derivadas e grava o snapshot Parquet.
+    A escrita é atômica: leitores nunca veem um arquivo pela metade.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    stat = _source_stat(csv_path)
+    if source_hash is None:
+        source_hash = file_hash(csv_path)
+
+    df, duplicates = _drop_duplicates(read_csv(csv_path))
+    df = add_derived_columns(df)
+    df = df.sort_values('ReleaseYear', kind='stable', na_position='last', ignore_index=True)
+    table = _to_table(df)
+    _write_table_atomic(table, SNAPSHOT_PATH)
+    write_index(FINGERPRINT_PATH, build_index(df[FINGERPRINT_COLUMN].to_numpy()))
+
+    meta = {'format': SNAPSHOT_FORMAT, 'source': os.path.abspath(csv_path),
+            'sha256': source_hash, 'num_rows': table.num_rows, 'duplicates': duplicates, 'deltas': [], **stat}
+    _write_json_atomic(META_PATH, meta)
+    return meta
+
+
+def append_snapshot(csv_path, meta, source_hash):
+    """
+    Incorpora ao snapshot apenas as linhas acrescentadas ao CSV desde `meta`.
+
+    As linhas novas são lidas a partir do byte onde o arquivo terminava,
+    recebem as colunas derivadas e são gravadas como um delta (sem as que
+    repetem linhas já gravadas). O snapshot é regravado com as linhas
+    intercaladas por ano (ordenação estável), sem reler o CSV inteiro.
+    """
+    stat = _source_stat(csv_path)
+    table = pq.read_table(SNAPSHOT_PATH)
+    index = _fingerprint_index(meta, table)
+    delta, duplicates = _drop_duplicates(read_appended_rows(csv_path, meta['size']), index)
+    delta = add_derived_columns(delta)
+    delta_table = _to_table(delta, schema=table.schema)
+
+    os.makedirs(DELTA_DIR, exist_ok=True)
+    delta_path = os.path.join(DELTA_DIR, f"{meta['sha256'][:16]}_{source_hash[:16]}.parquet")
+    _write_table_atomic(delta_table, delta_path)
+
+    combined = pa.concat_tables([table, delta_table])
+    # sort_indices do Arrow é estável: a ordem relativa dentro de cada ano é mantida
+    order = pc.sort_indices(combined, sort_keys=[('ReleaseYear', 'ascending')], null_placement='at_end')
+    _write_table_atomic(combined.take(order), SNAPSHOT_PATH)
+    write_index(FINGERPRINT_PATH, merge_index(index, delta[FINGERPRINT_COLUMN].to_numpy()))
+
+    deltas = meta.get('deltas', []) + [{'from': meta['sha256'], 'to': source_hash,
+                                        'path': delta_path, 'num_rows': delta_table.num_rows}]
+    for old in deltas[:-DELTA_HISTORY]:
+        try:
+            os.remove(old['path'])
+        except FileNotFoundError:
+            pass
+
+    new_meta = {**meta, 'sha256': source_hash, 'num_rows': combined.num_rows,
+                'duplicates': meta.get('duplicates', 0) + duplicates, 'deltas': deltas[-DELTA_HISTORY:], **stat}
+    _write_json_atomic(META_PATH, new_meta)
+    return new_meta
+
+
+def _is_fresh(meta, stat):
+    return (meta is not None and meta.get('format') == SNAPSHOT_FORMAT and os.path.exists(SNAPSHOT_PATH)
+            and meta['size'] == stat['size'] and meta['mtime_ns'] == stat['mtime_ns'])
+
+
+def _ends_with_newline(csv_path, size):
+    with open(csv_path, 'rb') as f:
+        f.seek(size - 1)
+        return f.read(1) == b'\n'
+
+
+def source_change(csv_path, meta):
+    """
+    Compara o CSV atual com os metadados (`size`, `sha256`) de algo derivado dele.
+    Devolve (mudança, hash_atual), onde mudança é 'same' (conteúdo igual),
+    'appended' (o arquivo antigo é prefixo do novo, terminado em quebra de
+    linha) ou 'rewritten' (qualquer outra mudança).
+    """
+    grew = os.path.getsize(csv_path) > meta['size']
+    prefix_hash, source_hash = file_hashes(csv_path, meta['size'] if grew else None)
+    if source_hash == meta['sha256']:
+        return 'same', source_hash
+    if grew and prefix_hash == meta['sha256'] and _ends_with_newline(csv_path, meta['size']):
+        return 'appended', source_hash
+    return 'rewritten', source_hash
+
+
+def ensure_snapshot(csv_path=CSV_PATH):
+    """
+    Garante que o snapshot está atualizado em relação ao CSV e devolve seus metadados.
+
+    Tamanho e mtime iguais: o snapshot é reutilizado sem ler o CSV.
+    Se algum dos dois mudou, o hash decide: conteúdo igual apenas atualiza os
+    metadados; arquivo antigo como prefixo do novo (linhas acrescentadas no fim)
+    estende o snapshot com append_snapshot; qualquer outra mudança reconstrói
+    o snapshot.
+    """
+    stat = _source_stat(csv_path)
+    meta = _read_meta()
+    if _is_fresh(meta, stat):
+        return meta
+
+    with _snapshot_lock():
+        # Outro processo pode ter atualizado o snapshot enquanto esperávamos
+        stat = _source_stat(csv_path)
+        meta = _read_meta()
+        if _is_fresh(meta, stat):
+            return meta
+
+        if meta is None or meta.get('format') != SNAPSHOT_FORMAT or not os.path.exists(SNAPSHOT_PATH):
+            return build_snapshot(csv_path)
+
+        change, source_hash = source_change(csv_path, meta)
+
+        if change == 'same':
+            meta.update(stat)
+            _write_json_atomic(META_PATH, meta)
+            return meta
+
+        if change == 'appended':
+            return append_snapshot(csv_path, meta, source_hash)
+
+        return build_snapshot(csv_path, source_hash)
+
+
+def delta_chain(from_version, to_version):
+    """
+    Arquivos de delta que levam da versão `from_version` à `to_version`,
+    em ordem. Devolve None se a cadeia não existir (ex.: o CSV foi reescrito).
+    """
+    meta = _read_meta()
+    if meta is None or meta['sha256'] != to_version:
+        return None
+    steps = {d['from']: d for d in meta.get('deltas', [])}
+    paths = []
+    version = from_version
+    while version != to_version:
+        step = steps.get(version)
+        if step is None or not os.path.exists(step['path']):
+            return None
+        paths.append(step['path'])
+        version = step['to']
+    return paths
+
+
+def _data_columns(path, columns):
+    # Sem colunas pedidas: todas, menos a de impressões (uso interno da ingestão)
+    if columns is not None:
+        return columns
+    return [name for name in pq.read_schema(path).names if name != FINGERPRINT_COLUMN]
+
+
+def read_deltas(paths, columns=None):
+    """
+    Lê e concatena as linhas dos deltas, na ordem em que foram acrescentadas.
+    """
+    return pa.concat_tables([pq.read_table(path, columns=_data_columns(path, columns))
+                             for path in paths]).to_pandas()
+
+
+def read_snapshot(columns=None):
+    """
+    Lê o snapshot como DataFrame, apenas com as colunas pedidas (None = todas
+    as colunas de dados).
+    """
+    return pq.read_table(SNAPSHOT_PATH, columns=_data_columns(SNAPSHOT_PATH, columns)).to_pandas()
+
+
+def build_year_index(df):
+    """
+    Monta o índice ano -> posição da primeira linha daquele ano.
+    Supõe o DataFrame ordenado por ReleaseYear, como gravado no snapshot.
+    """
+    years = df['ReleaseYear'].dropna().to_numpy(dtype='int64')
+    unique_years, starts = np.unique(years, return_index=True)
+    index = pd.Series(starts, index=unique_years, name='offset')
+    index.attrs['stop'] = len(years)
+    return index
+
+
+def year_slice(df, year_range, year_index=None):
+    """
+    Filtra o período [ano_inicial, ano_final] como uma fatia contígua das linhas.
+    A busca é feita com searchsorted no índice de anos e `iloc` devolve uma
+    view, sem máscara booleana nem cópia do DataFrame.
+    """
+    if year_index is None:
+        year_index = build_year_index(df)
+    years = year_index.index.to_numpy()
+    offsets = np.append(year_index.to_numpy(), year_index.attrs['stop'])
+    start = offsets[np.searchsorted(years, year_range[0], side='left')]
+    stop = offsets[np.searchsorted(years, year_range[1], side='right')]
+    return df.iloc[start:stop]
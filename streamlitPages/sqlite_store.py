@@ -0,0 +1,257 @@
+"""
+Armazenamento SQLite em disco, com índices, e camada de consultas.
+
+Alternativa ao pandasql (que copia o DataFrame inteiro para um SQLite em
+memória a cada consulta): o CSV é carregado uma vez em um arquivo SQLite
+(tabela `movies`, já com as colunas derivadas do snapshot) com índices nas
+colunas usadas nos filtros. Páginas e notebooks consultam só as linhas ou agregados de que
+precisam, com os filtros aplicados pelo próprio SQLite.
+
+O banco é reconstruído quando o CSV muda; linhas acrescentadas no fim do CSV
+são apenas inseridas. Linhas repetidas (no CSV ou em relação ao que já está
+no banco) não são inseridas: as impressões das linhas gravadas ficam no
+índice FINGERPRINT_PATH (ver fingerprints.py). Para que o dashboard use
+este backend, defina DASHBOARD_BACKEND=sqlite.
+
+Uso nos notebooks:
+    import sys; sys.path.append('streamlitPages')
+    import sqlite_store as store
+    store.sql('SELECT BudgetUSD FROM movies WHERE BudgetUSD > ?', (3265789.51,))
+    store.query_rows(['Title', 'ROI'], genres=['Drama'], year_range=(2000, 2010))
+    store.query_groups('Genre', {'ROI_Médio': ('AVG', 'ROI')}, countries=['Brazil'])
+"""
+
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from fingerprints import EMPTY_INDEX, first_seen, merge_index, read_index, row_fingerprints, write_index
+from snapshot import (CACHE_DIR, CSV_PATH, DERIVED_SCHEMA, _snapshot_lock, _source_stat, add_derived_columns,
+                      file_hash, read_appended_rows, source_change)
+from streaming import iter_chunks
+
+DB_PATH = os.path.join(CACHE_DIR, 'movies.sqlite')
+FINGERPRINT_PATH = os.path.join(CACHE_DIR, 'movies.sqlite.fingerprints.npy')
+TABLE = 'movies'
+
+# Versão do formato do banco: incrementar quando a tabela ou os índices mudarem
+STORE_FORMAT = 4
+
+INDEXED_COLUMNS = ['ReleaseYear', 'Genre', 'Country', 'Director', 'LeadActor']
+
+# Filtros aceitos pela camada de consultas: argumento -> coluna
+FILTER_COLUMNS = {
+    'genres': 'Genre',
+    'countries': 'Country',
+    'directors': 'Director',
+    'actors': 'LeadActor',
+}
+
+AGGREGATE_FUNCTIONS = {'COUNT', 'SUM', 'AVG', 'MIN', 'MAX'}
+
+
+def sqlite_enabled():
+    """
+    Indica se o dashboard deve ler os dados deste banco (DASHBOARD_BACKEND=sqlite).
+    """
+    return os.environ.get('DASHBOARD_BACKEND') == 'sqlite'
+
+
+def connect(path=DB_PATH, read_only=True):
+    """
+    Abre uma conexão com o banco (somente leitura por padrão).
+    """
+    if read_only:
+        return sqlite3.connect(f"file:{os.path.abspath(path)}?mode=ro", uri=True)
+    return sqlite3.connect(path)
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _insert(conn, df, index):
+    """
+    Insere as linhas de `df` que não repetem linhas do lote nem do `index`.
+    Devolve (índice atualizado, linhas inseridas, linhas descartadas).
+    """
+    fingerprints = row_fingerprints(df, exclude=DERIVED_SCHEMA.names)
+    keep = first_seen(fingerprints, index)
+    df[keep].to_sql(TABLE, conn, if_exists='append', index=False)
+    return merge_index(index, fingerprints[keep]), int(keep.sum()), int((~keep).sum())
+
+
+def _write_meta(conn, meta):
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [(k, str(v)) for k, v in meta.items()])
+
+
+def read_store_meta(path=DB_PATH):
+    """
+    Metadados gravados no banco (hash e estatísticas do CSV de origem), ou None.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with closing(connect(path)) as conn:
+            rows = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+    except sqlite3.Error:
+        return None
+    return {
+        'format': int(rows['format']), 'source': rows['source'], 'sha256': rows['sha256'],
+        'num_rows': int(rows['num_rows']), 'duplicates': int(rows.get('duplicates', 0)),
+        'size': int(rows['size']), 'mtime_ns': int(rows['mtime_ns'])
+    }
+
+
+def build_store(csv_path=CSV_PATH, source_hash=None):
+    """
+    Carrega o CSV no banco, em blocos, e cria os índices.
+    O banco é montado em um arquivo temporário e trocado de forma atômica.
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    stat = _source_stat(csv_path)
+    if source_hash is None:
+        source_hash = file_hash(csv_path)
+
+    tmp_path = f"{DB_PATH}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    index, num_rows, duplicates = EMPTY_INDEX, 0, 0
+    with closing(connect(tmp_path, read_only=False)) as conn:
+        for chunk in iter_chunks(csv_path):
+            index, inserted, dropped = _insert(conn, chunk, index)
+            num_rows += inserted
+            duplicates += dropped
+        for col in INDEXED_COLUMNS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {_quote('idx_' + col)} ON {TABLE} ({_quote(col)})")
+        meta = {'format': STORE_FORMAT, 'source': os.path.abspath(csv_path),
+                'sha256': source_hash, 'num_rows': num_rows, 'duplicates': duplicates, **stat}
+        _write_meta(conn, meta)
+        conn.commit()
+    write_index(FINGERPRINT_PATH, index)
+    os.replace(tmp_path, DB_PATH)
+    return meta
+
+
+def append_store(csv_path, meta, source_hash):
+    """
+    Insere no banco apenas as linhas acrescentadas ao CSV desde `meta`
+    (sem as que repetem linhas já gravadas). Sem o índice de impressões do
+    banco atual, o banco é reconstruído.
+    """
+    index = read_index(FINGERPRINT_PATH, meta['num_rows'])
+    if index is None:
+        return build_store(csv_path, source_hash)
+    delta = add_derived_columns(read_appended_rows(csv_path, meta['size']))
+    with closing(connect(read_only=False)) as conn:
+        index, inserted, dropped = _insert(conn, delta, index)
+        new_meta = {**meta, 'sha256': source_hash, 'num_rows': meta['num_rows'] + inserted,
+                    'duplicates': meta['duplicates'] + dropped, **_source_stat(csv_path)}
+        _write_meta(conn, new_meta)
+        conn.commit()
+    write_index(FINGERPRINT_PATH, index)
+    return new_meta
+
+
+def ensure_store(csv_path=CSV_PATH):
+    """
+    Garante que o banco está atualizado em relação ao CSV e devolve seus
+    metadados (mesmas regras de atualização do snapshot, ver ensure_snapshot).
+    """
+    def is_fresh(meta, stat):
+        return (meta is not None and meta['format'] == STORE_FORMAT
+                and meta['size'] == stat['size'] and meta['mtime_ns'] == stat['mtime_ns'])
+
+    meta = read_store_meta()
+    if not is_fresh(meta, _source_stat(csv_path)):
+        with _snapshot_lock():
+            stat = _source_stat(csv_path)
+            meta = read_store_meta()
+            if is_fresh(meta, stat):
+                pass
+            elif meta is None or meta['format'] != STORE_FORMAT:
+                meta = build_store(csv_path)
+            else:
+                change, source_hash = source_change(csv_path, meta)
+                if change == 'same':
+                    meta = {**meta, **stat}
+                    with closing(connect(read_only=False)) as conn:
+                        _write_meta(conn, meta)
+                        conn.commit()
+                elif change == 'appended':
+                    meta = append_store(csv_path, meta, source_hash)
+                else:
+                    meta = build_store(csv_path, source_hash)
+    return {**meta, 'backend': 'sqlite'}
+
+
+def _where(year_range=None, **filters):
+    """
+    Cláusula WHERE (com parâmetros) para os filtros da camada de consultas.
+    Listas viram `IN (...)`; None significa sem filtro.
+    """
+    clauses, params = [], []
+    if year_range is not None:
+        clauses.append("ReleaseYear BETWEEN ? AND ?")
+        params.extend(year_range)
+    for arg, values in filters.items():
+        if arg not in FILTER_COLUMNS:
+            raise ValueError(f"Filtro desconhecido: {arg}")
+        if values is None:
+            continue
+        values = list(values)
+        clauses.append(f"{_quote(FILTER_COLUMNS[arg])} IN ({', '.join('?' * len(values))})" if values else "0")
+        params.extend(values)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def sql(query, params=(), csv_path=CSV_PATH):
+    """
+    Executa uma consulta SQL qualquer sobre a tabela `movies` e devolve um DataFrame.
+    """
+    ensure_store(csv_path)
+    with closing(connect()) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def query_rows(columns=None, year_range=None, order_by_year=False, csv_path=CSV_PATH, **filters):
+    """
+    Linhas que atendem aos filtros, apenas com as colunas pedidas (None = todas).
+
+    Filtros: year_range=(inicio, fim), genres, countries, directors, actors.
+    Com `order_by_year=True` as linhas vêm na ordem do snapshot (por ano,
+    anos faltando no fim, ordem do CSV dentro de cada ano).
+    """
+    select = '*' if columns is None else ', '.join(_quote(c) for c in columns)
+    where, params = _where(year_range, **filters)
+    order = " ORDER BY ReleaseYear IS NULL, ReleaseYear, rowid" if order_by_year else ""
+    return sql(f"SELECT {select} FROM {TABLE}{where}{order}", params, csv_path)
+
+
+def query_groups(by, aggregates, year_range=None, csv_path=CSV_PATH, **filters):
+    """
+    Agregados por grupo calculados pelo SQLite.
+
+    `by` é uma coluna ou lista de colunas; `aggregates` mapeia o nome da
+    coluna de saída para (função, coluna), ex.: {'ROI_Médio': ('AVG', 'ROI')}.
+    Use ('COUNT', '*') para contar linhas.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    selects = [_quote(c) for c in by]
+    for alias, (func, col) in aggregates.items():
+        if func.upper() not in AGGREGATE_FUNCTIONS:
+            raise ValueError(f"Função de agregação não suportada: {func}")
+        selects.append(f"{func.upper()}({'*' if col == '*' else _quote(col)}) AS {_quote(alias)}")
+    where, params = _where(year_range, **filters)
+    group = ', '.join(_quote(c) for c in by)
+    result = sql(f"SELECT {', '.join(selects)} FROM {TABLE}{where} GROUP BY {group}", params, csv_path)
+    return result.set_index(by)
+
+
+if __name__ == '__main__':
+    meta = ensure_store(CSV_PATH)
+    print(f"{meta['num_rows']:,} linhas em {DB_PATH}")
+    print(query_groups('Genre', {'Filmes': ('COUNT', '*'), 'ROI_Médio': ('AVG', 'ROI')}).to_string())
@@ -0,0 +1,289 @@
+"""
+Modo streaming: agregações sobre o CSV lido em blocos de tamanho limitado.
+
+Para catálogos maiores que a memória do servidor o DataFrame completo nunca
+é montado. O CSV é lido em blocos pelo leitor incremental do pyarrow; cada
+bloco recebe as colunas derivadas (ver add_derived_columns), gera as tabelas
+parciais registradas em aggregations (cubo, talentos, países, estatísticas
+por coluna) e é descartado. As parciais são combinadas bloco a bloco por
+funções de merge (somas, contagens, mínimos e máximos).
+
+Como no snapshot, linhas repetidas do CSV são descartadas. Uma vez por
+versão do CSV, duplicate_rows lê todas as colunas, calcula a impressão de
+cada linha (ver fingerprints.py) e grava os pares (impressão, posição) em
+partições no disco, separadas pela impressão; cada partição é ordenada sozinha
+e as posições das linhas repetidas ficam em STREAM_DUPLICATES_PATH. As
+passadas seguintes leem só as colunas necessárias e pulam essas posições. As
+quantidades de linhas e de repetidas ficam em STREAM_META_PATH.
+
+O pico de memória é controlado por STREAM_MEMORY_BYTES (ou pela variável de
+ambiente DASHBOARD_STREAM_MEMORY_MB): o tamanho de cada bloco lido é uma
+fração desse orçamento. O modo é ativado automaticamente para CSVs maiores
+que STREAMING_MIN_SOURCE_BYTES, ou forçado com DASHBOARD_STREAMING=1 / 0.
+
+Uso: python streaming.py   (imprime as estatísticas por coluna calculadas em blocos)
+"""
+
+import csv
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow.csv as pv
+
+from compact import compact_dataframe, concat_rows
+from fingerprints import read_index, row_fingerprints, write_index
+from snapshot import (CACHE_DIR, CSV_PATH, CSV_READ_TYPES, OPENING_RATIOS, _source_stat, _write_json_atomic,
+                      add_derived_columns, cast_csv_integers, file_hash)
+
+STREAM_META_PATH = os.path.join(CACHE_DIR, 'stream.meta.json')
+STREAM_DUPLICATES_PATH = os.path.join(CACHE_DIR, 'stream.duplicates.npy')
+
+# Orçamento de memória do processamento em blocos
+STREAM_MEMORY_BYTES = int(os.environ.get('DASHBOARD_STREAM_MEMORY_MB', 512)) * 1024 * 1024
+
+# Quantas vezes um bloco do CSV cresce em memória (tabela Arrow, DataFrame,
+# colunas derivadas e temporários dos groupbys)
+BLOCK_EXPANSION = 8
+
+# Menor tamanho de linha do CSV suposto ao dividir as impressões em partições
+# (superestima o número de linhas, e portanto o tamanho de cada partição)
+MIN_ROW_BYTES = 32
+
+# Limite de partições (arquivos abertos ao mesmo tempo) da busca de repetidas
+MAX_DEDUP_PARTITIONS = 512
+
+# Par gravado nas partições: impressão da linha e sua posição no CSV
+_DEDUP_ENTRY = np.dtype([('fingerprint', 'uint64'), ('row', 'int64')])
+
+# CSVs acima desse tamanho são agregados em blocos, sem snapshot em memória
+STREAMING_MIN_SOURCE_BYTES = 2 * 1024 ** 3
+
+
+def streaming_enabled(csv_path=CSV_PATH):
+    """
+    Indica se o dataset deve ser processado em blocos (ver docstring do módulo).
+    """
+    forced = os.environ.get('DASHBOARD_STREAMING')
+    if forced is not None:
+        return forced == '1'
+    return os.path.getsize(csv_path) > STREAMING_MIN_SOURCE_BYTES
+
+
+def block_size(memory_bytes=None):
+    """
+    Tamanho em bytes de cada bloco do CSV para o orçamento de memória dado.
+    """
+    memory_bytes = STREAM_MEMORY_BYTES if memory_bytes is None else memory_bytes
+    # O leitor do pyarrow aceita blocos de no máximo 2 GB
+    return int(min(max(memory_bytes // BLOCK_EXPANSION, 1 << 20), (1 << 31) - 1))
+
+
+def _read_meta(stat):
+    """
+    Metadados gravados em STREAM_META_PATH, se ainda correspondem a `stat`.
+    """
+    try:
+        with open(STREAM_META_PATH, encoding='utf-8') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if meta.get('size') != stat['size'] or meta.get('mtime_ns') != stat['mtime_ns']:
+        return None
+    return meta
+
+
+def source_version(csv_path=CSV_PATH):
+    """
+    Metadados da versão do CSV no modo streaming (não há snapshot): o hash é
+    recalculado apenas quando tamanho ou mtime mudam. As quantidades de
+    linhas e de repetidas só são conhecidas depois de uma passada (None antes).
+    """
+    stat = _source_stat(csv_path)
+    meta = _read_meta(stat)
+    if meta is None:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        meta = {'source': os.path.abspath(csv_path), 'sha256': file_hash(csv_path), **stat}
+        _write_json_atomic(STREAM_META_PATH, meta)
+    return {'num_rows': None, 'duplicates': None, **meta, 'backend': 'streaming'}
+
+
+def _record_counts(csv_path, counts):
+    """
+    Grava em STREAM_META_PATH as quantidades de linhas e de repetidas de uma
+    passada completa, se o CSV não mudou desde que os metadados foram gravados.
+    """
+    meta = _read_meta(_source_stat(csv_path))
+    if meta is not None:
+        _write_json_atomic(STREAM_META_PATH, {**meta, **counts})
+
+
+def _source_columns(header, columns):
+    """
+    Colunas do CSV necessárias para produzir `columns` (inclui as usadas pelas derivadas).
+    """
+    needed = set()
+    for col in columns:
+        if col in header:
+            needed.add(col)
+        elif col == 'ROI':
+            needed.update(['Global_BoxOfficeUSD', 'BudgetUSD'])
+        elif col in ('International_BoxOffice', 'International_Percentage'):
+            needed.update(['Global_BoxOfficeUSD', 'US_BoxOfficeUSD'])
+        elif col in OPENING_RATIOS:
+            needed.update(OPENING_RATIOS[col])
+        elif col == 'ReleaseYear':
+            needed.update(c for c in ('ReleaseDate', 'Year') if c in header)
+    return [c for c in header if c in needed]
+
+
+def _open_csv(csv_path, include, memory_bytes):
+    return pv.open_csv(
+        csv_path,
+        read_options=pv.ReadOptions(block_size=block_size(memory_bytes)),
+        convert_options=pv.ConvertOptions(column_types=CSV_READ_TYPES, include_columns=include)
+    )
+
+
+def iter_chunks(csv_path=CSV_PATH, columns=None, memory_bytes=None, skip_rows=None):
+    """
+    Percorre o CSV em blocos, devolvendo DataFrames com as colunas derivadas
+    e apenas as colunas pedidas (None = todas). As linhas nas posições
+    (ordenadas) de `skip_rows` são descartadas (ver duplicate_rows).
+    """
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f))
+    include = header if columns is None else _source_columns(header, columns)
+
+    start = 0
+    for batch in _open_csv(csv_path, include, memory_bytes):
+        chunk = add_derived_columns(cast_csv_integers(batch).to_pandas())
+        if skip_rows is not None and len(skip_rows):
+            lo, hi = np.searchsorted(skip_rows, np.array([start, start + len(chunk)], dtype=skip_rows.dtype))
+            if hi > lo:
+                keep = np.ones(len(chunk), dtype=bool)
+                keep[np.asarray(skip_rows[lo:hi], dtype='int64') - start] = False
+                chunk = chunk[keep]
+        start += batch.num_rows
+        yield chunk if columns is None else chunk[list(columns)]
+
+
+def _dedup_partitions(csv_path, memory_bytes):
+    """
+    Partições da busca de repetidas: cada uma, com os temporários da
+    ordenação, deve ocupar no máximo metade do orçamento de memória.
+    """
+    rows = os.path.getsize(csv_path) // MIN_ROW_BYTES + 1
+    per_partition = max(memory_bytes // 2 // (4 * _DEDUP_ENTRY.itemsize), 1)
+    return int(min(max(-(-rows // per_partition), 1), MAX_DEDUP_PARTITIONS))
+
+
+def _find_duplicates(csv_path, memory_bytes):
+    """
+    Posições das linhas que repetem uma linha anterior do CSV e o total de
+    linhas lidas. Só um bloco e uma partição ficam em memória por vez.
+    """
+    partitions = _dedup_partitions(csv_path, memory_bytes)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=CACHE_DIR, prefix='stream-dedup-') as tmp:
+        paths = [os.path.join(tmp, f"{p}.bin") for p in range(partitions)]
+        files = [open(path, 'wb') for path in paths]
+        rows = 0
+        try:
+            for batch in _open_csv(csv_path, None, memory_bytes):
+                fingerprints = row_fingerprints(cast_csv_integers(batch).to_pandas())
+                entries = np.empty(len(fingerprints), dtype=_DEDUP_ENTRY)
+                entries['fingerprint'] = fingerprints
+                entries['row'] = np.arange(rows, rows + len(entries))
+                rows += len(entries)
+                # Cada partição recebe suas linhas na ordem do CSV
+                partition = fingerprints % np.uint64(partitions)
+                order = np.argsort(partition, kind='stable')
+                bounds = np.searchsorted(partition[order], np.arange(partitions + 1, dtype='uint64'))
+                for p in np.flatnonzero(np.diff(bounds)):
+                    entries[order[bounds[p]:bounds[p + 1]]].tofile(files[p])
+        finally:
+            for f in files:
+                f.close()
+
+        duplicates = [np.empty(0, dtype='int64')]
+        for path in paths:
+            entries = np.fromfile(path, dtype=_DEDUP_ENTRY)
+            os.remove(path)
+            # Ordenação estável: entre impressões iguais fica primeiro a linha mais antiga
+            entries = entries[np.argsort(entries['fingerprint'], kind='stable')]
+            repeated = entries['fingerprint'][1:] == entries['fingerprint'][:-1]
+            duplicates.append(entries['row'][1:][repeated])
+    return np.sort(np.concatenate(duplicates)), rows
+
+
+def duplicate_rows(csv_path=CSV_PATH, memory_bytes=None):
+    """
+    Posições (ordenadas, mapeadas do disco) das linhas do CSV que repetem uma
+    linha anterior. Calculadas uma vez por versão do CSV, em uma passada
+    com todas as colunas; processos que a façam ao mesmo tempo chegam ao
+    mesmo resultado, gravado de forma atômica.
+    """
+    meta = source_version(csv_path)
+    if meta['duplicates'] is not None:
+        positions = read_index(STREAM_DUPLICATES_PATH, meta['duplicates'])
+        if positions is not None:
+            return positions
+    positions, rows = _find_duplicates(csv_path, STREAM_MEMORY_BYTES if memory_bytes is None else memory_bytes)
+    write_index(STREAM_DUPLICATES_PATH, positions)
+    _record_counts(csv_path, {'num_rows': rows - len(positions), 'duplicates': len(positions)})
+    return read_index(STREAM_DUPLICATES_PATH, len(positions))
+
+
+def stream_artifacts(artifacts, csv_path=CSV_PATH, memory_bytes=None):
+    """
+    Calcula várias tabelas parciais em uma única passada pelo CSV, sem as
+    linhas repetidas (ver duplicate_rows).
+
+    `artifacts` mapeia nome -> (colunas, build, merge), como em
+    aggregations.ARTIFACTS. Devolve nome -> tabela combinada.
+    """
+    columns = list(dict.fromkeys(col for cols, _, _ in artifacts.values() for col in cols))
+    partials = {}
+    skip_rows = duplicate_rows(csv_path, memory_bytes)
+    for chunk in iter_chunks(csv_path, columns, memory_bytes, skip_rows):
+        for name, (cols, build, merge) in artifacts.items():
+            part = build(chunk[list(cols)])
+            partials[name] = part if name not in partials else merge(partials[name], part)
+
+    # CSV sem linhas: tabelas vazias com as colunas certas
+    for name, (cols, build, _) in artifacts.items():
+        if name not in partials:
+            partials[name] = build(pd.DataFrame({col: pd.Series(dtype='float64') for col in cols}))
+    return partials
+
+
+def read_frame(columns, csv_path=CSV_PATH, memory_bytes=None):
+    """
+    Lê apenas as colunas pedidas (None = todas), bloco a bloco e já
+    compactadas, sem as linhas repetidas e ordenadas por ReleaseYear como no
+    snapshot. Devolve (DataFrame, anos das linhas). Só as colunas pedidas
+    ficam em memória.
+    """
+    read_columns = None if columns is None else list(dict.fromkeys(list(columns) + ['ReleaseYear']))
+    skip_rows = duplicate_rows(csv_path, memory_bytes)
+    chunks = [compact_dataframe(chunk) for chunk in iter_chunks(csv_path, read_columns, memory_bytes, skip_rows)]
+    if not chunks:
+        return pd.DataFrame(columns=columns), np.empty(0)
+
+    frame = concat_rows(chunks)
+    years = frame['ReleaseYear'].to_numpy(dtype='float64', na_value=np.nan)
+    order = np.argsort(years, kind='stable')
+    if columns is not None:
+        frame = frame[list(columns)]
+    return frame.take(order).reset_index(drop=True), years[order]
+
+
+if __name__ == '__main__':
+    import aggregations as agg
+
+    stats = stream_artifacts({'column_stats': agg.ARTIFACTS['column_stats']})['column_stats']
+    print(agg.summarize_column_stats(stats).to_string())
+    print(f"\nBlocos de {block_size() / 1e6:.0f} MB (orçamento de {STREAM_MEMORY_BYTES / 1e6:.0f} MB)")
@@ -0,0 +1,51 @@
+"""
+Resumo do dataset para a página inicial.
+
+Os KPIs da Home (total de filmes, gêneros, bilheteria total e ROI médio)
+ficam em um JSON pequeno em .dashboard_cache, junto com o tamanho e o mtime
+do CSV de onde saíram. Enquanto o CSV não muda, a página inicial é montada
+só com esse arquivo, sem importar pandas nem carregar o dataset; quando ele
+muda, os KPIs são recalculados pelo motor de agregações (ver
+utils.load_overview) e o arquivo é regravado.
+"""
+
+import json
+import os
+
+from paths import CACHE_DIR, CSV_PATH
+
+SUMMARY_PATH = os.path.join(CACHE_DIR, 'summary.json')
+
+# Versão do formato do resumo: incrementar quando os KPIs mudarem
+SUMMARY_FORMAT = 1
+
+
+def source_stat(csv_path=CSV_PATH):
+    stat = os.stat(csv_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def read_summary(csv_path=CSV_PATH, path=SUMMARY_PATH):
+    """
+    KPIs gravados, se ainda correspondem ao CSV atual; senão None.
+    """
+    try:
+        with open(path, encoding='utf-8') as f:
+            summary = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if summary.get('format') != SUMMARY_FORMAT or summary.get('source') != source_stat(csv_path):
+        return None
+    return summary['overview']
+
+
+def write_summary(overview, stat, path=SUMMARY_PATH):
+    """
+    Grava os KPIs calculados a partir do CSV com `stat` (tamanho e mtime
+    lidos antes do cálculo: se o CSV mudou no meio, o resumo já nasce vencido).
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'format': SUMMARY_FORMAT, 'source': stat, 'overview': overview}, f, indent=2)
+    os.replace(tmp_path, path)
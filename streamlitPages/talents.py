@@ -0,0 +1,104 @@
+"""
+Rankings pré-calculados de diretores e atores.
+
+A tabela de estatísticas por talento (ver aggregations.talent_stats) é
+montada uma vez por versão do dataset. Para cada métrica de ordenação guardamos
+as posições dos talentos em ordem decrescente; um Top N com mínimo de filmes
+percorre esse índice até juntar N talentos, sem groupby nem nlargest sobre a
+tabela inteira a cada mudança de filtro.
+
+Com muitos talentos o gráfico de produtividade (um ponto por talento) fica
+lento de desenhar; acima de SCATTER_MAX_POINTS ele passa a ser um mapa de
+densidade montado a partir de uma grade pré-calculada (TalentGrid), cujo
+custo de desenho não depende do número de talentos.
+"""
+
+import numpy as np
+
+LEADERBOARD_METRICS = ['Total_Bilheteria', 'ROI_Médio', 'Rating_Médio', 'Bilheteria_por_Filme']
+
+# Acima dessa quantidade de talentos o gráfico de dispersão vira mapa de densidade
+SCATTER_MAX_POINTS = 5000
+
+# Colunas da grade com um número exato de filmes (o corte por mínimo de
+# filmes é exato até aqui); acima disso as colunas agrupam faixas de
+# largura crescente (a contagem de filmes por talento tem cauda longa)
+GRID_FILM_BINS = 40
+GRID_VALUE_BINS = 50
+
+
+class TalentLeaderboard:
+    """
+    Índices ordenados de uma tabela de talentos, um por métrica.
+    """
+
+    def __init__(self, stats, metrics=LEADERBOARD_METRICS):
+        self.stats = stats
+        self.num_films = stats['Num_Filmes'].to_numpy()
+        self.orders = {}
+        for metric in metrics:
+            values = stats[metric].to_numpy(dtype='float64')
+            valid = np.flatnonzero(~np.isnan(values))
+            # Ordenação estável: empates mantêm a ordem da tabela, como no nlargest
+            self.orders[metric] = valid[np.argsort(-values[valid], kind='stable')]
+        # Quantidade de talentos por mínimo de filmes (ver count)
+        self._sorted_films = np.sort(self.num_films)
+
+    def count(self, min_films):
+        """
+        Quantidade de talentos com pelo menos `min_films` filmes.
+        """
+        return len(self._sorted_films) - np.searchsorted(self._sorted_films, min_films, side='left')
+
+    def top(self, min_films, metric, n):
+        """
+        Os `n` talentos com maior `metric` entre os que têm pelo menos
+        `min_films` filmes (mesmo resultado de `stats[...].nlargest(n, metric)`).
+        """
+        order = self.orders[metric]
+        # Percorre o índice em blocos crescentes até encontrar n talentos
+        size = max(n, 1) * 4
+        while True:
+            head = order[:size]
+            positions = head[self.num_films[head] >= min_films]
+            if len(positions) >= n or size >= len(order):
+                return self.stats.iloc[positions[:n]]
+            size *= 4
+
+
+class TalentGrid:
+    """
+    Histograma 2D de (Num_Filmes, Bilheteria_por_Filme em milhões) com a
+    quantidade de talentos e a soma do Rating_Médio em cada célula.
+    """
+
+    def __init__(self, stats):
+        films = stats['Num_Filmes'].to_numpy(dtype='float64')
+        value = stats['Bilheteria_por_Filme'].to_numpy(dtype='float64') / 1e6
+        rating = stats['Rating_Médio'].to_numpy(dtype='float64')
+
+        max_films = films.max() if len(films) else 1
+        self.film_edges = np.arange(0.5, min(max_films, GRID_FILM_BINS) + 1)
+        if max_films > GRID_FILM_BINS:
+            extra = np.geomspace(self.film_edges[-1], max_films + 0.5, GRID_FILM_BINS + 1)[1:]
+            self.film_edges = np.concatenate([self.film_edges, extra])
+        top_value = np.nanmax(value) if np.isfinite(value).any() else 0.0
+        self.value_edges = np.linspace(0, top_value if top_value > 0 else 1.0, GRID_VALUE_BINS + 1)
+
+        bins = [self.film_edges, self.value_edges]
+        valid = ~np.isnan(value)
+        self.counts = np.histogram2d(films[valid], value[valid], bins=bins)[0]
+        rated = valid & ~np.isnan(rating)
+        self.rating_counts = np.histogram2d(films[rated], value[rated], bins=bins)[0]
+        self.rating_sums = np.histogram2d(films[rated], value[rated], bins=bins, weights=rating[rated])[0]
+
+    def select(self, min_films):
+        """
+        Grade apenas com as colunas de talentos com pelo menos `min_films` filmes.
+        Devolve (bordas de filmes, bordas de bilheteria, quantidade, rating médio).
+        """
+        start = np.searchsorted(self.film_edges, min_films - 0.5)
+        start = min(start, len(self.film_edges) - 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean_rating = self.rating_sums[start:] / self.rating_counts[start:]
+        return self.film_edges[start:], self.value_edges, self.counts[start:], mean_rating
@@ -0,0 +1,198 @@
+"""
+Medição do tempo de cada fase da execução de uma página.
+
+Cada rerun de página abre um PageTimer (ver utils.start_page_timing); os
+trechos medidos são marcados com `phase(nome)`:
+
+- load:      leitura dos dados (snapshot, banco, CSV)
+- filter:    seleção das linhas pelos filtros da página
+- aggregate: cálculo das tabelas exibidas
+- render:    montagem das figuras (matplotlib/seaborn)
+- serialize: conversão das figuras em imagem e envio ao Streamlit
+
+As fases podem ser aninhadas: cada uma conta apenas o próprio tempo (uma
+leitura feita dentro de uma agregação conta como load, não como aggregate).
+Fora de uma página (notebooks, scripts) `phase` não faz nada.
+
+Ao final do rerun o registro é gravado como uma linha JSON no log
+(.dashboard_cache/timings.jsonl, ou DASHBOARD_TIMING_LOG; vazio desativa).
+Os percentis das fases nos reruns da sessão só são calculados quando o
+painel de tempos está ligado.
+O log é limitado a TIMING_LOG_MAX_BYTES: ao passar do limite ele vira
+timings.jsonl.1 (substituindo o anterior) e um novo log é iniciado. Vários
+servidores gravam no mesmo log, então a rotação é feita sob o lock entre
+processos do snapshot (timings.jsonl.lock).
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+
+from paths import CACHE_DIR
+
+PHASES = ['load', 'filter', 'aggregate', 'render', 'serialize']
+
+TIMING_LOG_PATH = os.environ.get('DASHBOARD_TIMING_LOG', os.path.join(CACHE_DIR, 'timings.jsonl'))
+PROFILE_DIR = os.path.join(CACHE_DIR, 'profiles')
+
+# Tamanho máximo do log antes da rotação (mantém um arquivo anterior)
+TIMING_LOG_MAX_BYTES = int(os.environ.get('DASHBOARD_TIMING_LOG_MB', 10)) * 1024 * 1024
+
+PERCENTILES = [50, 90, 99]
+
+# Reruns por sessão considerados nos percentis
+SESSION_HISTORY = 200
+
+# Linhas do relatório do cProfile exibidas no painel
+PROFILE_LINES = 30
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+
+class PageTimer:
+    """
+    Tempos das fases de um rerun de página.
+    """
+
+    def __init__(self, page, session_id, profile=False):
+        self.page = page
+        self.session_id = session_id
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.started = time.perf_counter()
+        self.total = None
+        self.profile_report = None
+        self._stack = []
+        self._profiler = cProfile.Profile() if profile else None
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._stack.pop()
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def finish(self):
+        """
+        Encerra a medição e devolve o registro do rerun.
+        """
+        if self.total is None:
+            self.total = time.perf_counter() - self.started
+            if self._profiler is not None:
+                self._profiler.disable()
+                self.profile_report = _profile_report(self._profiler, self.page)
+        measured = sum(self.phases.values())
+        return {
+            'ts': time.time(),
+            'page': self.page,
+            'session': self.session_id,
+            'total_s': round(self.total, 6),
+            'phases': {name: round(value, 6) for name, value in self.phases.items()},
+            'other_s': round(max(self.total - measured, 0.0), 6),
+        }
+
+
+def _profile_report(profiler, page):
+    """
+    Grava o perfil em PROFILE_DIR e devolve as funções mais custosas em texto.
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(PROFILE_DIR, f"{page}-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+    profiler.dump_stats(path)
+    buffer = io.StringIO()
+    pstats.Stats(profiler, stream=buffer).sort_stats('cumulative').print_stats(PROFILE_LINES)
+    return path, buffer.getvalue()
+
+
+def start_timer(page, session_id, profile=False):
+    """
+    Abre o PageTimer do rerun atual (um por thread, como os reruns do Streamlit).
+    """
+    _local.timer = PageTimer(page, session_id, profile)
+    return _local.timer
+
+
+def current_timer():
+    return getattr(_local, 'timer', None)
+
+
+def stop_timer():
+    """
+    Encerra o PageTimer do rerun atual e devolve seu registro (ou None).
+    """
+    timer = current_timer()
+    _local.timer = None
+    return None if timer is None else timer.finish()
+
+
+@contextlib.contextmanager
+def phase(name):
+    """
+    Mede o trecho como a fase `name` do rerun atual (nada fora de uma página).
+    """
+    timer = current_timer()
+    if timer is None:
+        yield
+    else:
+        with timer.phase(name):
+            yield
+
+
+def session_percentiles(history):
+    """
+    Percentis de cada fase (e do total) em uma lista de registros.
+    """
+    if not history:
+        return {}
+    import numpy as np
+
+    columns = {name: [r['phases'].get(name, 0.0) for r in history] for name in PHASES}
+    columns['other_s'] = [r['other_s'] for r in history]
+    columns['total_s'] = [r['total_s'] for r in history]
+    return {
+        name: dict(zip((f"p{p}" for p in PERCENTILES),
+                       np.round(np.percentile(values, PERCENTILES), 6).tolist()))
+        for name, values in columns.items()
+    }
+
+
+def _log_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+def append_log(record, path=TIMING_LOG_PATH):
+    """
+    Acrescenta o registro como uma linha JSON ao log de tempos, rotacionando
+    o arquivo quando ele passa de TIMING_LOG_MAX_BYTES.
+    """
+    if not path:
+        return
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    line = json.dumps(record, ensure_ascii=False) + '\n'
+    with _log_lock:
+        if _log_size(path) + len(line) > TIMING_LOG_MAX_BYTES:
+            # Só um processo rotaciona: o tamanho é conferido de novo sob o
+            # lock (importado aqui para não carregar pandas/pyarrow a cada rerun)
+            from snapshot import _snapshot_lock
+
+            with _snapshot_lock(lock_path=f"{path}.lock"):
+                if _log_size(path) + len(line) > TIMING_LOG_MAX_BYTES:
+                    os.replace(path, f"{path}.1")
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line)
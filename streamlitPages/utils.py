@@ -1,39 +1,178 @@
 """
 Arquivo de utilidades para compartilhar dados e funções entre páginas
+
+Os módulos de dados (pandas, pyarrow, motor de agregações) são importados
+dentro das funções: a página inicial usa apenas o resumo em disco (ver
+summary.py) e não paga o custo desses imports.
 """
 
+import os
+import uuid
+
 import streamlit as st
-import pandas as pd
 
-@st.cache_data
-def load_data():
+import timing
+from paths import CSV_PATH
+from summary import read_summary, source_stat, write_summary
+
+def load_data(columns=None, compact=False, cleaned=False):
     """
     Carrega e processa os dados dos filmes.
-    O decorator @st.cache_data garante que os dados sejam carregados apenas uma vez.
+
+    Os dados vêm do snapshot Parquet (ver snapshot.py), que já contém ROI,
+    ReleaseYear e a participação internacional na bilheteria. Passe `columns`
+    para ler apenas as colunas usadas pela página. Com `compact=True` o
+    DataFrame usa categorias e tipos reduzidos (ver compact.py).
+
+    Com DASHBOARD_BACKEND=shared e `compact=True` as linhas vêm dos arquivos
+    mapeados em memória (ver shared_store.py), sem cópia; nos demais casos o
+    resultado é guardado pelo @st.cache_data (uma cópia por processo), por
+    versão do CSV: quando o CSV muda, a próxima chamada lê os dados novos.
+
+    Com `cleaned=True` as linhas vêm do arquivo limpo (sem duplicatas e sem
+    valores fora da faixa, ver cleaning.py), com o relatório de qualidade em
+    `df.attrs['quality']`.
     """
+    from aggregations import dataset_version, load_frame
+    from shared_store import shared_enabled
+
     try:
-        df = pd.read_csv('movies_dataset.csv')
-        
-        # Cálculo do ROI
-        if 'ROI' not in df.columns:
-            df['ROI'] = ((df['Global_BoxOfficeUSD'] - df['BudgetUSD']) / df['BudgetUSD']) * 100
-        
-        # Garantir que ReleaseYear existe
-        if 'ReleaseYear' not in df.columns:
-            if 'ReleaseDate' in df.columns:
-                df['ReleaseYear'] = pd.to_datetime(df['ReleaseDate'], errors='coerce').dt.year
-            elif 'Year' in df.columns:
-                df['ReleaseYear'] = df['Year']
-        
-        return df
-    
+        if compact and shared_enabled() and not cleaned:
+            return load_frame(None if columns is None else tuple(columns))
+        version = dataset_version(CSV_PATH)
+
+    except FileNotFoundError:
+        st.error(f"❌ Arquivo '{CSV_PATH}' não encontrado!")
+        st.stop()
+    return _load_cached_data(columns, compact, cleaned, version)
+
+@st.cache_data(max_entries=8)
+def _load_cached_data(columns=None, compact=False, cleaned=False, data_version=None):
+    """
+    Leitura de load_data guardada pelo Streamlit.
+    O decorator @st.cache_data garante que os dados sejam carregados apenas
+    uma vez por versão do CSV (`data_version` só entra na chave do cache).
+    """
+    from compact import compact_dataframe
+    from snapshot import ensure_snapshot, read_snapshot
+
+    try:
+        with timing.phase('load'):
+            if cleaned:
+                from cleaning import read_clean
+                df = read_clean(columns, CSV_PATH)
+            else:
+                ensure_snapshot(CSV_PATH)
+                df = read_snapshot(columns)
+            return compact_dataframe(df) if compact else df
+
+    except FileNotFoundError:
+        st.error(f"❌ Arquivo '{CSV_PATH}' não encontrado!")
+        st.stop()
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar dados: {str(e)}")
+        st.stop()
+
+def load_dataset_version():
+    """
+    Hash do CSV que originou o snapshot (ver aggregations.dataset_version).
+    Identifica a versão dos dados nos caches de figuras e de agregações.
+    """
+    from aggregations import dataset_version
+
+    try:
+        with timing.phase('load'):
+            return dataset_version(CSV_PATH)
+
     except FileNotFoundError:
-        st.error("❌ Arquivo 'movies_dataset.csv' não encontrado!")
+        st.error(f"❌ Arquivo '{CSV_PATH}' não encontrado!")
         st.stop()
     except Exception as e:
         st.error(f"❌ Erro ao carregar dados: {str(e)}")
         st.stop()
 
+def load_overview():
+    """
+    KPIs da página inicial, lidos do resumo em disco (ver summary.py).
+    Se o resumo não existe ou o CSV mudou, os KPIs são recalculados pelo
+    motor de agregações e o resumo é regravado.
+    """
+    try:
+        with timing.phase('load'):
+            overview = read_summary(CSV_PATH)
+        if overview is not None:
+            return overview
+
+        stat = source_stat(CSV_PATH)
+        load_dataset_version()
+        import aggregations as agg
+        with timing.phase('aggregate'):
+            overview = agg.overview()
+        write_summary(overview, stat)
+        return overview
+
+    except FileNotFoundError:
+        st.error(f"❌ Arquivo '{CSV_PATH}' não encontrado!")
+        st.stop()
+
+def timing_enabled():
+    """
+    Painel de tempos ligado por DASHBOARD_TIMING=1 ou pelo parâmetro ?timing=1 da URL.
+    """
+    return os.environ.get('DASHBOARD_TIMING') == '1' or st.query_params.get('timing') == '1'
+
+def start_page_timing(page):
+    """
+    Começa a medir as fases do rerun da página (ver timing.py).
+    Chamar logo após st.set_page_config; o rerun é encerrado por show_timing_panel.
+    """
+    session_id = st.session_state.setdefault('_timing_session', uuid.uuid4().hex)
+    profile = st.session_state.pop('_timing_profile_next', False)
+    timing.start_timer(page, session_id, profile)
+
+def show_timing_panel():
+    """
+    Encerra a medição do rerun, grava o registro no log de tempos e, se o
+    painel estiver ligado, mostra na sidebar os tempos e os percentis da sessão.
+    """
+    timer = timing.current_timer()
+    record = timing.stop_timer()
+    if record is None:
+        return
+
+    history = st.session_state.setdefault('_timing_history', {}).setdefault(record['page'], [])
+    history.append(record)
+    del history[:-timing.SESSION_HISTORY]
+    timing.append_log(record)
+
+    if not timing_enabled():
+        return
+    import pandas as pd
+
+    percentiles = timing.session_percentiles(history)
+
+    with st.sidebar.expander("⏱️ Tempos da página", expanded=True):
+        rows = {name: record['phases'][name] for name in timing.PHASES}
+        rows['outros'] = record['other_s']
+        rows['total'] = record['total_s']
+        table = pd.DataFrame({'Rerun (ms)': pd.Series(rows) * 1000})
+        for p in timing.PERCENTILES:
+            table[f"p{p} sessão (ms)"] = pd.Series(
+                {name: values[f"p{p}"] for name, values in percentiles.items()}
+            ).rename({'other_s': 'outros', 'total_s': 'total'}) * 1000
+        st.dataframe(table.round(1), use_container_width=True)
+        st.caption(f"{len(history)} reruns nesta sessão")
+
+        if st.button("🔬 Perfilar o próximo rerun (cProfile)"):
+            st.session_state['_timing_profile_next'] = True
+            st.rerun()
+        if timer.profile_report is not None:
+            st.session_state['_timing_profile_report'] = timer.profile_report
+        if '_timing_profile_report' in st.session_state:
+            path, report = st.session_state['_timing_profile_report']
+            st.caption(f"Último perfil gravado em {path}")
+            st.code(report)
+
 # def create_sidebar():
 #     """
 #     Cria a sidebar de navegação padrão para todas as páginas
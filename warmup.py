@@ -0,0 +1,140 @@
+"""
+Preparação offline do dashboard (warm-up), para rodar após cada deploy ou
+atualização do CSV, antes de o servidor receber visitantes.
+
+1. Atualiza os dados do backend configurado: o snapshot Parquet (leitura do
+   CSV e colunas derivadas, ver snapshot.py), o banco SQLite ou os arquivos
+   compartilhados (DASHBOARD_BACKEND=sqlite / shared).
+2. Monta as tabelas aditivas das quais saem todas as páginas (cubo usado por
+   ROI por gênero, tendências anuais e por década e estatísticas por país;
+   parciais de diretores e atores; momentos das correlações; resumos de
+   quantis; histogramas das proporções de abertura; estatísticas por
+   coluna), cada uma em um processo do pool, e as grava em arquivos Arrow
+   da versão do dataset (ver shared_store.py).
+3. Grava o manifesto (hash do dataset e tabelas prontas) e os KPIs da página
+   inicial (ver summary.py), e calcula as tabelas padrão de cada página a
+   partir das tabelas gravadas, para conferir que estão completas.
+
+O servidor usa as tabelas prontas sempre que o manifesto é da versão atual
+(ver aggregations.load_artifact). `--check` confere em O(1), com um stat do
+CSV e sem calcular o hash, se o manifesto corresponde ao CSV atual.
+
+Rodar no diretório de trabalho do servidor (onde estão o CSV e o .dashboard_cache):
+
+    python warmup.py
+    python warmup.py --workers 4
+    python warmup.py --check
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'streamlitPages'))
+
+import aggregations as agg  # noqa: E402
+from paths import CSV_PATH  # noqa: E402
+from shared_store import read_frame, read_manifest, write_manifest, write_table  # noqa: E402
+from streaming import stream_artifacts  # noqa: E402
+from summary import source_stat, write_summary  # noqa: E402
+
+# Tabelas exibidas pelas páginas com os filtros padrão (conferidas no fim)
+PAGE_TABLES = {
+    'roi_por_genero': lambda: (agg.roi_by_genre(), agg.roi_box_stats()),
+    'tendencias_temporais': lambda: (agg.yearly_trends(), agg.decade_analysis()),
+    'analise_correlacao': lambda: agg.correlation_matrix(),
+    'performance_talentos': lambda: (agg.talent_stats('Director'), agg.talent_stats('LeadActor')),
+    'analise_paises': lambda: agg.country_stats(),
+    'performance_abertura': lambda: (agg.opening_by_genre(), agg.opening_overview(),
+                                     agg.ratio_histogram('Week_to_Total_Ratio')),
+}
+
+
+def _build(name):
+    """
+    Monta e grava uma tabela aditiva (executado em um processo do pool).
+    """
+    started = time.perf_counter()
+    version = agg.current_state().version
+    write_table(version, name, agg.build_artifact(name))
+    return name, version, time.perf_counter() - started
+
+
+def _build_streaming(version):
+    """
+    No modo streaming todas as tabelas saem de uma única passada pelo CSV.
+    """
+    started = time.perf_counter()
+    for name, table in stream_artifacts(agg.ARTIFACTS).items():
+        write_table(version, name, table)
+    elapsed = time.perf_counter() - started
+    return {name: elapsed for name in agg.ARTIFACTS}
+
+
+def warmup(workers=None, force=False):
+    """
+    Prepara dados, tabelas, manifesto e KPIs da versão atual do CSV.
+    Devolve o manifesto (o existente, se já estava atualizado e sem `force`).
+    """
+    stat = source_stat(CSV_PATH)
+    started = time.perf_counter()
+    meta = agg.source_meta(CSV_PATH)
+    version = meta['sha256']
+    print(f"Dados ({meta['backend']}): {time.perf_counter() - started:.2f}s, versão {version[:16]}")
+
+    manifest = read_manifest(CSV_PATH)
+    if not force and manifest is not None and manifest['sha256'] == version:
+        print("Manifesto já corresponde ao CSV atual (use --force para refazer).")
+        return manifest
+
+    if meta['backend'] == 'streaming':
+        timings = _build_streaming(version)
+        # Linhas e repetidas só são conhecidas depois da passada pelo CSV
+        meta = agg.source_meta(CSV_PATH)
+    else:
+        if meta['backend'] == 'shared':
+            # Linhas gravadas uma vez aqui, mapeadas pelos processos do pool
+            read_frame(version)
+        timings = {}
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for name, built_version, elapsed in pool.map(_build, agg.ARTIFACTS):
+                if built_version != version:
+                    raise RuntimeError("O CSV mudou durante a preparação; rode o warm-up de novo.")
+                timings[name] = elapsed
+    for name, elapsed in timings.items():
+        print(f"  {name:<40} {elapsed:6.2f}s")
+
+    write_manifest(version, stat, timings, num_rows=meta['num_rows'], backend=meta['backend'])
+    write_summary(agg.overview(), stat)
+
+    for page, tables in PAGE_TABLES.items():
+        page_started = time.perf_counter()
+        tables()
+        print(f"  página {page:<33} {time.perf_counter() - page_started:6.2f}s")
+    print(f"Total: {time.perf_counter() - started:.2f}s")
+    return read_manifest(CSV_PATH)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-calcula os dados e as tabelas do dashboard.")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="processos do pool (padrão: número de CPUs)")
+    parser.add_argument('--force', action='store_true', help="refaz mesmo com o manifesto atualizado")
+    parser.add_argument('--check', action='store_true',
+                        help="apenas confere se o manifesto corresponde ao CSV (código de saída 1 se não)")
+    args = parser.parse_args()
+
+    if args.check:
+        manifest = read_manifest(CSV_PATH)
+        if manifest is None:
+            print("Manifesto ausente ou de outra versão do CSV.")
+            sys.exit(1)
+        print(f"Manifesto atualizado: versão {manifest['sha256'][:16]}, {len(manifest['artifacts'])} tabelas.")
+        return
+    warmup(args.workers, args.force)
+
+
+if __name__ == '__main__':
+    main()